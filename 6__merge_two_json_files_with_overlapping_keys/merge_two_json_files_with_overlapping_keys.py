@@ -31,62 +31,99 @@ Output:
 ]
 
 
+Provenance (optional, provenance_file):
+    Collected during the merge itself. Every field path (the keys from the
+    record down to the field, e.g. ["age"], ["address", "city"]) gets a bit,
+    and every merged record two bitmasks: the fields whose value comes from
+    file 2, and the fields present in both files with different values
+    (conflicts, file 2 won). Values of different types are different (1, 1.0
+    and true conflict). The counts by field follow the order of the fields.
+
+{
+  "fields": [["user_id"], ["age"], ["city"], ["name"]],
+  "stats": {"records": 3, "overlapping_records": 1, "records_with_conflicts": 1, "conflicts": 1,
+            "conflicts_by_field": [0, 1, 0, 0], "from_file2_by_field": [2, 1, 2, 1]},
+  "records": [[1, 7, 2], [3, 13, 0]]      # [user_id, from file 2 mask, conflicts mask], records only in file 1 omitted
+}
+
+
 
 
 Created on Mon Dec  2 15:06:17 2024
 
 @author: enokj
 """
-import pandas as pd
 import os
-import logging
 import json
+import logging
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manipulation.instrumentation import stage
+from data_manipulation.loader import load_json
+from data_manipulation.writer import write_records
 
-def merge_two_json_files_with_overlapping_keys(file1: str, file2: str, output_file: str) -> None:
+def merge_two_json_files_with_overlapping_keys(file1: str, file2: str, output_file: str, workers: int = None,
+                                                provenance_file: str = None) -> dict | None:
     """
     Merges two JSON files with overlaping keys.
     
     
     Args:
-        file1 (str): Path to first JSON file.
-        file2 (str): Path to second JSON file.
+        file1 (str): Path to first JSON file, optionally gzip, bz2 or zstd compressed.
+        file2 (str): Path to second JSON file, optionally gzip, bz2 or zstd compressed.
         output_file (str): Path to output JSON file. 
+        workers (int): Number of processes used to parse the files. None reads them serially.
+        provenance_file (str): Path to a JSON file receiving the provenance and conflicts of every
+                               field (see MergeProvenance). None does not collect them.
         
     Returns:
-        pd.DataFrame: DataFrame containing the result merge os JSON files
+        dict: Conflict statistics when provenance_file is given, None otherwise.
     """
 
     if not os.path.exists(file1) or not os.path.exists(file2):
         raise FileNotFoundError(f"File '{file1}' and/or '{file2} does not exist.'")
         
     try:
-        with open(file1, 'r') as f1:
-            data1 = json.load(f1)
-        with open(file2, 'r') as f2:
-            data2 = json.load(f2)
+        with stage('merge_two_json_files_with_overlapping_keys'):
+            with stage('load') as s:
+                data1 = load_json(file1, workers=workers)
+                data2 = load_json(file2, workers=workers)
+                s.add_rows(len(data1) + len(data2))
 
-        dict1 = {item["user_id"]: item for item in data1}
-        dict2 = {item["user_id"]: item for item in data2}
-        
-        print("\n\n")
-        print(dict1)
-        print(dict2)
+            with stage('index', rows=len(data1) + len(data2)):
+                dict1 = {item["user_id"]: item for item in data1}
+                dict2 = {item["user_id"]: item for item in data2}
+            
+            # Debug output of whole datasets: only built when it is logged
+            debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+            if debug:
+                logging.debug(f"Records of file 1: {dict1}")
+                logging.debug(f"Records of file 2: {dict2}")
 
-        # Perform a deep merge for overlapping keys
-        merged_dict = {}
-        all_keys = set(dict1.keys()).union(dict2.keys())
-        for key in all_keys:
-            merged_dict[key] = merge_dicts(dict1.get(key, {}), dict2.get(key, {}))
+            # Perform a deep merge for overlapping keys
+            with stage('merge') as s:
+                merged_dict = {}
+                all_keys = set(dict1.keys()).union(dict2.keys())
+                if provenance_file is None:
+                    for key in all_keys:
+                        merged_dict[key] = merge_dicts(dict1.get(key, {}), dict2.get(key, {}))
+                else:
+                    provenance = MergeProvenance()
+                    for key in all_keys:
+                        merged_dict[key] = provenance.merge(key, dict1.get(key, {}), dict2.get(key, {}))
+                s.add_rows(len(merged_dict))
 
-        print("\n\n")
-        print(merged_dict)
+            merged_data = list(merged_dict.values())
+            if debug:
+                logging.debug(f"Merged records: {merged_data}")
 
-        merged_data = list(merged_dict.values())
-        print("\n\n")
-        print(merged_data)
+            with stage('serialize', rows=len(merged_data)):
+                write_records(merged_data, output_file)
 
-        with open(output_file, 'w') as output:
-            json.dump(merged_data, output, indent=4)
+            if provenance_file is not None:
+                with stage('provenance', rows=len(provenance.keys)):
+                    return provenance.save(provenance_file)
 
     except FileNotFoundError as e:
         logging.error(f"File not found error -> {e}", e)
@@ -118,9 +155,128 @@ def merge_dicts(dict1, dict2):
             merged[key] = value  # Overwrite or add new key
     return merged
 
+
+class MergeProvenance:
+    """
+    Provenance of the fields of merged records, kept as two bitmasks per record.
     
-merge_two_json_files_with_overlapping_keys('file1.json', 'file2.json', 'output.json')
-    
-output_df = pd.read_json('output.json')
-print(output_df)
+    Bit i of the masks is the field path fields[i]: the masks are Python integers,
+    so records only pay for the bits of their fields. Paths are tuples of keys,
+    so a nested field ('a', 'b') and a key 'a.b' get different bits.
+    """
+
+    def __init__(self):
+        # field path (tuple of keys) -> bit, in order of first appearance
+        self.bits = {}
+        self.keys = []
+        self.from_file2 = []
+        self.conflicts = []
+        self.overlapping = 0
+
+    @property
+    def fields(self) -> list:
+        return list(self.bits)
+
+    def _bit(self, path: tuple) -> int:
+        bit = self.bits.get(path)
+        if bit is None:
+            bit = self.bits[path] = len(self.bits)
+        return 1 << bit
+
+    def merge(self, key, dict1: dict, dict2: dict) -> dict:
+        """
+        Merges two records as merge_dicts, recording the provenance of their fields.
+        
+        Args:
+            key: Key of the merged record (user_id).
+            dict1 (dict): Record of the first file, {} when missing.
+            dict2 (dict): Record of the second file, {} when missing.
+        
+        Returns:
+            dict: The merged record.
+        """
+        merged, from_file2, conflicts = self._merge(dict1, dict2, ())
+        if dict1 and dict2:
+            self.overlapping += 1
+        self.keys.append(key)
+        self.from_file2.append(from_file2)
+        self.conflicts.append(conflicts)
+        return merged
+
+    def _merge(self, dict1: dict, dict2: dict, prefix: tuple) -> tuple:
+        merged = dict1.copy()
+        from_file2 = conflicts = 0
+        for key, value in dict2.items():
+            if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
+                merged[key], nested_file2, nested_conflicts = self._merge(merged[key], value, prefix + (key,))
+                from_file2 |= nested_file2
+                conflicts |= nested_conflicts
+            else:
+                bit = self._bit(prefix + (key,))
+                from_file2 |= bit
+                if key in merged and not same_value(merged[key], value):
+                    conflicts |= bit
+                merged[key] = value
+        return merged, from_file2, conflicts
+
+    def field_names(self, mask: int) -> list:
+        """
+        Returns the field paths of the bits set in a mask.
+        """
+        return [field for field, bit in self.bits.items() if mask >> bit & 1]
+
+    def _count_bits(self, masks: list) -> list:
+        counts = [0] * len(self.bits)
+        for mask in masks:
+            while mask:
+                low = mask & -mask
+                counts[low.bit_length() - 1] += 1
+                mask ^= low
+        return counts
+
+    def stats(self) -> dict:
+        """
+        Returns the number of merged, overlapping and conflicting records, and the conflicts of every field
+        (counts in the order of fields).
+        """
+        return {
+            "records": len(self.keys),
+            "overlapping_records": self.overlapping,
+            "records_with_conflicts": sum(1 for mask in self.conflicts if mask),
+            "conflicts": sum(bin(mask).count('1') for mask in self.conflicts),
+            "conflicts_by_field": self._count_bits(self.conflicts),
+            "from_file2_by_field": self._count_bits(self.from_file2),
+        }
+
+    def save(self, file: str) -> dict:
+        """
+        Writes the fields, statistics and masks of the records having fields from file 2.
+        
+        Returns:
+            dict: The statistics written.
+        """
+        stats = self.stats()
+        records = [[key, from_file2, conflicts] for key, from_file2, conflicts
+                   in zip(self.keys, self.from_file2, self.conflicts) if from_file2]
+        with open(file, 'w') as f:
+            json.dump({"fields": self.fields, "stats": stats, "records": records}, f)
+        return stats
+
+
+
+def same_value(value1, value2) -> bool:
+    """
+    Checks if two values are equal and of the same type: 1, 1.0 and True differ.
+    """
+    return type(value1) is type(value2) and value1 == value2
+
+
+# Example usage
+if __name__ == "__main__":
+    import pandas as pd
+
+    merge_two_json_files_with_overlapping_keys('file1.json', 'file2.json', 'output.json')
+
+    output_df = pd.read_json('output.json')
+    print(output_df)
     
\ No newline at end of file
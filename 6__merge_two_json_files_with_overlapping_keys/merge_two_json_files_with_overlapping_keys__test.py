@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Tests merge_two_json_files_with_overlapping_keys functions
+"""
+import unittest
+import os
+import json
+import tempfile
+from merge_two_json_files_with_overlapping_keys import (
+    merge_two_json_files_with_overlapping_keys, merge_dicts, MergeProvenance
+)
+
+class TestMergeProvenance(unittest.TestCase):
+
+    def setUp(self):
+        self.dict1 = {"user_id": 1, "name": "Alice", "address": {"city": "Paris", "zip": "75001"}, "tags": [1]}
+        self.dict2 = {"user_id": 1, "address": {"city": "Lyon"}, "tags": [1], "age": 30}
+
+    def test_merge_same_as_merge_dicts(self):
+        provenance = MergeProvenance()
+
+        self.assertEqual(provenance.merge(1, self.dict1, self.dict2), merge_dicts(self.dict1, self.dict2))
+        self.assertEqual(provenance.merge(2, {}, {"name": "Bob"}), {"name": "Bob"})
+
+    def test_masks(self):
+        provenance = MergeProvenance()
+        provenance.merge(1, self.dict1, self.dict2)
+
+        self.assertEqual(provenance.field_names(provenance.from_file2[0]),
+                         [("user_id",), ("address", "city"), ("tags",), ("age",)])
+        self.assertEqual(provenance.field_names(provenance.conflicts[0]), [("address", "city")])
+
+    def test_paths_with_dots(self):
+        provenance = MergeProvenance()
+        provenance.merge(1, {"a": {"b": 1}, "a.b": 1}, {"a": {"b": 2}, "a.b": 1})
+
+        self.assertEqual(provenance.fields, [("a", "b"), ("a.b",)])
+        self.assertEqual(provenance.field_names(provenance.conflicts[0]), [("a", "b")])
+
+    def test_conflicts_between_types(self):
+        provenance = MergeProvenance()
+        provenance.merge(1, {"a": 1, "b": 1, "c": 1, "d": [1]}, {"a": True, "b": 1.0, "c": 1, "d": [1]})
+
+        self.assertEqual(provenance.field_names(provenance.conflicts[0]), [("a",), ("b",)])
+
+    def test_stats_and_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            files = [os.path.join(directory, name) for name in ('file1.json', 'file2.json', 'output.json', 'provenance.json')]
+            for file, records in zip(files, ([self.dict1, {"user_id": 2}], [self.dict2, {"user_id": 3, "age": 20}])):
+                with open(file, 'w') as f:
+                    json.dump(records, f)
+
+            stats = merge_two_json_files_with_overlapping_keys(*files[:3], provenance_file=files[3])
+            with open(files[3]) as f:
+                provenance = json.load(f)
+
+            self.assertIsNone(merge_two_json_files_with_overlapping_keys(*files[:3]))
+
+        self.assertEqual(stats["records"], 3)
+        self.assertEqual(stats["overlapping_records"], 1)
+        self.assertEqual(stats["records_with_conflicts"], 1)
+        fields = [tuple(field) for field in provenance["fields"]]
+        self.assertEqual(stats["conflicts_by_field"][fields.index(("address", "city"))], 1)
+        self.assertEqual(sum(stats["conflicts_by_field"]), 1)
+        self.assertEqual(provenance["stats"], stats)
+        # Record 2 only comes from file 1
+        self.assertEqual(sorted(record[0] for record in provenance["records"]), [1, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -28,32 +28,65 @@ Created on Sat Nov 30 17:10:36 2024
 
 @author: enok
 """
-import pandas as pd
+from __future__ import annotations
+
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manipulation.executor import map_reduce
+from data_manipulation.instrumentation import stage
+from data_manipulation.loader import read_json_frame
+from data_manipulation.writer import write_records
 
-def detect_anomaly(file: str) -> pd.DataFrame:
+def detect_anomaly(file: str, workers: int = None, user_ids: list = None) -> pd.DataFrame:
     """
     Detects duplicate user registrations where the same user_id appears with the same email.
     
+    With several workers (and every user), the registrations are counted by the
+    map / combine / reduce executor: the workers only send back their counts.
+    
     Args:
-        file (str): Path to the input JSON file.
+        file (str): Path to the input JSON file, optionally gzip, bz2 or zstd compressed.
+        workers (int): Number of processes used to parse the file. None reads it serially.
+        user_ids (list): Only these users, read through the per-user index of the file. None for every user.
     
     Returns:
         pd.DataFrame: DataFrame with duplicated records (user_id, email).
     """
+    # pandas is imported on use: importing the script stays fast
+    import pandas as pd
+    from data_manipulation.dtypes import optimize_dtypes, restore_dtypes
 
     try:
         if not os.path.exists(file):
             raise FileNotFoundError(f"File not found: '{file}'")
         
-        # Load data
-        df = pd.read_json(file)
-
-        # Identify duplicates
-        duplicates = df[df.duplicated(subset=['user_id', 'email'], keep=False)]        
-        
-        # Returning users duplicated
-        result = duplicates[['user_id', 'email']].drop_duplicates()
+        with stage('detect_anomaly'):
+            if workers and workers > 1 and user_ids is None:
+                with stage('map_reduce'):
+                    result = map_reduce(file, registration_counts, combine_counts, duplicated_pairs, workers)
+                print(f"File '{file}' processed successfully.")
+                return result
+
+            # Load data
+            with stage('load') as s:
+                # Dates are not used: read as the other scripts, so a cached read is shared
+                df = read_json_frame(file, workers=workers, user_ids=user_ids, convert_dates=False)
+                s.add_rows(len(df))
+
+            if df.empty:
+                return pd.DataFrame(columns=['user_id', 'email'])
+
+            with stage('optimize', rows=len(df)):
+                df = optimize_dtypes(df)
+
+            with stage('duplicates', rows=len(df)):
+                # Identify duplicates
+                duplicates = df[df.duplicated(subset=['user_id', 'email'], keep=False)]        
+                
+                # Returning users duplicated
+                result = restore_dtypes(duplicates[['user_id', 'email']].drop_duplicates())
 
         print(f"File '{file}' processed successfully.")
         return result
@@ -66,10 +99,45 @@ def detect_anomaly(file: str) -> pd.DataFrame:
         print(f"Data processing error: {e}")
 
 
+def registration_counts(records: list) -> dict:
+    """
+    Counts the registrations of every (user_id, email) pair, in order of first appearance.
+    
+    Args:
+        records (list): Registrations of a part of the file.
+    
+    Returns:
+        dict: (user_id, email) -> number of registrations.
+    """
+    counts = {}
+    for record in records:
+        pair = (record.get('user_id'), record.get('email'))
+        counts[pair] = counts.get(pair, 0) + 1
+    return counts
+
+
+def combine_counts(counts: dict, other: dict) -> dict:
+    for pair, count in other.items():
+        counts[pair] = counts.get(pair, 0) + count
+    return counts
+
+
+def duplicated_pairs(counts: dict) -> pd.DataFrame:
+    """
+    Returns the (user_id, email) pairs registered more than once, as detect_anomaly.
+    """
+    import pandas as pd
+
+    return pd.DataFrame([pair for pair, count in counts.items() if count > 1], columns=['user_id', 'email'])
+
+
 def df_to_file(df: pd.DataFrame, file: str) -> None:
     """
     Saves a DataFrame to a JSON file.
     
+    Rows are written in batches as compact JSON. Files ending with '.jsonl'
+    are written as JSON Lines, and '.gz' / '.zst' files are compressed.
+    
     Args:
         df (pd.dataFrame): DataFrame to be saved.
         file (str): Path to the output JSON file.
@@ -80,22 +148,26 @@ def df_to_file(df: pd.DataFrame, file: str) -> None:
     try:
         if os.path.exists(file):
             print(f"Warning: File '{file}' already exists. Overwriting...")
-        df.to_json(file, orient='records', indent=4)
+        with stage('df_to_file', rows=len(df)):
+            write_records(df, file)
         print(f"File '{file}' saved successfully.")
     except Exception as e:
         print(f"Error to save file: {e}")
 
 # Example usage
-print("\nCalling detect_anomaly......")
-output = detect_anomaly('file.json')
-if output is not None:
-    print(output)
+if __name__ == "__main__":
+    print("\nCalling detect_anomaly......")
+    output = detect_anomaly('file.json')
+    if output is not None:
+        print(output)
+
+    output_file = 'output.json'
 
-output_file = 'output.json'
+    print(f"\nSaving to file '{output_file}'......")
+    df_to_file(output, output_file)
 
-print(f"\nSaving to file '{output_file}'......")
-df_to_file(output, output_file)
+    if os.path.exists(output_file):
+        import pandas as pd
 
-if os.path.exists(output_file):
-    print("\n\nDuplicates found")
-    print(pd.read_json(output_file))
\ No newline at end of file
+        print("\n\nDuplicates found")
+        print(pd.read_json(output_file))
\ No newline at end of file
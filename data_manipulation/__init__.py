@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+Shared helpers used by the problem scripts of this repository.
+
+The scripts and tools share one command line: python -m data_manipulation --help
+
+Modules:
+    - splitter: memory-mapped splitting of top-level JSON arrays into byte ranges.
+    - executor: stdlib multiprocess map / combine / reduce over partitions of JSON, JSON Lines and compressed files.
+    - loader: single entry point used by the scripts to load their input files (JSON, JSON Lines, compressed).
+    - index: persistent, memory-mapped per-user index of byte ranges (user_ids filters).
+    - compression: detection and streaming (de)compression of gzip, bz2 and zstd files.
+    - dtypes: categorical, downcast integer and datetime64[s] columns after loading.
+    - timeparse: ISO-8601 parsing to int64 epoch days / seconds, formatted back only at output.
+    - streaks: vectorized streaks of consecutive hours / days / weeks per user, with allowed gaps and histograms.
+    - problems: registry importing the problem scripts by path.
+    - generators: seeded synthetic datasets matching the input of every problem.
+    - benchmark: benchmark suite of the entry points (python -m data_manipulation.benchmark).
+    - differential: random differential tests of the optimized paths against the reference ones, with timing ratios.
+    - instrumentation: per-stage timers, row counters and memory snapshots with pluggable sinks.
+    - writer: streaming, atomic JSON / JSON Lines writer with optional gzip or zstd compression.
+    - spill: drop_duplicates of DataFrames larger than memory, through hash partitions spilled to disk.
+    - cache: LRU cache of parsed datasets with a memory budget, used by the loader when set.
+    - service: asyncio HTTP / Unix socket service exposing the entry points (python -m data_manipulation.service).
+    - cli: single command line running every problem script and tool, importing them on use.
+    - pipeline: DAG of entry points sharing one dataset cache, run concurrently and resumable.
+"""
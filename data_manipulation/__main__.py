@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+python -m data_manipulation, see cli.py.
+"""
+import logging
+import sys
+
+from data_manipulation.cli import main
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the entry points of the problem scripts.
+
+Every case runs one entry point on a seeded synthetic dataset (see
+generators.py) in a fresh process and records wall time, peak RSS,
+rows/sec and the time spent in every instrumented stage. Results are
+written to a JSON file, which can be compared with the results of a
+previous version to catch performance regressions.
+
+
+The default sizes go from 10^3 to 10^6 records, --large adds 10^7 and
+10^8 (LARGE_SIZES), which need several GB of disk and memory.
+
+With --memory-report, the memory of the loaded DataFrames before and
+after optimize_dtypes (see dtypes.py) is also reported for every module
+using it. It is measured in the process of the case, once the entry
+point returned, so it does not change the wall time or the peak RSS.
+
+With --import-times, only the start-up time of the command line, the
+shared modules and the problem scripts is measured, each in a fresh
+interpreter (python -c 'pass' is the baseline).
+
+
+Usage:
+    python -m data_manipulation.benchmark --sizes 1000 100000 --output results.json
+    python -m data_manipulation.benchmark --large --cases unique_keys
+    python -m data_manipulation.benchmark --compare baseline.json --output results.json
+    python -m data_manipulation.benchmark --cases detect_anomaly --memory-report
+    python -m data_manipulation.benchmark --import-times --repeat 10
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from data_manipulation import generators, problems
+from data_manipulation.instrumentation import MetricsRegistry, peak_rss_mb, set_sink
+
+SIZES = tuple(10 ** exponent for exponent in range(3, 7))
+LARGE_SIZES = (10 ** 7, 10 ** 8)
+
+# case -> (problem, dataset, how the entry point is called)
+#   'file': entry(file), 'files': entry(file1, file2, output), 'data': entry(records)
+CASES = {
+    'longest_contiguous_sequence': ('longest-sequence', 'logins', 'file'),
+    'detect_anomaly': ('anomaly-detection', 'registrations', 'file'),
+    'group_data_and_find_most_frequent': ('most-frequent', 'purchases', 'file'),
+    'unique_keys': ('unique-keys', 'activity', 'file'),
+    'merge_json_files': ('merge-and-filter', 'events', 'files'),
+    'merge_two_json_files_with_overlapping_keys': ('merge-overlapping', 'profiles', 'files'),
+    'extract_insights': ('insights', 'interactions', 'data'),
+}
+
+
+# case -> columns the module keeps out of optimize_dtypes
+DTYPE_CASES = {
+    'longest_contiguous_sequence': ['login_date'],
+    'detect_anomaly': [],
+    'group_data_and_find_most_frequent': [],
+    'merge_json_files': ['timestamp'],
+}
+
+
+def _memory(files: list, exclude: list) -> dict:
+    from data_manipulation.dtypes import memory_mb, optimize_dtypes
+    from data_manipulation.loader import read_json_frame
+
+    before = after = 0.0
+    for file in files:
+        df = read_json_frame(file)
+        before += memory_mb(df)
+        after += memory_mb(optimize_dtypes(df, exclude=exclude))
+        del df
+    return {"before_mb": before, "after_mb": after, "ratio": after / before if before else None}
+
+
+
+def _run_case(problem: str, kind: str, files: list, output: str, kwargs: dict, exclude: list, connection) -> None:
+    """
+    Runs a single case, it is the target of the benchmark process.
+
+    The DataFrame memory is measured after the entry point when exclude is not None.
+    """
+    try:
+        sys.stdout = open(os.devnull, 'w')
+        function = problems.get_function(problem)
+        logging.disable(logging.WARNING)
+
+        args = list(files)
+        if kind == 'files':
+            args.append(output)
+        elif kind == 'data':
+            with open(files[0]) as f:
+                args = [json.load(f)]
+
+        registry = MetricsRegistry()
+        set_sink(registry)
+
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        wall_time = time.perf_counter() - start
+
+        result = {"status": "ok", "wall_time_s": wall_time, "peak_rss_mb": peak_rss_mb(),
+                  "stages": registry.snapshot()}
+        if exclude is not None:
+            result["memory"] = _memory(files, exclude)
+        connection.send(result)
+    except Exception as e:
+        connection.send({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        connection.close()
+
+
+
+def run_case(case: str, rows: int, data_dir: str, seed: int = 42, workers: int = None, timeout: float = None,
+             memory: bool = False) -> dict:
+    """
+    Runs a benchmark case in a fresh process.
+
+
+    Args:
+        - case (str): Case name, one of CASES.
+        - rows (int): Number of records of the dataset.
+        - data_dir (str): Folder holding the generated datasets.
+        - seed (int): Seed of the dataset generator.
+        - workers (int): Number of processes passed to the entry point. None reads serially.
+        - timeout (float): Maximum time in seconds of the case. None waits forever.
+        - memory (bool): Also measure the DataFrame memory before and after optimize_dtypes,
+                         for the cases of DTYPE_CASES.
+
+    Returns:
+        - dict: Measurements of the case.
+    """
+    problem, dataset, kind = CASES[case]
+    files = generators.generate(dataset, rows, data_dir, seed)
+    kwargs = {"workers": workers} if workers and kind != 'data' else {}
+    exclude = DTYPE_CASES.get(case) if memory else None
+
+    result = {"case": case, "problem": problem, "dataset": dataset, "rows": rows, "workers": workers}
+
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    with tempfile.TemporaryDirectory() as output_dir:
+        output = os.path.join(output_dir, 'output.json')
+        process = context.Process(target=_run_case, args=(problem, kind, files, output, kwargs, exclude, sender))
+        process.start()
+        sender.close()
+
+        if receiver.poll(timeout):
+            result.update(receiver.recv())
+        else:
+            process.terminate()
+            result.update({"status": "timeout"})
+        process.join()
+
+    if result["status"] == "ok":
+        result["rows_per_s"] = rows / result["wall_time_s"] if result["wall_time_s"] else None
+
+    logging.info(f"Case '{case}' with {rows} rows: {result['status']}")
+    return result
+
+
+
+def _metadata(seed: int) -> dict:
+    versions = {}
+    for name in ('pandas', 'numpy'):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=problems.ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+        **versions,
+    }
+
+
+
+def run_benchmark(cases: list = None, sizes: list = SIZES, data_dir: str = None, seed: int = 42,
+                  workers: int = None, timeout: float = None, memory: bool = False) -> dict:
+    """
+    Runs benchmark cases for every size.
+
+
+    Args:
+        - cases (list): Case names, every case of CASES when None.
+        - sizes (list): Number of records of the datasets.
+        - data_dir (str): Folder holding the generated datasets, a temporary folder when None.
+        - seed (int): Seed of the dataset generators.
+        - workers (int): Number of processes passed to the entry points. None reads serially.
+        - timeout (float): Maximum time in seconds of each case. None waits forever.
+        - memory (bool): Also measure the DataFrame memory before and after optimize_dtypes,
+                         for the cases of DTYPE_CASES.
+
+    Returns:
+        - dict: Metadata of the run and the measurements of every case.
+    """
+    cases = cases or list(CASES)
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        raise ValueError(f"Unknown cases: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = [
+            run_case(case, rows, data_dir or tmp_dir, seed, workers, timeout, memory)
+            for rows in sizes
+            for case in cases
+        ]
+
+    return {"metadata": _metadata(seed), "results": results}
+
+
+
+# name -> Python code run in a fresh interpreter
+IMPORT_TARGETS = {
+    'python': 'pass',
+    'cli --help': 'import sys; sys.argv = ["data_manipulation", "--help"]; import runpy; runpy.run_module("data_manipulation", run_name="__main__")',
+    'import data_manipulation.loader': 'import data_manipulation.loader',
+    'import data_manipulation.writer': 'import data_manipulation.writer',
+    'import numpy': 'import numpy',
+    'import pandas': 'import pandas',
+    **{f"script {name}": f"from data_manipulation.problems import load_module; load_module({name!r})" for name in problems.PROBLEMS},
+}
+
+# Modules whose import is reported for every target
+_HEAVY_MODULES = ('numpy', 'pandas', 'pyspark', 'ijson')
+
+
+
+def import_times(targets: list = None, repeat: int = 5) -> list:
+    """
+    Measures the time to start an interpreter and run import code, in fresh processes.
+
+
+    Args:
+        - targets (list): Names of IMPORT_TARGETS, all of them when None.
+        - repeat (int): Number of runs of every target.
+
+    Returns:
+        - list: One dict per target with the median and minimum wall time in ms,
+                and the heavy modules it imported.
+    """
+    report = []
+    for name in targets or IMPORT_TARGETS:
+        code = (f"try:\n    {IMPORT_TARGETS[name]}\nexcept SystemExit:\n    pass\n"
+                f"import sys; print('heavy_modules:' + ','.join(m for m in {_HEAVY_MODULES!r} if m in sys.modules))")
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            completed = subprocess.run([sys.executable, '-c', code], cwd=problems.ROOT,
+                                       capture_output=True, text=True)
+            times.append((time.perf_counter() - start) * 1000)
+        if completed.returncode != 0:
+            report.append({"target": name, "status": "error", "error": completed.stderr.strip().splitlines()[-1:]})
+            continue
+        times.sort()
+        heavy = completed.stdout.rpartition('heavy_modules:')[2].strip()
+        report.append({
+            "target": name,
+            "status": "ok",
+            "median_ms": times[len(times) // 2],
+            "min_ms": times[0],
+            "heavy_modules": heavy.split(',') if heavy else [],
+        })
+    return report
+
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.1) -> list:
+    """
+    Finds the cases slower or using more memory than in a baseline run.
+
+
+    Args:
+        - baseline (dict): Result of a previous run_benchmark.
+        - current (dict): Result of run_benchmark.
+        - tolerance (float): Allowed relative increase, e.g. 0.1 for 10%.
+
+    Returns:
+        - list: One dict per regression with the metric and both values.
+    """
+    def key(result):
+        return result["case"], result["rows"], result.get("workers")
+
+    previous = {key(result): result for result in baseline["results"] if result.get("status") == "ok"}
+
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        if result.get("status") != "ok":
+            regressions.append({"case": result["case"], "rows": result["rows"], "metric": "status",
+                                "baseline": "ok", "current": result.get("status")})
+            continue
+        for metric in ("wall_time_s", "peak_rss_mb"):
+            if result[metric] > before[metric] * (1 + tolerance):
+                regressions.append({"case": result["case"], "rows": result["rows"], "metric": metric,
+                                    "baseline": before[metric], "current": result[metric]})
+    return regressions
+
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks the entry points of the problem scripts.")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), help="Cases to run, all by default.")
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES), help="Number of records of the datasets.")
+    parser.add_argument('--large', action='store_true', help="Also run the sizes of LARGE_SIZES.")
+    parser.add_argument('--seed', type=int, default=42, help="Seed of the dataset generators.")
+    parser.add_argument('--workers', type=int, help="Number of processes passed to the entry points.")
+    parser.add_argument('--timeout', type=float, help="Maximum time in seconds of each case.")
+    parser.add_argument('--data-dir', help="Folder where generated datasets are kept between runs.")
+    parser.add_argument('--output', default='benchmark_results.json', help="Path to the JSON results file.")
+    parser.add_argument('--compare', help="Path to the JSON results file of a baseline run.")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="Allowed relative increase before a regression.")
+    parser.add_argument('--memory-report', action='store_true', help="Also report DataFrame memory before/after optimize_dtypes.")
+    parser.add_argument('--import-times', action='store_true', help="Only measure the start-up and import times.")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of runs of every import time target.")
+    args = parser.parse_args(argv)
+
+    if args.import_times:
+        report = {"python": platform.python_version(), "import_times": import_times(repeat=args.repeat)}
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+        for result in report["import_times"]:
+            if result["status"] == "ok":
+                print(f"{result['target']:<45} {result['median_ms']:>9.1f} ms  (min {result['min_ms']:.1f} ms)  "
+                      f"{', '.join(result['heavy_modules'])}")
+            else:
+                print(f"{result['target']:<45} {result['status']} {result['error']}")
+        return 0
+
+    sizes = args.sizes + [size for size in LARGE_SIZES if size not in args.sizes] if args.large else args.sizes
+    report = run_benchmark(args.cases, sizes, args.data_dir, args.seed, args.workers, args.timeout,
+                           args.memory_report)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    logging.info(f"Results saved to '{args.output}'")
+
+    for result in report["results"]:
+        if result["status"] == "ok":
+            print(f"{result['case']:<45} {result['rows']:>11} rows  {result['wall_time_s']:>9.3f} s  "
+                  f"{result['peak_rss_mb']:>9.1f} MB  {result['rows_per_s']:>12.0f} rows/s")
+        else:
+            print(f"{result['case']:<45} {result['rows']:>11} rows  {result['status']} {result.get('error', '')}")
+
+    for result in report["results"]:
+        if "memory" in result:
+            memory = result["memory"]
+            print(f"{result['case']:<45} {result['rows']:>11} rows  {memory['before_mb']:>9.1f} MB -> "
+                  f"{memory['after_mb']:>9.1f} MB  ({memory['ratio']:.0%})")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['case']} ({regression['rows']} rows) {regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['current']}")
+        return 1 if regressions else 0
+    return 0
+
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
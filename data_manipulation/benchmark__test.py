@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Tests benchmark and generators functions
+"""
+import unittest
+import os
+import json
+import tempfile
+from data_manipulation.benchmark import run_case, compare
+from data_manipulation.generators import generate, DATASETS
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_generate_is_seeded(self):
+        for name in DATASETS:
+            first = generate(name, 50, os.path.join(self.tmp_dir.name, 'a'), seed=7)
+            second = generate(name, 50, os.path.join(self.tmp_dir.name, 'b'), seed=7)
+
+            for file1, file2 in zip(first, second):
+                with open(file1) as f1, open(file2) as f2:
+                    self.assertEqual(json.load(f1), json.load(f2))
+
+    def test_generate_number_of_records(self):
+        for name, (_, count) in DATASETS.items():
+            files = generate(name, 100, self.tmp_dir.name)
+
+            self.assertEqual(len(files), count)
+            total = 0
+            for file in files:
+                with open(file) as f:
+                    total += len(json.load(f))
+            self.assertEqual(total, 100)
+
+    def test_generate_unknown_dataset(self):
+        with self.assertRaises(ValueError):
+            generate('unknown', 10, self.tmp_dir.name)
+
+    def test_run_case(self):
+        result = run_case('detect_anomaly', 100, self.tmp_dir.name)
+
+        self.assertEqual(result["status"], "ok")
+        self.assertEqual(result["rows"], 100)
+        self.assertGreater(result["peak_rss_mb"], 0)
+        self.assertGreater(result["rows_per_s"], 0)
+        self.assertNotIn("memory", result)
+
+    def test_run_case_memory(self):
+        result = run_case('detect_anomaly', 100, self.tmp_dir.name, memory=True)
+
+        self.assertEqual(result["status"], "ok")
+        self.assertGreater(result["memory"]["before_mb"], 0)
+        self.assertLessEqual(result["memory"]["after_mb"], result["memory"]["before_mb"])
+        # Cases without optimize_dtypes are not measured
+        self.assertNotIn("memory", run_case('unique_keys', 100, self.tmp_dir.name, memory=True))
+
+    def test_compare(self):
+        baseline = {"results": [
+            {"case": "unique_keys", "rows": 1000, "status": "ok", "wall_time_s": 1.0, "peak_rss_mb": 100.0},
+            {"case": "detect_anomaly", "rows": 1000, "status": "ok", "wall_time_s": 1.0, "peak_rss_mb": 100.0},
+        ]}
+        current = {"results": [
+            {"case": "unique_keys", "rows": 1000, "status": "ok", "wall_time_s": 1.05, "peak_rss_mb": 130.0},
+            {"case": "detect_anomaly", "rows": 1000, "status": "timeout"},
+            {"case": "merge_json_files", "rows": 1000, "status": "ok", "wall_time_s": 9.0, "peak_rss_mb": 900.0},
+        ]}
+
+        regressions = compare(baseline, current, tolerance=0.1)
+
+        self.assertEqual(
+            [(r["case"], r["metric"]) for r in regressions],
+            [("unique_keys", "peak_rss_mb"), ("detect_anomaly", "status")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+LRU cache of parsed datasets with a memory budget.
+
+When a cache is set, the loader keeps the DataFrames and record lists it
+parses, so loading the same file again skips reading and parsing entirely:
+
+    set_cache(DatasetCache(max_mb=1024))
+    longest_contiguous_sequence('file.json')   # reads and parses file.json
+    longest_contiguous_sequence('file.json')   # parsed DataFrame from the cache
+
+Entries are keyed by the absolute path, size and modification time of the
+file and the reading arguments, so a modified file is parsed again. The
+least recently used entries are evicted when the budget is exceeded.
+Threads loading the same dataset at once wait for a single parse.
+
+The cache is disabled until set (the scripts run as usual), it is mostly
+useful for long running processes like data_manipulation.service.
+"""
+import contextlib
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+_cache = None
+
+# Records measured to estimate the size of a list of records
+_SAMPLE_SIZE = 100
+
+
+def _deep_size(value) -> int:
+    """
+    Returns the size in bytes of a JSON-like object and its contents.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, list):
+        size += sum(_deep_size(v) for v in value)
+    return size
+
+
+
+def estimate_mb(value) -> float:
+    """
+    Estimates the memory used by a DataFrame or a list of records, in MB.
+
+    Lists are estimated from a sample of their records.
+    """
+    if hasattr(value, 'memory_usage'):
+        from data_manipulation.dtypes import memory_mb
+        return memory_mb(value)
+
+    if isinstance(value, list) and len(value) > _SAMPLE_SIZE:
+        step = len(value) // _SAMPLE_SIZE
+        sample = value[::step][:_SAMPLE_SIZE]
+        size = sys.getsizeof(value) + sum(_deep_size(v) for v in sample) * len(value) / len(sample)
+    else:
+        size = _deep_size(value)
+    return size / (1024 * 1024)
+
+
+
+def dataset_key(file: str, kind: str, **kwargs) -> tuple:
+    """
+    Returns the cache key of a file read with some arguments.
+
+
+    Args:
+        - file (str): Path to the file.
+        - kind (str): Type of value read, e.g. 'frame' or 'records'.
+        - kwargs: Arguments changing the value read (e.g. pd.read_json arguments).
+
+    Returns:
+        - tuple: Hashable key, different when the file is modified.
+    """
+    stat = os.stat(file)
+    arguments = tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+    return (os.path.abspath(file), stat.st_size, stat.st_mtime_ns, kind, arguments)
+
+
+
+class DatasetCache:
+    """
+    Thread-safe LRU cache of parsed datasets limited by their estimated memory.
+    """
+
+    def __init__(self, max_mb: float = 1024):
+        self.max_mb = max_mb
+        self._entries = OrderedDict()
+        self._used_mb = 0.0
+        self._lock = threading.Lock()
+        # key -> (lock held while the dataset is loaded, number of threads using it)
+        self._loading = {}
+        self.hits = self.misses = self.evictions = 0
+
+    @contextlib.contextmanager
+    def loading(self, key):
+        """
+        Holds the lock serializing the loads of a key, so threads reading the
+        same file at once parse it a single time. The lock is dropped when the
+        last thread using it is done.
+        """
+        with self._lock:
+            lock, users = self._loading.get(key, (None, 0))
+            lock = lock or threading.Lock()
+            self._loading[key] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                users = self._loading[key][1] - 1
+                if users:
+                    self._loading[key] = (lock, users)
+                else:
+                    del self._loading[key]
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        """
+        Returns a cached value (marked as recently used), None when missing.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size_mb: float = None) -> bool:
+        """
+        Caches a value, evicting the least recently used ones over the budget.
+
+
+        Args:
+            - key: Key returned by dataset_key.
+            - value: Parsed dataset.
+            - size_mb (float): Memory used by the value. Estimated when None.
+
+        Returns:
+            - bool: False when the value alone is larger than the budget and was not cached.
+        """
+        size_mb = estimate_mb(value) if size_mb is None else size_mb
+        if size_mb > self.max_mb:
+            logging.debug(f"Dataset of {size_mb:.1f} MB is larger than the cache budget, not cached")
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self._used_mb -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size_mb)
+            self._used_mb += size_mb
+            while self._used_mb > self.max_mb:
+                _, (_, evicted_mb) = self._entries.popitem(last=False)
+                self._used_mb -= evicted_mb
+                self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._used_mb = 0.0
+
+    def stats(self) -> dict:
+        """
+        Returns the number of entries, memory used and hit / miss / eviction counters.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "used_mb": round(self._used_mb, 3),
+                "max_mb": self.max_mb,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+
+def cached(file: str, kind: str, load, **kwargs):
+    """
+    Returns a dataset from the cache, loading and caching it on a miss.
+
+    Without a cache set, it only calls load.
+
+
+    Args:
+        - file (str): Path to the file.
+        - kind (str): Type of value read, part of the key.
+        - load (callable): Function without arguments reading the dataset.
+        - kwargs: Arguments changing the value read, part of the key.
+
+    Returns:
+        - Parsed dataset.
+    """
+    cache = _cache
+    if cache is None:
+        return load()
+
+    key = dataset_key(file, kind, **kwargs)
+    value = cache.get(key)
+    if value is not None:
+        logging.debug(f"Dataset '{file}' ({kind}) read from the cache")
+        return value
+
+    with cache.loading(key):
+        # Loaded by another thread while waiting for the lock
+        value = cache.get(key) if key in cache else None
+        if value is None:
+            value = load()
+            cache.put(key, value)
+    return value
+
+
+
+def lookup(file: str, kind: str, **kwargs):
+    """
+    Returns a dataset from the cache, None when it is not cached (or no cache is set).
+    Unlike cached, nothing is loaded on a miss.
+    """
+    cache = _cache
+    if cache is None:
+        return None
+    key = dataset_key(file, kind, **kwargs)
+    return cache.get(key) if key in cache else None
+
+
+
+def set_cache(cache) -> None:
+    """
+    Sets the cache used by the loader. None disables caching.
+    """
+    global _cache
+    _cache = cache
+
+
+
+def get_cache():
+    """
+    Returns the cache used by the loader, None when disabled.
+    """
+    return _cache
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Single command line interface of the repository.
+
+    python -m data_manipulation --help
+    python -m data_manipulation longest-sequence logins.json --user-ids 1 2
+    python -m data_manipulation most-frequent purchases.json --workers 4 --output result.json
+    python -m data_manipulation merge-and-filter file1.json file2.json output.json
+    python -m data_manipulation index logins.json
+    python -m data_manipulation service --socket /tmp/data_manipulation.sock
+    python -m data_manipulation benchmark --import-times
+    python -m data_manipulation pipeline nightly.json --resume
+
+Only this module and the problem registry are imported to parse the
+arguments. The script of a command (and pandas, numpy) is imported when
+the command runs, so --help starts without paying for them.
+
+Results are printed as JSON Lines (one record per line), or written with
+write_records when --output is given.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+
+from data_manipulation.problems import ARGUMENTS, PROBLEMS, USER_FILTERS, get_function
+
+# Tools with their own command line, arguments are passed through
+_TOOLS = {
+    'index': ('data_manipulation.index', "Build the per-user index of JSON files."),
+    'service': ('data_manipulation.service', "Serve the entry points over HTTP or a Unix socket."),
+    'benchmark': ('data_manipulation.benchmark', "Benchmark the entry points."),
+    'pipeline': ('data_manipulation.pipeline', "Run a pipeline of entry points as a DAG."),
+    'differential': ('data_manipulation.differential', "Compare the optimized paths with the reference implementations."),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m data_manipulation',
+                                     description="Runs the problem scripts and tools of the repository.")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    for name, (path, entry_point) in PROBLEMS.items():
+        command = commands.add_parser(name, help=f"{entry_point} ({path})")
+        if ARGUMENTS[name] == 'files':
+            command.add_argument('file1', help="Path to the first JSON file.")
+            command.add_argument('file2', help="Path to the second JSON file.")
+            command.add_argument('output', help="Path to the output JSON file.")
+        else:
+            command.add_argument('file', help="Path to the JSON file, optionally compressed.")
+            command.add_argument('--output', help="Writes the result to this file instead of printing it.")
+        if ARGUMENTS[name] != 'data':
+            command.add_argument('--workers', type=int, help="Number of processes used to parse the files.")
+        if name in USER_FILTERS:
+            command.add_argument('--user-ids', type=int, nargs='+', help="Only these users, read through the index.")
+
+    for name, (_, description) in _TOOLS.items():
+        commands.add_parser(name, help=description, add_help=False)
+    return parser
+
+
+
+def _print_result(result, output: str = None) -> None:
+    from data_manipulation.writer import json_default, write_records
+
+    if output is not None:
+        write_records(result, output)
+    elif hasattr(result, 'to_json'):
+        sys.stdout.write(result.to_json(orient='records', lines=True))
+        sys.stdout.write('\n')
+    else:
+        print(json.dumps(result, default=json_default))
+
+
+
+def _mtime(file: str):
+    try:
+        return os.stat(file).st_mtime_ns
+    except OSError:
+        return None
+
+
+
+def run_problem(args: argparse.Namespace) -> int:
+    """
+    Runs the entry point of a problem with the parsed arguments.
+
+    Returns:
+        - int: Exit code, 1 when the entry point failed.
+    """
+    function = get_function(args.command)
+    kind = ARGUMENTS[args.command]
+
+    if kind == 'files':
+        # The merges print their errors and return None: failed when the output was not written
+        before = _mtime(args.output)
+        function(args.file1, args.file2, args.output, workers=args.workers)
+        return 0 if _mtime(args.output) not in (None, before) else 1
+
+    if kind == 'data':
+        from data_manipulation.loader import load_json
+        result = function(load_json(args.file))
+    elif args.command in USER_FILTERS:
+        result = function(args.file, workers=args.workers, user_ids=args.user_ids)
+    else:
+        result = function(args.file, workers=args.workers)
+
+    if result is None:
+        return 1
+    _print_result(result, args.output)
+    return 0
+
+
+
+def main(argv: list = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    if argv and argv[0] in _TOOLS:
+        return importlib.import_module(_TOOLS[argv[0]][0]).main(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    return run_problem(args)
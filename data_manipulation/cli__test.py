@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Tests the command line and the import times
+"""
+import unittest
+import contextlib
+import io
+import json
+import os
+import tempfile
+import pandas as pd
+from data_manipulation.benchmark import import_times
+from data_manipulation.cli import main
+from data_manipulation.problems import get_function
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.tmp_dir.name, 'a.json')
+        with open(self.file, 'w') as f:
+            json.dump([
+                {"user_id": 1, "login_date": "2024-11-01T08:00:00"},
+                {"user_id": 1, "login_date": "2024-11-02T09:00:00"},
+                {"user_id": 2, "login_date": "2024-11-05T11:00:00"},
+            ], f)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_help_is_light(self):
+        for result in import_times(['cli --help', 'script merge-overlapping'], repeat=1):
+            self.assertEqual(result["status"], "ok")
+            self.assertEqual(result["heavy_modules"], [], result["target"])
+
+    def test_problem_output(self):
+        output = os.path.join(self.tmp_dir.name, 'out.json')
+        expected = get_function('longest-sequence')(self.file, user_ids=[2])
+
+        self.assertEqual(main(['longest-sequence', self.file, '--user-ids', '2', '--output', output]), 0)
+
+        pd.testing.assert_frame_equal(pd.read_json(output, dtype=False), expected, check_dtype=False)
+
+    def test_problem_stdout(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(main(['unique-keys', self.file]), 0)
+
+        self.assertEqual(json.loads(stdout.getvalue()), ["login_date", "user_id"])
+
+    def test_failure_exit_code(self):
+        missing = os.path.join(self.tmp_dir.name, 'missing.json')
+        output = os.path.join(self.tmp_dir.name, 'out.json')
+
+        self.assertEqual(main(['anomaly-detection', missing]), 1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(main(['merge-overlapping', self.file, self.file, output]), 0)
+            # The output left by the run above is not a success
+            self.assertEqual(main(['merge-and-filter', missing, self.file, output]), 1)
+
+    def test_unknown_command(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(['unknown'])
+
+
+if __name__ == "__main__":
+    unittest.main()
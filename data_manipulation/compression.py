@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+Compressed input and output files.
+
+Input compression is detected from the first bytes of the file, so
+'.json.gz', '.jsonl.zst' or '.json.bz2' archives are read without being
+decompressed to disk first. Decompression runs on a background thread
+one block ahead of the reader (zlib, bz2 and zstd release the GIL), so
+decompressing and parsing overlap.
+
+zstd files made of several independent frames (written by 'zstd -T',
+pzstd, or open_output) are decompressed frame by frame on a thread pool
+when threads are given. Frame boundaries are found from the frame and
+block headers, which hold their sizes, without decompressing. gzip and
+bz2 streams have no such headers, they are decompressed serially.
+
+Formats:
+    - gzip and bz2: standard library.
+    - zstd: needs the optional 'zstandard' package.
+"""
+import bz2
+import collections
+import gzip
+import io
+import mmap
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_BLOCK_SIZE = 1024 * 1024
+_READ_AHEAD_BLOCKS = 8
+
+_MAGIC = {
+    b'\x1f\x8b': 'gzip',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+    b'BZh': 'bz2',
+}
+
+_EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd', '.bz2': 'bz2'}
+
+_ZSTD_MAGIC = 0xFD2FB528
+# Skippable frames have magic numbers 0x184D2A50 to 0x184D2A5F
+_ZSTD_SKIPPABLE = 0x184D2A50
+
+# Uncompressed size of the frames written by open_output, so outputs can be decompressed in parallel
+_FRAME_SIZE = 4 * 1024 * 1024
+
+
+def infer_format(file: str) -> tuple:
+    """
+    Infers format and compression from a file name.
+
+
+    Args:
+        - file (str): Path to file.
+
+    Returns:
+        - tuple: (format, compression), e.g. ('jsonl', 'gzip') for 'data.jsonl.gz'.
+    """
+    root, extension = os.path.splitext(file)
+    compression = _EXTENSIONS.get(extension.lower())
+    if compression:
+        extension = os.path.splitext(root)[1]
+    return ('jsonl' if extension.lower() == '.jsonl' else 'json'), compression
+
+
+
+def detect_compression(file: str) -> str:
+    """
+    Detects the compression of a file from its first bytes.
+
+
+    Args:
+        - file (str): Path to file.
+
+    Returns:
+        - str: 'gzip', 'zstd', 'bz2' or None for uncompressed files.
+    """
+    with open(file, 'rb') as f:
+        head = f.read(4)
+    for magic, compression in _MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Reading or writing zstd files requires the 'zstandard' package.")
+    return zstandard
+
+
+
+def zstd_frames(file: str) -> list:
+    """
+    Returns the byte ranges of the frames of a zstd file, without decompressing.
+
+    Every frame header gives the size of its optional fields, every block
+    header the size of its block, so the frames are walked header to header.
+    Skippable frames are left out.
+
+
+    Args:
+        - file (str): Path to a zstd file.
+
+    Returns:
+        - list: (start, end) byte ranges of the frames, in file order.
+    """
+    size = os.path.getsize(file)
+    if size == 0:
+        return []
+
+    frames = []
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        position = 0
+        while position < size:
+            if position + 8 > size:
+                raise ValueError(f"Truncated zstd frame at byte {position} of '{file}'.")
+            start = position
+            magic = int.from_bytes(mm[position:position + 4], 'little')
+            if magic & 0xFFFFFFF0 == _ZSTD_SKIPPABLE:
+                position += 8 + int.from_bytes(mm[position + 4:position + 8], 'little')
+                continue
+            if magic != _ZSTD_MAGIC:
+                raise ValueError(f"Invalid zstd frame at byte {position} of '{file}'.")
+
+            # Frame header: descriptor, window, dictionary id and content size fields
+            descriptor = mm[position + 4]
+            single_segment = descriptor >> 5 & 1
+            position += 5 + (1 - single_segment) + (0, 1, 2, 4)[descriptor & 3] \
+                + (single_segment, 2, 4, 8)[descriptor >> 6]
+
+            # Blocks: 3-byte header (last block flag, type, size), RLE blocks hold one byte
+            while True:
+                if position + 3 > size:
+                    raise ValueError(f"Truncated zstd frame at byte {start} of '{file}'.")
+                header = int.from_bytes(mm[position:position + 3], 'little')
+                block_type = header >> 1 & 3
+                if block_type == 3:
+                    raise ValueError(f"Invalid zstd block at byte {position} of '{file}'.")
+                position += 3 + (1 if block_type == 1 else header >> 3)
+                if header & 1:
+                    break
+
+            # Optional content checksum
+            position += 4 * (descriptor >> 2 & 1)
+            if position > size:
+                raise ValueError(f"Truncated zstd frame at byte {start} of '{file}'.")
+            frames.append((start, position))
+    return frames
+
+
+
+class _ParallelFrames(io.RawIOBase):
+    """
+    Decompresses the frames of a zstd file on a thread pool, returned in order.
+    """
+
+    def __init__(self, file: str, frames: list, threads: int):
+        super().__init__()
+        self._raw = open(file, 'rb')
+        self._frames = iter(frames)
+        self._pool = ThreadPoolExecutor(threads)
+        # Frames decompressed ahead of the reader
+        self._window = threads * 2
+        self._pending = collections.deque()
+        self._buffer = memoryview(b'')
+        self._fill()
+
+    def _fill(self) -> None:
+        while len(self._pending) < self._window:
+            frame = next(self._frames, None)
+            if frame is None:
+                return
+            start, end = frame
+            self._raw.seek(start)
+            self._pending.append(self._pool.submit(_decompress_frame, self._raw.read(end - start)))
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        # Empty frames are skipped, 0 only at the end of the file
+        while not self._buffer and self._pending:
+            self._buffer = memoryview(self._pending.popleft().result())
+            self._fill()
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            for future in self._pending:
+                future.cancel()
+            self._pool.shutdown()
+            self._raw.close()
+        super().close()
+
+
+
+def _decompress_frame(data: bytes) -> bytes:
+    # Decompressors are not thread-safe, one per frame (zstandard releases the GIL while decompressing)
+    return _zstandard().ZstdDecompressor().decompressobj().decompress(data)
+
+
+
+class _FramedZstdWriter:
+    """
+    zstd writer ending a frame every _FRAME_SIZE bytes written, so the file can be decompressed in parallel.
+    """
+
+    def __init__(self, raw):
+        self._zstandard = _zstandard()
+        self._writer = self._zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+        self._frame_bytes = 0
+
+    def write(self, data: bytes) -> int:
+        self._writer.write(data)
+        self._frame_bytes += len(data)
+        if self._frame_bytes >= _FRAME_SIZE:
+            self._writer.flush(self._zstandard.FLUSH_FRAME)
+            self._frame_bytes = 0
+        return len(data)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+
+class _ReadAhead(io.RawIOBase):
+    """
+    Reads a decompressing stream on a background thread, a few blocks ahead.
+    """
+
+    def __init__(self, source):
+        self._source = source
+        self._blocks = queue.Queue(_READ_AHEAD_BLOCKS)
+        self._pending = b''
+        self._done = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _produce(self) -> None:
+        try:
+            while not self._stop.is_set():
+                block = self._source.read(_BLOCK_SIZE)
+                self._put(block)
+                if not block:
+                    return
+        except Exception as e:
+            self._put(e)
+
+    def _put(self, item) -> None:
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._done:
+            block = self._blocks.get()
+            if isinstance(block, Exception):
+                self._done = True
+                raise block
+            if not block:
+                self._done = True
+            self._pending = block
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._source.close()
+        super().close()
+
+
+
+def open_input(file: str, read_ahead: bool = True, threads: int = None):
+    """
+    Opens a file for binary reading, decompressing it when compressed.
+
+
+    Args:
+        - file (str): Path to file.
+        - read_ahead (bool): Decompress on a background thread, one block ahead of the reader.
+        - threads (int): Number of threads decompressing the frames of multi-frame zstd files.
+                         None or 1 decompresses them serially.
+
+    Returns:
+        - io.BufferedIOBase: Binary stream with the decompressed content.
+    """
+    compression = detect_compression(file)
+    if compression is None:
+        return open(file, 'rb')
+
+    if compression == 'gzip':
+        source = gzip.open(file, 'rb')
+    elif compression == 'bz2':
+        source = bz2.open(file, 'rb')
+    else:
+        frames = []
+        if threads and threads > 1:
+            try:
+                frames = zstd_frames(file)
+            except ValueError:
+                # Reported by the stream reader, as without threads
+                frames = []
+        if len(frames) > 1:
+            source = io.BufferedReader(_ParallelFrames(file, frames, threads), buffer_size=_BLOCK_SIZE)
+        else:
+            raw = open(file, 'rb')
+            source = _zstandard().ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+
+    if not read_ahead:
+        return source
+    return io.BufferedReader(_ReadAhead(source), buffer_size=_BLOCK_SIZE)
+
+
+
+def open_output(raw, compression: str):
+    """
+    Wraps a binary file handle with a compressor.
+
+
+    Args:
+        - raw (io.BufferedIOBase): Binary file handle opened for writing.
+        - compression (str): None, 'gzip', 'zstd' or 'bz2'.
+
+    Returns:
+        - io.BufferedIOBase: Handle to write to. Closing it does not close raw.
+    """
+    if compression is None:
+        return raw
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+    if compression == 'bz2':
+        return bz2.BZ2File(raw, mode='wb')
+    if compression == 'zstd':
+        return _FramedZstdWriter(raw)
+    raise ValueError(f"Unknown compression '{compression}'.")
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Tests compression functions and compressed inputs of the loader
+"""
+import unittest
+import os
+import bz2
+import gzip
+import json
+import tempfile
+import pandas as pd
+from data_manipulation.compression import detect_compression, open_input, zstd_frames
+from data_manipulation.loader import read_json_frame, load_json, map_json
+from data_manipulation.writer import write_records
+
+
+def count_records(records):
+    return len(records)
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.records = [
+            {"user_id": i % 5, "action": "login", "timestamp": f"2024-11-01T08:{i % 60:02d}:00"}
+            for i in range(5000)
+        ]
+        self.content = json.dumps(self.records).encode('utf-8')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_detect_compression(self):
+        with gzip.open(self.path('a.json.gz'), 'wb') as f:
+            f.write(self.content)
+        with bz2.open(self.path('a.json.bz2'), 'wb') as f:
+            f.write(self.content)
+        with open(self.path('a.json'), 'wb') as f:
+            f.write(self.content)
+
+        self.assertEqual(detect_compression(self.path('a.json.gz')), 'gzip')
+        self.assertEqual(detect_compression(self.path('a.json.bz2')), 'bz2')
+        self.assertIsNone(detect_compression(self.path('a.json')))
+
+    def test_open_input_multi_member_gzip(self):
+        with open(self.path('a.json.gz'), 'wb') as f:
+            # Two independent gzip members, like files written by parallel compressors
+            f.write(gzip.compress(self.content[:1000]))
+            f.write(gzip.compress(self.content[1000:]))
+
+        with open_input(self.path('a.json.gz')) as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_open_input_corrupted_file(self):
+        with open(self.path('a.json.gz'), 'wb') as f:
+            f.write(gzip.compress(self.content)[:-100])
+
+        with self.assertRaises(EOFError):
+            with open_input(self.path('a.json.gz')) as f:
+                f.read()
+
+    def test_open_input_zstd(self):
+        try:
+            import zstandard
+        except ImportError:
+            self.skipTest("zstandard is not installed")
+
+        with open(self.path('a.json.zst'), 'wb') as f:
+            f.write(zstandard.ZstdCompressor().compress(self.content[:1000]))
+            f.write(zstandard.ZstdCompressor().compress(self.content[1000:]))
+
+        with open_input(self.path('a.json.zst')) as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_zstd_frames(self):
+        try:
+            import zstandard
+        except ImportError:
+            self.skipTest("zstandard is not installed")
+
+        frames = [
+            zstandard.ZstdCompressor(write_checksum=True).compress(self.content[:1000]),
+            # Skippable frame
+            b'\x50\x2a\x4d\x18' + (5).to_bytes(4, 'little') + b'extra',
+            zstandard.ZstdCompressor(write_content_size=False).compress(self.content[1000:]),
+        ]
+        with open(self.path('a.jsonl.zst'), 'wb') as f:
+            f.write(b''.join(frames))
+
+        self.assertEqual(zstd_frames(self.path('a.jsonl.zst')),
+                         [(0, len(frames[0])), (len(frames[0]) + len(frames[1]), sum(map(len, frames)))])
+        with open_input(self.path('a.jsonl.zst'), threads=2) as f:
+            self.assertEqual(f.read(), self.content)
+        # Without the read-ahead thread: read() returns every frame
+        with open_input(self.path('a.jsonl.zst'), threads=2, read_ahead=False) as f:
+            self.assertEqual(f.read(), self.content)
+
+        # JSON array split across frames, read by json.load
+        data = json.dumps(self.records).encode('utf-8')
+        with open(self.path('a.json.zst'), 'wb') as f:
+            for part in (data[:50], b'', data[50:]):
+                f.write(zstandard.ZstdCompressor().compress(part))
+        with open_input(self.path('a.json.zst'), threads=2, read_ahead=False) as f:
+            self.assertEqual(json.load(f), self.records)
+
+    def test_write_zstd_frames(self):
+        try:
+            import zstandard
+        except ImportError:
+            self.skipTest("zstandard is not installed")
+
+        records = self.records * 40
+        write_records(records, self.path('a.jsonl.zst'))
+
+        # Frames of _FRAME_SIZE bytes, decompressed in parallel by the loader
+        self.assertGreater(len(zstd_frames(self.path('a.jsonl.zst'))), 1)
+        self.assertEqual(load_json(self.path('a.jsonl.zst'), workers=2), records)
+
+    def test_read_json_frame_compressed(self):
+        write_records(self.records, self.path('a.json'))
+        expected = pd.read_json(self.path('a.json'))
+
+        for name in ('b.json.gz', 'b.jsonl.gz', 'b.json.bz2', 'b.jsonl'):
+            write_records(self.records, self.path(name))
+
+            pd.testing.assert_frame_equal(read_json_frame(self.path(name), workers=2), expected)
+
+    def test_load_json_compressed(self):
+        for name in ('b.json.gz', 'b.jsonl.bz2'):
+            write_records(self.records, self.path(name))
+
+            self.assertEqual(load_json(self.path(name), workers=2), self.records)
+
+    def test_map_json_compressed(self):
+        write_records(self.records, self.path('b.json.gz'))
+
+        self.assertEqual(map_json(self.path('b.json.gz'), count_records, workers=2), [len(self.records)])
+
+
+if __name__ == "__main__":
+    unittest.main()
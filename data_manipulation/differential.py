@@ -0,0 +1,651 @@
+# -*- coding: utf-8 -*-
+"""
+Differential tests of the optimized paths against the reference implementations.
+
+Task:
+    Check on random inputs that every faster path gives the result of the
+    implementation it replaces, and measure how much faster it is, in one run.
+
+
+Checks (reference -> optimized):
+    longest_sequence            baseline longest_contiguous_sequence (pd.to_datetime(...).dt.date and the row
+                                loop of extract_longest_sequence, copied) -> streak engine (longest_contiguous_sequence)
+    longest_sequence_user_ids   same reference, filtered -> user_ids read through the per-user index
+    detect_anomaly              pandas path -> map / combine / reduce executor (workers)
+    most_frequent               pandas path of group_data_and_find_most_frequent -> executor (workers)
+    merge_dicts                 merge_dicts -> MergeProvenance.merge, with checks of its bitmasks
+    unique_keys                 columns of pd.json_normalize -> unique_keys (serial and with workers)
+    merge_json_files            in-memory drop_duplicates -> external (spilled) dedup, stable and unordered
+
+
+Inputs:
+    Generators are seeded (random.Random), in the spirit of hypothesis
+    strategies, and produce the hard cases on purpose: null and missing
+    dates (up to every date of a file), fractions of seconds and mixed UTC
+    offsets, missing keys, nested and empty dicts, duplicated rows and ties.
+    Value pools are small so duplicates and ties are frequent.
+
+    The first record of the registration, purchase and event inputs has
+    every key (possibly null): a column missing from a whole file is an
+    error of the reference paths, not a result to compare. Login inputs have
+    no such record, but one date format per file: the baseline reference
+    infers the format from the first date (pd.to_datetime) and turns the
+    dates of other formats into NaT, it also fails on mixed UTC offsets.
+
+    An optimized path failing (exception or None returned) is a failure,
+    even when the reference fails too.
+
+    When an example fails, the same example is generated again with smaller
+    sizes, and the smallest failing size is reported. run_example(name, seed,
+    example, size) reproduces it.
+
+
+Timing:
+    reference_s and optimized_s add the time of every example, speedup is
+    their ratio. Small sizes mostly measure fixed costs (e.g. starting the
+    worker processes), use --size to compare on larger inputs.
+
+
+Usage:
+    python -m data_manipulation differential --examples 200 --size 100 --seed 1
+    python -m data_manipulation.differential --checks detect_anomaly --size 100000 --examples 3 --output report.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import time
+
+from data_manipulation.problems import load_module
+
+DAYS = 12
+# Dropped key of a generated record
+_MISSING = object()
+
+
+# Accepted date formats, from a day
+_DATE_FORMATS = [
+    lambda rng, day: day,
+    lambda rng, day: f"{day}T{rng.randint(0, 23):02d}:30:00",
+    lambda rng, day: f"{day} 10:00:00",
+    # Fractions of seconds and offsets: equal up to the second, or as local time
+    lambda rng, day: f"{day}T08:00:00.{rng.choice(['250', '750', '000001'])}",
+    lambda rng, day: f"{day}T08:00:00Z",
+    lambda rng, day: f"{day}T08:00:00+02:00",
+    lambda rng, day: f"{day}T23:30:00-05:00",
+]
+
+
+def _date(rng: random.Random, missing: float = 0.14, style: int = None):
+    """
+    Returns a date, None or _MISSING (with probability missing).
+    The date has the format _DATE_FORMATS[style], a random one for every date when style is None.
+    """
+    roll = rng.random()
+    if roll < missing:
+        return None if roll < missing / 2 else _MISSING
+    day = f"2024-11-{rng.randint(1, DAYS):02d}"
+    style = rng.randrange(len(_DATE_FORMATS)) if style is None else style
+    return _DATE_FORMATS[style](rng, day)
+
+
+def _missing_rate(rng: random.Random) -> float:
+    """
+    Returns the probability of a missing date for an example: few, half or every date.
+    """
+    return rng.choice([0.14, 0.5, 1.0])
+
+
+
+def _record(rng: random.Random, values: dict, complete: bool, missing: float = 0.1) -> dict:
+    """
+    Builds a record from value factories, dropping keys (or values returning _MISSING) at random.
+    A complete record has every key.
+    """
+    record = {}
+    for key, factory in values.items():
+        value = factory()
+        if complete:
+            # Every key, possibly null
+            value = None if value is _MISSING else value
+        elif value is _MISSING or rng.random() < missing:
+            continue
+        record[key] = value
+    return record
+
+
+def _with_duplicates(rng: random.Random, records: list, ratio: float = 0.2) -> list:
+    """
+    Inserts copies of some records at random positions.
+    """
+    for _ in range(int(len(records) * ratio)):
+        records.insert(rng.randrange(len(records) + 1), dict(rng.choice(records)))
+    return records
+
+
+
+def gen_logins(rng: random.Random, size: int) -> list:
+    """
+    Login dates have one format per file: the baseline reference infers the format from the first date.
+    """
+    users, missing, style = max(1, size // 6), _missing_rate(rng), rng.randrange(len(_DATE_FORMATS))
+    values = {"user_id": lambda: rng.randrange(users) if rng.random() > 0.03 else None,
+              "login_date": lambda: _date(rng, missing, style)}
+    return _with_duplicates(rng, [_record(rng, values, False, missing=0) for _ in range(size)])
+
+
+def gen_registrations(rng: random.Random, size: int) -> list:
+    users, missing = max(1, size // 4), _missing_rate(rng)
+    values = {
+        "user_id": lambda: rng.randrange(users) if rng.random() > 0.05 else None,
+        "email": lambda: f"user{rng.randrange(users)}@example.com" if rng.random() > 0.05 else None,
+        "timestamp": lambda: _date(rng, missing),
+    }
+    return _with_duplicates(rng, [_record(rng, values, i == 0) for i in range(size)])
+
+
+def gen_purchases(rng: random.Random, size: int) -> list:
+    users = max(1, size // 5)
+    values = {
+        "user_id": lambda: rng.randrange(users) if rng.random() > 0.05 else None,
+        "item": lambda: rng.choice(["apple", "book", "cable", "desk"]) if rng.random() > 0.05 else None,
+        # Small integer quantities: totals tie often
+        "quantity": lambda: rng.randint(0, 3) if rng.random() > 0.05 else None,
+    }
+    return _with_duplicates(rng, [_record(rng, values, i == 0) for i in range(size)])
+
+
+def _nested(rng: random.Random, depth: int):
+    roll = rng.random()
+    if depth > 0 and roll < 0.35:
+        return {key: _nested(rng, depth - 1) for key in rng.sample(["a", "b", "c", "d"], rng.randint(0, 3))}
+    if roll < 0.45:
+        return [rng.randint(0, 2) for _ in range(rng.randint(0, 2))]
+    if roll < 0.55:
+        return None
+    # 1, 1.0 and True: equal values of different types
+    return rng.choice([0, 1, 1.0, 2, "x", "y", True])
+
+
+def gen_profiles(rng: random.Random, size: int) -> list:
+    """
+    Returns (dict1, dict2) pairs of nested records with overlapping keys.
+    """
+    pairs = []
+    for _ in range(size):
+        pair = []
+        for _ in range(2):
+            # 'address.city' next to a nested address.city
+            keys = ["user_id", "name", "age", "address", "address.city", "tags"]
+            pair.append({key: _nested(rng, 2) for key in rng.sample(keys, rng.randint(0, len(keys)))})
+        pairs.append(tuple(pair))
+    return pairs
+
+
+def gen_activity(rng: random.Random, size: int) -> list:
+    records = []
+    for i in range(size):
+        if i and rng.random() < 0.03:
+            records.append(None)
+            continue
+        record = {"user_id": rng.randrange(5), "activity": _nested(rng, 3)}
+        if rng.random() < 0.1:
+            record["a.b"] = {"c.d": rng.choice([1, {}])}
+        records.append(record)
+    return records
+
+
+def gen_events(rng: random.Random, size: int) -> tuple:
+    """
+    Returns two event files sharing some records.
+    """
+    missing = _missing_rate(rng)
+    values = {
+        "user_id": lambda: rng.randrange(max(1, size // 5)),
+        "action": lambda: rng.choice(["login", "login", "click", "logout"]),
+        "timestamp": lambda: _date(rng, missing),
+        # Missing in some records: integer column widened to float
+        "session": lambda: rng.randrange(3),
+    }
+    first = [_record(rng, values, i == 0) for i in range(size // 2 + 1)]
+    second = [dict(rng.choice(first)) if rng.random() < 0.3 else _record(rng, values, i == 0) for i in range(size // 2 + 1)]
+    return _with_duplicates(rng, first), _with_duplicates(rng, second)
+
+
+
+def _timed(function, *args, **kwargs) -> tuple:
+    """
+    Calls a function silencing its prints, returns its result and duration.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        return result, time.perf_counter() - start
+
+
+def _write(directory: str, name: str, records) -> str:
+    file = os.path.join(directory, f"{name}.json")
+    with open(file, 'w') as f:
+        json.dump(records, f)
+    return file
+
+
+def _value(value):
+    """
+    Normalizes a value for comparison: nulls as None, integral floats and numpy scalars as int.
+    """
+    if isinstance(value, (list, dict)):
+        return value
+    if hasattr(value, 'item') and not isinstance(value, str):
+        value = value.item()
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    try:
+        import pandas as pd
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _rows(df, columns: list) -> list:
+    if df is None:
+        return None
+    return [tuple(_value(v) for v in row) for row in df[columns].itertuples(index=False)]
+
+
+def _compare(expected, actual) -> str:
+    """
+    Returns a description of the first difference, None when equal.
+    """
+    if expected == actual:
+        return None
+    if not isinstance(expected, list) or not isinstance(actual, list):
+        return f"expected {expected!r}, got {actual!r}"
+    for i, (e, a) in enumerate(zip(expected, actual)):
+        if e != a:
+            return f"row {i}: expected {e!r}, got {a!r}"
+    return f"expected {len(expected)} rows, got {len(actual)}"
+
+
+
+def _optimized(result):
+    """
+    Returns the result of an optimized path, raising when it failed (entry points return None).
+    """
+    if result is None:
+        raise RuntimeError("optimized path returned None")
+    return result
+
+
+
+def _longest_reference(file: str) -> list:
+    """
+    Longest sequences of the baseline longest_contiguous_sequence (pd.to_datetime(...).dt.date and
+    the row loop of extract_longest_sequence, copied as they were before the streak engine).
+    A file without any 'login_date' key is read as every date missing.
+    """
+    import pandas as pd
+
+    df = pd.read_json(file)
+    if df.empty:
+        return []
+    if 'login_date' not in df.columns:
+        df['login_date'] = None
+
+    # Tranforming string to date
+    df['login_date'] = pd.to_datetime(df['login_date'], errors='coerce').dt.date
+
+    # Sorting data
+    df = df.sort_values(by=['user_id', 'login_date'])
+
+    # Grouping by user
+    grouped = df.groupby(by='user_id')
+
+    # Finds the longest users login date sequence per user
+    results = []
+    for user, group in grouped:
+        group = group.reset_index(drop=True)
+        results.append(_extract_longest_sequence_reference(user, group))
+    return results
+
+
+def _extract_longest_sequence_reference(user: int, group) -> dict:
+    import pandas as pd
+
+    if group.empty or pd.isna(group.iloc[0]['login_date']):
+        return {
+            "user_id": user,
+            "longest_sequence": 0,
+            "start_date": None,
+            "end_date": None,
+        }
+
+    max_sequence = current_sequence = 1
+    max_sequence_start_date = current_start_date = max_sequence_end_date = group.iloc[0]['login_date']
+
+    for i in range(1, len(group)):
+        current_login_date = group.iloc[i]['login_date']
+        previous_login_date = group.iloc[i - 1]['login_date']
+
+        if pd.isna(current_login_date) or pd.isna(previous_login_date) or (current_login_date - previous_login_date).days > 1:
+            current_sequence = 1
+            current_start_date = current_login_date
+        else:
+            current_sequence += 1
+            if current_sequence > max_sequence:
+                max_sequence = current_sequence
+                max_sequence_start_date = current_start_date
+                max_sequence_end_date = current_login_date
+
+    return {
+        "user_id": user,
+        "longest_sequence": max_sequence,
+        "start_date": str(max_sequence_start_date) if max_sequence_start_date else None,
+        "end_date": str(max_sequence_end_date) if max_sequence_end_date else None,
+    }
+
+
+_LONGEST_COLUMNS = ["user_id", "longest_sequence", "start_date", "end_date"]
+
+
+def check_longest_sequence(records: list, directory: str, rng: random.Random, workers: int) -> tuple:
+    import pandas as pd
+
+    module = load_module('longest-sequence')
+    file = _write(directory, 'logins', records)
+    expected, reference_s = _timed(_longest_reference, file)
+    result, optimized_s = _timed(module.longest_contiguous_sequence, file)
+    _optimized(result)
+    return reference_s, optimized_s, _compare(_rows(pd.DataFrame(expected, columns=_LONGEST_COLUMNS), _LONGEST_COLUMNS),
+                                              _rows(result, _LONGEST_COLUMNS))
+
+
+def check_longest_sequence_user_ids(records: list, directory: str, rng: random.Random, workers: int) -> tuple:
+    import pandas as pd
+
+    module = load_module('longest-sequence')
+    file = _write(directory, 'logins', records)
+    users = sorted({r["user_id"] for r in records if r.get("user_id") is not None})
+    # A user absent from the file when there is none
+    user_ids = rng.sample(users, rng.randint(1, len(users))) if users else [0]
+
+    expected, reference_s = _timed(_longest_reference, file)
+    expected = [row for row in expected if row["user_id"] in user_ids]
+    result, optimized_s = _timed(module.longest_contiguous_sequence, file, user_ids=user_ids)
+    _optimized(result)
+    return reference_s, optimized_s, _compare(_rows(pd.DataFrame(expected, columns=_LONGEST_COLUMNS), _LONGEST_COLUMNS),
+                                              _rows(result, _LONGEST_COLUMNS))
+
+
+def check_detect_anomaly(records: list, directory: str, rng: random.Random, workers: int) -> tuple:
+    function = load_module('anomaly-detection').detect_anomaly
+    file = _write(directory, 'registrations', records)
+    expected, reference_s = _timed(function, file)
+    result, optimized_s = _timed(function, file, workers=workers)
+    _optimized(result)
+    return reference_s, optimized_s, _compare(_rows(expected, ['user_id', 'email']), _rows(result, ['user_id', 'email']))
+
+
+def check_most_frequent(records: list, directory: str, rng: random.Random, workers: int) -> tuple:
+    function = load_module('most-frequent').group_data_and_find_most_frequent
+    file = _write(directory, 'purchases', records)
+    columns = ['user_id', 'most_purchased_item']
+    expected, reference_s = _timed(function, file)
+    result, optimized_s = _timed(function, file, workers=workers)
+    _optimized(result)
+    return reference_s, optimized_s, _compare(_rows(expected, columns), _rows(result, columns))
+
+
+def _lookup(record: dict, path: tuple):
+    for key in path:
+        if not isinstance(record, dict) or key not in record:
+            return _MISSING
+        record = record[key]
+    return record
+
+
+def check_merge_dicts(pairs: list, directory: str, rng: random.Random, workers: int) -> tuple:
+    module = load_module('merge-overlapping')
+    provenance = module.MergeProvenance()
+
+    expected, reference_s = _timed(lambda: [module.merge_dicts(d1, d2) for d1, d2 in pairs])
+    result, optimized_s = _timed(lambda: [provenance.merge(i, d1, d2) for i, (d1, d2) in enumerate(pairs)])
+    message = _compare(expected, result)
+    if message:
+        return reference_s, optimized_s, message
+
+    # Bitmasks: fields from file 2 hold the value of dict2, conflicts had another value in dict1
+    for i, (d1, d2) in enumerate(pairs):
+        from_file2, conflicts = provenance.from_file2[i], provenance.conflicts[i]
+        if conflicts & ~from_file2:
+            return reference_s, optimized_s, f"pair {i}: conflicts not from file 2"
+        for field in provenance.field_names(from_file2):
+            value = _lookup(d2, field)
+            if value is _MISSING or not module.same_value(_lookup(result[i], field), value):
+                return reference_s, optimized_s, f"pair {i}: field {field} is not the value of dict2"
+            # Equal values of different types (1, 1.0, True) are conflicts
+            previous = _lookup(d1, field)
+            conflicted = previous is not _MISSING and (type(previous) is not type(value) or previous != value)
+            if conflicted != bool(conflicts >> provenance.bits[field] & 1):
+                return reference_s, optimized_s, f"pair {i}: wrong conflict bit of field {field}"
+    return reference_s, optimized_s, None
+
+
+def _unique_keys_reference(file: str, module) -> list:
+    with open(file) as f:
+        columns = module.flattened_columns(json.load(f))
+    return sorted({key for column in columns for key in column.split('.')})
+
+
+def check_unique_keys(records: list, directory: str, rng: random.Random, workers: int) -> tuple:
+    module = load_module('unique-keys')
+    file = _write(directory, 'activity', records)
+    expected, reference_s = _timed(_unique_keys_reference, file, module)
+    serial, serial_s = _timed(module.unique_keys, file)
+    parallel, parallel_s = _timed(module.unique_keys, file, workers=workers)
+    message = _compare(expected, serial) or _compare(expected, parallel)
+    return reference_s, serial_s, message and f"{message} (serial {serial}, workers {parallel})"
+
+
+def _instant(value):
+    """
+    Returns a timestamp as a naive UTC datetime, None when missing or invalid.
+    """
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _event_key(record: dict) -> tuple:
+    """
+    Returns the values of an event as pd.concat(...).drop_duplicates() compares them:
+    missing and null values are equal, timestamps are instants.
+    """
+    values = {key: _instant(value) if key == 'timestamp' else value for key, value in record.items()}
+    return tuple(sorted((key, value) for key, value in values.items() if value is not None))
+
+
+def _merge_reference(files: tuple) -> list:
+    """
+    First occurrence of every distinct event of the two files, logins only, in pure Python.
+    """
+    seen, events = set(), []
+    for record in files[0] + files[1]:
+        key = _event_key(record)
+        if key not in seen:
+            seen.add(key)
+            if record.get('action') == 'login':
+                events.append(key)
+    return events
+
+
+def check_merge_json_files(files: tuple, directory: str, rng: random.Random, workers: int) -> tuple:
+    function = load_module('merge-and-filter').merge_json_files
+    file1, file2 = _write(directory, 'events1', files[0]), _write(directory, 'events2', files[1])
+    outputs = [os.path.join(directory, f"{name}.json") for name in ('memory', 'stable', 'unordered')]
+    partitions = rng.randint(1, 5)
+
+    _, reference_s = _timed(function, file1, file2, outputs[0])
+    _, optimized_s = _timed(function, file1, file2, outputs[1], external=True, partitions=partitions, stable=True)
+    _timed(function, file1, file2, outputs[2], external=True, partitions=partitions)
+
+    # Missing outputs (failed runs) raise
+    contents = []
+    for output in outputs:
+        with open(output) as f:
+            contents.append([line.rstrip(',') for line in f.read().splitlines()])
+    with open(outputs[0]) as f:
+        events = [_event_key(record) for record in json.load(f)]
+
+    message = _compare(_merge_reference(files), events) or _compare(contents[0], contents[1]) \
+        or _compare(sorted(contents[0]), sorted(contents[2]))
+    return reference_s, optimized_s, message
+
+
+
+# name -> (generator, check)
+CHECKS = {
+    'longest_sequence': (gen_logins, check_longest_sequence),
+    'longest_sequence_user_ids': (gen_logins, check_longest_sequence_user_ids),
+    'detect_anomaly': (gen_registrations, check_detect_anomaly),
+    'most_frequent': (gen_purchases, check_most_frequent),
+    'merge_dicts': (gen_profiles, check_merge_dicts),
+    'unique_keys': (gen_activity, check_unique_keys),
+    'merge_json_files': (gen_events, check_merge_json_files),
+}
+
+
+def run_example(name: str, seed: int, example: int, size: int, workers: int = 2, checks: dict = CHECKS) -> tuple:
+    """
+    Generates an example and runs a check on it.
+
+
+    Args:
+        - name (str): Check name, one of checks.
+        - seed (int): Seed of the run.
+        - example (int): Example number, the example is generated from (seed, name, example).
+        - size (int): Number of records generated.
+        - workers (int): Number of processes of the optimized paths using the executor.
+        - checks (dict): Registry of checks, name -> (generator, check).
+
+    Returns:
+        - tuple: Reference and optimized durations in seconds, and the difference (None when equal).
+    """
+    generator, check = checks[name]
+    rng = random.Random(f"{seed}:{name}:{example}")
+    data = generator(rng, size)
+    with tempfile.TemporaryDirectory(prefix='differential_') as directory:
+        try:
+            return check(data, directory, rng, workers)
+        except Exception as e:
+            return 0.0, 0.0, f"{type(e).__name__}: {e}"
+
+
+
+def run_check(name: str, examples: int = 50, size: int = 100, seed: int = 0, workers: int = 2,
+              checks: dict = CHECKS) -> dict:
+    """
+    Runs a check on several examples, shrinking the size of the failing ones.
+
+    Returns:
+        - dict: Number of examples, failures (example, smallest failing size, difference) and timing.
+    """
+    report = {"examples": examples, "failures": [], "reference_s": 0.0, "optimized_s": 0.0}
+    for example in range(examples):
+        # Sizes vary so small inputs (one user, empty files) are generated too
+        example_size = max(1, size if example % 4 else random.Random(f"{seed}:{example}").randint(1, size))
+        reference_s, optimized_s, message = run_example(name, seed, example, example_size, workers, checks)
+        report["reference_s"] += reference_s
+        report["optimized_s"] += optimized_s
+        if message is None:
+            continue
+
+        failing_size = example_size
+        while failing_size > 1:
+            smaller = run_example(name, seed, example, failing_size // 2, workers, checks)[2]
+            if smaller is None:
+                break
+            failing_size, message = failing_size // 2, smaller
+        report["failures"].append({"example": example, "size": failing_size, "message": message})
+        logging.warning(f"Check '{name}' failed on example {example} (size {failing_size}) -> {message}")
+
+    report["speedup"] = report["reference_s"] / report["optimized_s"] if report["optimized_s"] else None
+    return report
+
+
+
+def run(checks: list = None, examples: int = 50, size: int = 100, seed: int = 0, workers: int = 2) -> dict:
+    """
+    Runs the differential checks.
+
+
+    Args:
+        - checks (list): Check names, every check of CHECKS when None.
+        - examples (int): Number of examples per check.
+        - size (int): Number of records of the examples.
+        - seed (int): Seed of the run.
+        - workers (int): Number of processes of the optimized paths using the executor.
+
+    Returns:
+        - dict: Report of every check, with 'status' 'ok' or 'failed'.
+    """
+    checks = checks or list(CHECKS)
+    unknown = [name for name in checks if name not in CHECKS]
+    if unknown:
+        raise ValueError(f"Unknown checks: {', '.join(unknown)}")
+
+    results = {name: run_check(name, examples, size, seed, workers) for name in checks}
+    return {
+        "seed": seed,
+        "examples": examples,
+        "size": size,
+        "status": "failed" if any(r["failures"] for r in results.values()) else "ok",
+        "checks": results,
+    }
+
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Compares the optimized paths with the reference implementations.")
+    parser.add_argument('--checks', nargs='+', choices=list(CHECKS), help="Checks to run, all by default.")
+    parser.add_argument('--examples', type=int, default=50, help="Number of examples per check.")
+    parser.add_argument('--size', type=int, default=100, help="Number of records of the examples.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the generators.")
+    parser.add_argument('--workers', type=int, default=2, help="Number of processes of the executor paths.")
+    parser.add_argument('--output', help="Path to JSON file receiving the report.")
+    args = parser.parse_args(argv)
+
+    # The entry points log at INFO for every user and file
+    logging.basicConfig()
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run(args.checks, args.examples, args.size, args.seed, args.workers)
+
+    for name, result in report["checks"].items():
+        speedup = f"{result['speedup']:>8.2f}x" if result["speedup"] else " " * 9
+        print(f"{name:<28} {len(result['failures']):>3} failures / {result['examples']:<5}"
+              f" reference {result['reference_s']:>8.3f} s  optimized {result['optimized_s']:>8.3f} s  {speedup}")
+        for failure in result["failures"]:
+            print(f"    example {failure['example']} (size {failure['size']}): {failure['message']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    return 0 if report["status"] == "ok" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tests differential functions
+"""
+import unittest
+import random
+from data_manipulation.differential import CHECKS, _optimized, gen_events, gen_logins, run, run_check, run_example
+
+
+def gen_numbers(rng, size):
+    return [rng.randrange(10) for _ in range(size)]
+
+
+def check_sum_without_nines(numbers, directory, rng, workers):
+    # Wrong as soon as a 9 is drawn
+    return 0.0, 0.0, None if sum(n for n in numbers if n != 9) == sum(numbers) else "sums differ"
+
+
+def check_optimized_fails(numbers, directory, rng, workers):
+    # Reference and optimized path both failing
+    return 0.0, 0.0, _optimized(None)
+
+
+class TestDifferential(unittest.TestCase):
+
+    def test_run(self):
+        report = run(examples=3, size=30, seed=1)
+
+        self.assertEqual(report["status"], "ok", report)
+        self.assertEqual(set(report["checks"]), set(CHECKS))
+        for result in report["checks"].values():
+            self.assertEqual(result["examples"], 3)
+            self.assertGreater(result["optimized_s"], 0)
+
+    def test_generators_seeded(self):
+        self.assertEqual(gen_logins(random.Random(4), 50), gen_logins(random.Random(4), 50))
+        # Null and missing dates, duplicated rows
+        records = gen_logins(random.Random(4), 200)
+        self.assertTrue(any(r.get("login_date", None) is None for r in records))
+        self.assertLess(len({tuple(sorted(r.items())) for r in records if r.get("login_date")}), len(records))
+
+    def test_generators_hard_cases(self):
+        logins = [gen_logins(random.Random(example), 20) for example in range(30)]
+        timestamps = {record.get("timestamp") for example in range(30)
+                      for events in gen_events(random.Random(example), 20) for record in events}
+
+        # Files where every date is null or missing
+        self.assertTrue(any(all(r.get("login_date") is None for r in records) for records in logins))
+        self.assertTrue(any(t and '.' in t for t in timestamps))
+        self.assertTrue(any(t and t.endswith('+02:00') for t in timestamps))
+
+    def test_optimized_failure(self):
+        checks = {'fails': (gen_numbers, check_optimized_fails)}
+        report = run_check('fails', examples=2, size=4, checks=checks)
+
+        self.assertEqual([failure["message"] for failure in report["failures"]],
+                         ["RuntimeError: optimized path returned None"] * 2)
+
+    def test_failure_shrunk(self):
+        checks = {'sum': (gen_numbers, check_sum_without_nines)}
+        report = run_check('sum', examples=5, size=64, seed=2, checks=checks)
+
+        self.assertTrue(report["failures"])
+        for failure in report["failures"]:
+            self.assertLess(failure["size"], 64)
+            self.assertEqual(run_example('sum', 2, failure["example"], failure["size"], checks=checks)[2], "sums differ")
+
+    def test_unknown_check(self):
+        with self.assertRaises(ValueError):
+            run(['missing'])
+
+
+if __name__ == "__main__":
+    unittest.main()
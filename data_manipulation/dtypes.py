@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Compact dtypes for the DataFrames loaded by the problem scripts.
+
+After pd.read_json, repeated strings (email, item, action, category) are
+object / str columns and ids are int64. optimize_dtypes turns them into
+categoricals and the smallest integer type, and datetimes into
+datetime64[s], right after loading.
+
+    column                     before          after
+    email / item / action      object / str    category
+    user_id / quantity         int64           int8 / int16 / int32
+    timestamp                  datetime64[ns]  datetime64[s]
+
+restore_dtypes does the inverse on (small) results, so the DataFrames
+returned by the entry points keep their usual dtypes.
+"""
+import logging
+
+import pandas as pd
+
+_INT64 = 'int64'
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """
+    Returns the memory used by a DataFrame, in MB, including string contents.
+    """
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+
+def optimize_dtypes(df: pd.DataFrame, max_category_ratio: float = 0.5, exclude: list = ()) -> pd.DataFrame:
+    """
+    Converts the columns of a DataFrame to compact dtypes.
+
+    - String columns with few distinct values become categoricals.
+    - Integer columns are downcast to the smallest integer type holding them.
+    - Datetime columns are stored with second resolution.
+
+
+    Args:
+        - df (pd.DataFrame): DataFrame to optimize, modified in place.
+        - max_category_ratio (float): Maximum ratio of distinct values to rows of a categorical column.
+        - exclude (list): Columns kept as they are.
+
+    Returns:
+        - pd.DataFrame: The optimized DataFrame.
+    """
+    if df.empty:
+        return df
+
+    before = memory_mb(df) if logging.getLogger().isEnabledFor(logging.DEBUG) else None
+
+    for column in df.columns:
+        if column in exclude:
+            continue
+        series = df[column]
+
+        if pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            df[column] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            if getattr(series.dtype, 'tz', None) is None:
+                df[column] = series.astype('datetime64[s]')
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        elif pd.api.types.is_string_dtype(series.dtype) and _is_strings(series):
+            if series.nunique(dropna=True) <= max_category_ratio * len(series):
+                df[column] = series.astype('category')
+
+    if before is not None:
+        logging.debug(f"DataFrame memory {before:.2f} MB -> {memory_mb(df):.2f} MB")
+    return df
+
+
+
+def _is_strings(series: pd.Series) -> bool:
+    """
+    Checks that an object column holds strings, not dicts or lists (nested JSON).
+    """
+    if series.dtype != object:
+        return True
+    return pd.api.types.infer_dtype(series, skipna=True) == 'string'
+
+
+
+def concat_frames(frames: list) -> pd.DataFrame:
+    """
+    Concatenates DataFrames, keeping categorical columns categorical.
+
+    pd.concat turns categoricals with different categories into object
+    columns, so the categories are unified first.
+
+
+    Args:
+        - frames (list): DataFrames to concatenate.
+
+    Returns:
+        - pd.DataFrame: Concatenated DataFrame with a new RangeIndex.
+    """
+    columns = set()
+    for frame in frames:
+        columns.update(c for c in frame.columns if isinstance(frame[c].dtype, pd.CategoricalDtype))
+
+    for column in columns:
+        if not all(column in frame.columns and isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            continue
+        categories = pd.api.types.union_categoricals(
+            [pd.Categorical([], categories=frame[column].cat.categories) for frame in frames]
+        ).categories
+        frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)}) for frame in frames]
+
+    return pd.concat(frames, ignore_index=True)
+
+
+
+def restore_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts categoricals back to their values dtype and small integers to int64.
+
+
+    Args:
+        - df (pd.DataFrame): DataFrame with compact dtypes, usually a small result.
+
+    Returns:
+        - pd.DataFrame: DataFrame with the dtypes pd.read_json would have created.
+    """
+    dtypes = {}
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtypes[column] = dtype.categories.dtype
+        elif pd.api.types.is_signed_integer_dtype(dtype) and dtype != _INT64:
+            # Nullable integers (e.g. Int8) stay nullable
+            dtypes[column] = 'Int64' if isinstance(dtype, pd.api.extensions.ExtensionDtype) else _INT64
+    return df.astype(dtypes) if dtypes else df
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Tests dtypes functions
+"""
+import unittest
+import pandas as pd
+from data_manipulation.dtypes import optimize_dtypes, concat_frames, restore_dtypes, memory_mb
+
+
+class TestDtypes(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "user_id": [1, 2, 1, 3, 2, 1],
+            "item": ["book", "pen", "book", "pen", "book", "book"],
+            "note": ["a", "b", "c", "d", "e", "f"],
+            "activity": [{"type": "login"}] * 6,
+            "timestamp": pd.to_datetime(["2024-11-01T08:00:00"] * 6),
+        })
+
+    def test_optimize_dtypes(self):
+        before = memory_mb(self.df)
+        df = optimize_dtypes(self.df.copy())
+
+        self.assertEqual(df["user_id"].dtype, "int8")
+        self.assertIsInstance(df["item"].dtype, pd.CategoricalDtype)
+        # Distinct values only: kept as strings
+        self.assertNotIsInstance(df["note"].dtype, pd.CategoricalDtype)
+        # Nested JSON objects are not strings
+        self.assertEqual(df["activity"].dtype, object)
+        self.assertEqual(df["timestamp"].dtype, "datetime64[s]")
+        self.assertLess(memory_mb(df), before)
+
+    def test_optimize_dtypes_exclude(self):
+        df = optimize_dtypes(self.df.copy(), exclude=["user_id", "item"])
+
+        self.assertEqual(df["user_id"].dtype, "int64")
+        self.assertNotIsInstance(df["item"].dtype, pd.CategoricalDtype)
+
+    def test_optimize_dtypes_large_ids(self):
+        df = optimize_dtypes(pd.DataFrame({"user_id": [1, 70000, 2 ** 40]}))
+
+        self.assertEqual(df["user_id"].dtype, "int64")
+        self.assertEqual(df["user_id"].tolist(), [1, 70000, 2 ** 40])
+
+    def test_concat_frames_keeps_categories(self):
+        df1 = optimize_dtypes(pd.DataFrame({"action": ["login", "login", "click", "login"]}))
+        df2 = optimize_dtypes(pd.DataFrame({"action": ["logout", "logout", "logout", "login"]}))
+
+        df = concat_frames([df1, df2])
+
+        self.assertIsInstance(df["action"].dtype, pd.CategoricalDtype)
+        self.assertEqual(df["action"].tolist(), ["login", "login", "click", "login", "logout", "logout", "logout", "login"])
+
+    def test_restore_dtypes(self):
+        expected = self.df[["user_id", "item"]]
+
+        result = restore_dtypes(optimize_dtypes(self.df.copy())[["user_id", "item"]])
+
+        pd.testing.assert_frame_equal(result, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Local map / combine / reduce executor built on multiprocessing.
+
+Task:
+    Run scans of large JSON files (key extraction, duplicate detection,
+    per-user aggregation) on every core of a single machine, without the
+    start-up time and the JVM of a Spark session.
+
+
+How it works:
+    - The input files are split into partitions of whole records: byte ranges
+      of JSON arrays (see splitter.py) and of JSON Lines files. Compressed
+      files can not be split and are one partition each.
+    - Every worker process reads its partition and applies map_func to its
+      records, so only the (small) partial result is sent back.
+    - The parent combines the partial results in file order with combine_func,
+      as they arrive, and reduce_func turns the combined value into the result.
+
+        records  [ part 1 ][ part 2 ][ part 3 ] ...
+                     |         |         |
+        map       partial   partial   partial        (worker processes)
+                     \\________ | ________/
+        combine             combined                 (parent, file order)
+                               |
+        reduce              result
+
+    map_func, combine_func and reduce_func run the same way with one worker,
+    in the calling process, so serial and parallel runs give the same result.
+
+
+Usage:
+    def count(records): return Counter(r['user_id'] for r in records)
+    def add(a, b): a.update(b); return a
+
+    counts = map_reduce(['logins1.json', 'logins2.jsonl.gz'], count, add, workers=8)
+"""
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+
+from data_manipulation.cache import get_cache
+from data_manipulation.compression import detect_compression, infer_format
+
+# Largest partition read at once by a worker, files are split further when needed
+_PARTITION_SIZE = 64 * 1024 * 1024
+
+# Partitions per worker, so workers finishing early take the remaining ones
+_PARTITIONS_PER_WORKER = 4
+
+
+def _split_lines(file: str, parts: int) -> list:
+    """
+    Splits a JSON Lines file into byte ranges of whole lines.
+    """
+    size = os.path.getsize(file)
+    if size == 0:
+        return []
+
+    positions = [0]
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for i in range(1, parts):
+            newline = mm.find(b'\n', max(size * i // parts, positions[-1]))
+            if newline < 0:
+                break
+            if newline + 1 > positions[-1]:
+                positions.append(newline + 1)
+    if positions[-1] < size:
+        positions.append(size)
+    return list(zip(positions[:-1], positions[1:]))
+
+
+
+def split_partitions(files: list, workers: int) -> list:
+    """
+    Splits input files into partitions of whole records.
+
+
+    Args:
+        - files (list): Paths to JSON array or JSON Lines files, optionally compressed.
+        - workers (int): Number of processes the partitions are for.
+
+    Returns:
+        - list: (file, start, end) partitions in file order. start and end are None
+                for a whole file (compressed files).
+    """
+    from data_manipulation.splitter import split_json_array
+
+    partitions = []
+    for file in files:
+        if not os.path.exists(file):
+            raise FileNotFoundError(f"File '{file}' not found.")
+
+        size = os.path.getsize(file)
+        parts = max(workers * _PARTITIONS_PER_WORKER, -(-size // _PARTITION_SIZE)) if workers > 1 else 1
+        if detect_compression(file) is not None or size == 0 or parts == 1:
+            # Empty files are read whole, so invalid JSON is reported as when loading it
+            partitions.append((file, None, None))
+        elif infer_format(file)[0] == 'jsonl':
+            partitions.extend((file, start, end) for start, end in _split_lines(file, parts))
+        else:
+            try:
+                ranges = split_json_array(file, parts)
+            except ValueError:
+                # Not an array (e.g. a single top-level object): read whole, as when loading it
+                partitions.append((file, None, None))
+                continue
+            partitions.extend((file, start, end) for start, end in ranges)
+    return partitions
+
+
+
+def read_partition(file: str, start: int = None, end: int = None) -> list:
+    """
+    Returns the records of a partition.
+    """
+    if start is None:
+        from data_manipulation.loader import load_json
+        return load_json(file)
+
+    if infer_format(file)[0] == 'jsonl':
+        with open(file, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        return [json.loads(line) for line in data.splitlines() if line.strip()]
+
+    from data_manipulation.splitter import read_json_range
+    return json.loads(read_json_range(file, start, end))
+
+
+
+def _map_partition(map_func, file: str, start: int, end: int):
+    return map_func(read_partition(file, start, end))
+
+
+def _star_map_partition(arg: tuple):
+    return _map_partition(*arg)
+
+
+
+def map_reduce(files, map_func, combine_func, reduce_func=None, workers: int = None):
+    """
+    Runs a map / combine / reduce job over the records of files.
+
+
+    Args:
+        - files (str or list): Path or paths to JSON array or JSON Lines files, optionally compressed.
+        - map_func (callable): Function applied to the list of records of every partition, returning
+                               a partial result. It runs in the workers, so it must be defined at module level.
+        - combine_func (callable): Function merging two partial results (it may update and return the first).
+        - reduce_func (callable): Function applied to the combined partial results. None returns them.
+        - workers (int): Number of processes. None or 1 runs every partition in the calling process.
+
+    Returns:
+        - Result of reduce_func, or the combined partial results.
+    """
+    files = [files] if isinstance(files, str) else list(files)
+    workers = workers or 1
+
+    if get_cache() is not None:
+        # Records are read through the dataset cache instead of splitting the files
+        partitions = [(file, None, None) for file in files]
+        workers = 1
+    else:
+        partitions = split_partitions(files, workers)
+    logging.debug(f"Running {map_func.__name__} on {len(partitions)} partitions with {workers} workers")
+
+    # Files without records give the result of an empty partition
+    combined = map_func([]) if not partitions else None
+    for i, partial in enumerate(_imap(map_func, partitions, workers)):
+        combined = partial if i == 0 else combine_func(combined, partial)
+
+    if reduce_func is None:
+        return combined
+    return reduce_func(combined)
+
+
+
+def _imap(map_func, partitions: list, workers: int):
+    """
+    Yields the partial results of the partitions in order, mapped by a pool of workers.
+    """
+    args = [(map_func, file, start, end) for file, start, end in partitions]
+    if workers <= 1 or len(args) <= 1:
+        for arg in args:
+            yield _map_partition(*arg)
+        return
+
+    # Same start method as the splitter: functions of the problem scripts are imported by path
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    with context.Pool(min(workers, len(args))) as pool:
+        yield from pool.imap(_star_map_partition, args)
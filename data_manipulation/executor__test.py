@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Tests executor functions
+"""
+import unittest
+import os
+import json
+import gzip
+import tempfile
+from data_manipulation.executor import split_partitions, read_partition, map_reduce
+from data_manipulation.generators import generate
+from data_manipulation.problems import get_function
+
+
+def user_ids(records):
+    return [record["user_id"] for record in records]
+
+
+def concat(ids, other):
+    return ids + other
+
+
+class TestExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.records = [{"user_id": i, "note": "a, ] {" * (i % 3)} for i in range(50)]
+
+        self.json_file = self.path('data.json')
+        with open(self.json_file, 'w') as f:
+            json.dump(self.records, f, indent=2)
+        self.jsonl_file = self.path('data.jsonl')
+        with open(self.jsonl_file, 'w') as f:
+            f.writelines(json.dumps(record) + '\n' for record in self.records)
+        self.gzip_file = self.path('data.json.gz')
+        with gzip.open(self.gzip_file, 'wt') as f:
+            json.dump(self.records, f)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_split_partitions(self):
+        partitions = split_partitions([self.json_file, self.jsonl_file, self.gzip_file], 2)
+
+        self.assertGreater(len(partitions), 3)
+        self.assertEqual(partitions[-1], (self.gzip_file, None, None))
+        records = [record for partition in partitions for record in read_partition(*partition)]
+        self.assertEqual(records, self.records * 3)
+
+    def test_map_reduce(self):
+        files = [self.json_file, self.jsonl_file, self.gzip_file]
+        expected = list(range(50)) * 3
+
+        # Partial results are combined in file order
+        self.assertEqual(map_reduce(files, user_ids, concat), expected)
+        self.assertEqual(map_reduce(files, user_ids, concat, workers=2), expected)
+        self.assertEqual(map_reduce(self.jsonl_file, user_ids, concat, len, workers=3), 50)
+
+    def test_map_reduce_empty(self):
+        empty_file = self.path('empty.jsonl')
+        open(empty_file, 'w').close()
+
+        self.assertEqual(map_reduce(empty_file, user_ids, concat, workers=2), [])
+        with self.assertRaises(FileNotFoundError):
+            map_reduce(self.path('missing.json'), user_ids, concat)
+
+    def test_entry_points(self):
+        # Same results as the pandas path of the entry points
+        for problem, dataset in [('anomaly-detection', 'registrations'), ('most-frequent', 'purchases')]:
+            function = get_function(problem)
+            file = generate(dataset, 3000, self.tmp_dir.name)[0]
+
+            expected = function(file).reset_index(drop=True)
+            result = function(file, workers=2)
+
+            self.assertEqual(result.to_dict('records'), expected.to_dict('records'))
+
+    def test_most_frequent_same_frame(self):
+        import pandas as pd
+        function = get_function('most-frequent')
+        # Missing users and items, and items of different types
+        records = [{"user_id": i % 7 if i % 11 else None, "item": [1, "a", 2, "b", None][i % 5], "quantity": i % 3}
+                   for i in range(200)]
+        file = self.path('purchases.json')
+        with open(file, 'w') as f:
+            json.dump(records, f)
+
+        pd.testing.assert_frame_equal(function(file, workers=2), function(file))
+
+
+if __name__ == "__main__":
+    unittest.main()
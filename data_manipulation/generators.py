@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Seeded synthetic data generators matching the input shape of every problem.
+
+Records are written one per line inside a JSON array, like the sample
+'file.json' files, and never kept in memory, so files of 10^8 rows can be
+generated on a single machine.
+
+    registrations   -> anomaly-detection            {"user_id", "email", "timestamp"}
+    purchases       -> most-frequent                {"user_id", "item", "quantity"}
+    logins          -> longest-sequence             {"user_id", "login_date"} with gaps
+    activity        -> unique-keys                  {"user_id", "activity": {...}}
+    interactions    -> insights                     {"user_id", "interaction": {...}}
+    events (pair)   -> merge-and-filter             {"user_id", "action", "timestamp"}
+    profiles (pair) -> merge-overlapping            {"user_id", "name", "age", "city", ...}
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+BASE_DATE = datetime(2024, 11, 1)
+
+ITEMS = [f"item{i}" for i in range(50)]
+CATEGORIES = ["electronics", "books", "fashion", "home", "sports", "toys"]
+ACTIONS = ["login", "click", "logout", "view"]
+CITIES = ["New York", "San Francisco", "Chicago", "Boston", "Seattle", "Austin"]
+NAMES = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Heidi"]
+
+
+def _timestamp(rng: random.Random, days: int) -> str:
+    return (BASE_DATE + timedelta(seconds=rng.randrange(days * 86400))).isoformat()
+
+
+def _write_array(file: str, records) -> None:
+    """
+    Writes records as a JSON array, one record per line.
+    """
+    with open(file, 'w', buffering=1024 * 1024) as f:
+        f.write('[\n')
+        first = True
+        for record in records:
+            if not first:
+                f.write(',\n')
+            f.write(json.dumps(record))
+            first = False
+        f.write('\n]\n')
+
+
+
+def registrations(rng: random.Random, rows: int):
+    users = max(1, int(rows * 0.8))
+    for _ in range(rows):
+        user_id = rng.randrange(users)
+        # Around 10% of the registrations reuse an id with another email
+        email = f"user{user_id}@example.com" if rng.random() > 0.1 else f"user{rng.randrange(users)}@example.com"
+        yield {"user_id": user_id, "email": email, "timestamp": _timestamp(rng, 30)}
+
+
+def purchases(rng: random.Random, rows: int):
+    users = max(1, rows // 10)
+    for _ in range(rows):
+        yield {"user_id": rng.randrange(users), "item": rng.choice(ITEMS), "quantity": rng.randint(1, 10)}
+
+
+def logins(rng: random.Random, rows: int):
+    users = max(1, rows // 20)
+    for _ in range(rows):
+        record = {"user_id": rng.randrange(users)}
+        # Around 1% of the logins have no date
+        if rng.random() > 0.01:
+            record["login_date"] = _timestamp(rng, 60)
+        yield record
+
+
+def activity(rng: random.Random, rows: int):
+    users = max(1, rows // 5)
+    for _ in range(rows):
+        record = {"user_id": rng.randrange(users), "activity": {"type": rng.choice(ACTIONS), "time": _timestamp(rng, 30)}}
+        if rng.random() < 0.2:
+            record["activity"]["details"] = {"button": rng.choice(["submit", "cancel", "next"])}
+        if rng.random() < 0.1:
+            record["activity"]["metadata"] = {"ip": f"192.168.0.{rng.randrange(256)}", "device": rng.choice(["mobile", "desktop"])}
+        yield record
+
+
+def interactions(rng: random.Random, rows: int):
+    users = max(1, rows // 5)
+    for _ in range(rows):
+        item = rng.randrange(len(ITEMS))
+        yield {
+            "user_id": rng.randrange(users),
+            "interaction": {
+                "item": ITEMS[item],
+                "category": CATEGORIES[item % len(CATEGORIES)],
+                "type": rng.choice(["click", "view"]),
+            },
+        }
+
+
+def events(rng: random.Random, rows: int):
+    """
+    Yields two event streams of rows // 2 records each, around 20% of the
+    records of the second stream are copies of records of the first one.
+    """
+    users = max(1, rows // 10)
+    half = max(1, rows // 2)
+    seeds = [rng.randrange(1 << 30) for _ in range(2)]
+
+    def event(local):
+        return {"user_id": local.randrange(users), "action": local.choice(ACTIONS), "timestamp": _timestamp(local, 30)}
+
+    def first():
+        local = random.Random(seeds[0])
+        for _ in range(half):
+            yield event(local)
+
+    def second():
+        # The first stream is replayed from its seed to copy some of its records
+        local = random.Random(seeds[1])
+        for record in first():
+            yield record if local.random() < 0.2 else event(local)
+
+    return first(), second()
+
+
+def profiles(rng: random.Random, rows: int):
+    """
+    Yields two profile streams of rows // 2 records each, the second one
+    overlaps half of the user ids of the first one.
+    """
+    half = max(1, rows // 2)
+    seeds = [rng.randrange(1 << 30) for _ in range(2)]
+
+    def profile(local, user_id, partial):
+        record = {"user_id": user_id}
+        fields = {
+            "name": lambda: local.choice(NAMES),
+            "age": lambda: local.randint(18, 90),
+            "city": lambda: local.choice(CITIES),
+            "address": lambda: {"zip": f"{local.randrange(100000):05d}", "street": f"{local.randrange(1000)} Main St"},
+        }
+        for key, value in fields.items():
+            if not partial or local.random() < 0.5:
+                record[key] = value()
+        return record
+
+    def first():
+        local = random.Random(seeds[0])
+        for user_id in range(half):
+            yield profile(local, user_id, partial=False)
+
+    def second():
+        local = random.Random(seeds[1])
+        for user_id in range(half // 2, half // 2 + half):
+            yield profile(local, user_id, partial=True)
+
+    return first(), second()
+
+
+
+# name -> (generator, number of files)
+DATASETS = {
+    'registrations': (registrations, 1),
+    'purchases': (purchases, 1),
+    'logins': (logins, 1),
+    'activity': (activity, 1),
+    'interactions': (interactions, 1),
+    'events': (events, 2),
+    'profiles': (profiles, 2),
+}
+
+
+def generate(name: str, rows: int, directory: str, seed: int = 42) -> list:
+    """
+    Generates the files of a dataset, reusing the ones already generated.
+
+
+    Args:
+        - name (str): Dataset name, one of DATASETS.
+        - rows (int): Total number of records of the dataset.
+        - directory (str): Folder where the files are written.
+        - seed (int): Seed of the random generator.
+
+    Returns:
+        - list: Paths of the generated files.
+    """
+    if name not in DATASETS:
+        raise ValueError(f"Unknown dataset '{name}'. Available: {', '.join(DATASETS)}")
+
+    generator, count = DATASETS[name]
+    os.makedirs(directory, exist_ok=True)
+    files = [os.path.join(directory, f"{name}_{rows}_{seed}_{i}.json") for i in range(count)]
+    if all(os.path.exists(file) for file in files):
+        return files
+
+    streams = generator(random.Random(seed), rows)
+    if count == 1:
+        streams = (streams,)
+
+    for file, records in zip(files, streams):
+        # Written to a temporary name first, so an interrupted run is not reused
+        _write_array(file + '.tmp', records)
+        os.replace(file + '.tmp', file)
+    return files
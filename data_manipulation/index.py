@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent per-user index of JSON array and JSON Lines files.
+
+Task:
+    Answer questions about a few users (their streak, their top item, their
+    duplicates) without rescanning the whole input file every time.
+
+
+How it works:
+    The index maps every record of a file to its byte range, sorted by key:
+
+        key (user_id)   start     end
+        1               1         70
+        1               215       284
+        2               72        141
+        ...
+
+    It is saved next to the input file as a numpy array ('<file>.<key>.idx.npy')
+    and memory-mapped when read, so a lookup is a binary search (np.searchsorted)
+    followed by reading only the matching records. A small sidecar file
+    ('<file>.<key>.idx.json') holds the size and modification time of the
+    input file, and the index is rebuilt when they change.
+
+    Keys must be integers. Records without the key, and elements that are
+    not objects, are not indexed.
+    Compressed files can not be read by byte range and are not indexed.
+
+
+    python -m data_manipulation.index file.json [--key user_id] [--workers 4]
+"""
+import argparse
+import io
+import json
+import logging
+import mmap
+import os
+import tempfile
+
+import numpy as np
+
+from data_manipulation.compression import detect_compression, infer_format
+from data_manipulation.splitter import _run, iter_element_boundaries, read_json_range, split_json_array
+
+INDEX_DTYPE = np.dtype([('key', '<i8'), ('start', '<i8'), ('end', '<i8')])
+
+_NEWLINE = 0x0A
+
+
+def index_path(file: str, key: str = 'user_id') -> str:
+    """
+    Returns the path of the index of a file.
+    """
+    return f"{file}.{key}.idx.npy"
+
+
+
+def _source_stat(file: str) -> dict:
+    stat = os.stat(file)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+
+def _record_key(record: bytes, key: str):
+    """
+    Returns the integer key of a JSON record, None when it is missing or the record is not an object.
+    """
+    obj = json.loads(record) if record.strip() else None
+    value = obj.get(key) if isinstance(obj, dict) else None
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"Index keys must be integers, found {value!r} for '{key}'.")
+    return value
+
+
+
+def _index_range(file: str, start: int, end: int, key: str) -> np.ndarray:
+    """
+    Indexes the records of a byte range of a JSON array file.
+    """
+    data = read_json_range(file, start, end)
+    boundaries = np.concatenate(list(iter_element_boundaries(data)))
+
+    entries = []
+    for record_start, record_end in zip((boundaries[:-1] + 1).tolist(), boundaries[1:].tolist()):
+        value = _record_key(data[record_start:record_end], key)
+        if value is not None:
+            # Positions in data are shifted by the '[' added in front of the range
+            entries.append((value, start + record_start - 1, start + record_end - 1))
+    return np.array(entries, dtype=INDEX_DTYPE)
+
+
+
+def _index_lines(file: str, key: str) -> np.ndarray:
+    """
+    Indexes the lines of a JSON Lines file.
+    """
+    entries = []
+    if os.path.getsize(file) == 0:
+        return np.array(entries, dtype=INDEX_DTYPE)
+
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        newlines = np.flatnonzero(np.frombuffer(mm, dtype=np.uint8) == _NEWLINE)
+        starts = np.concatenate(([0], newlines + 1)).tolist()
+        ends = np.concatenate((newlines, [len(mm)])).tolist()
+        del newlines
+        for start, end in zip(starts, ends):
+            value = _record_key(mm[start:end], key)
+            if value is not None:
+                entries.append((value, start, end))
+    return np.array(entries, dtype=INDEX_DTYPE)
+
+
+
+def build_index(file: str, key: str = 'user_id', workers: int = None, save: bool = True) -> np.ndarray:
+    """
+    Builds the index of a JSON array or JSON Lines file.
+
+
+    Args:
+        - file (str): Path to an uncompressed JSON or JSON Lines file.
+        - key (str): Integer field used as index key.
+        - workers (int): Number of processes used to scan a JSON array. None scans it serially.
+        - save (bool): Saves the index next to the file.
+
+    Returns:
+        - np.ndarray: Structured array (key, start, end) sorted by key, then by position.
+    """
+    if not os.path.exists(file):
+        raise FileNotFoundError(f"File '{file}' not found.")
+    if detect_compression(file) is not None:
+        raise ValueError(f"File '{file}' is compressed, only uncompressed files can be indexed.")
+
+    stat = _source_stat(file)
+    if infer_format(file)[0] == 'jsonl':
+        index = _index_lines(file, key)
+    else:
+        ranges = split_json_array(file, workers or 1)
+        parts = _run(_index_range, [(file, start, end, key) for start, end in ranges], workers or 1)
+        index = np.concatenate(parts) if parts else np.array([], dtype=INDEX_DTYPE)
+
+    # Stable sort: records of a key stay in file order
+    index = index[np.argsort(index['key'], kind='stable')]
+
+    if save:
+        try:
+            _save_index(index, file, key, stat)
+        except OSError as e:
+            logging.warning(f"Index of '{file}' could not be saved: {e}")
+
+    logging.debug(f"Index of '{file}' built with {len(index)} records")
+    return index
+
+
+
+def _replace(path: str, write, mode: str) -> None:
+    """
+    Writes a file through a temporary file replacing it, so readers never see a partial file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_file = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with open(fd, mode) as f:
+            write(f)
+        os.replace(tmp_file, path)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+
+
+def _save_index(index: np.ndarray, file: str, key: str, stat: dict) -> None:
+    """
+    Saves an index and its sidecar atomically.
+    """
+    path = index_path(file, key)
+    _replace(path, lambda f: np.save(f, index), 'wb')
+    # Written last: a sidecar matching the input file always describes a complete index
+    _replace(os.path.splitext(path)[0] + '.json',
+             lambda f: json.dump({"key": key, "records": len(index), **stat}, f), 'w')
+
+
+
+def load_index(file: str, key: str = 'user_id', workers: int = None) -> np.ndarray:
+    """
+    Returns the memory-mapped index of a file, building it when missing or stale.
+
+
+    Args:
+        - file (str): Path to an uncompressed JSON or JSON Lines file.
+        - key (str): Integer field used as index key.
+        - workers (int): Number of processes used if the index has to be built.
+
+    Returns:
+        - np.ndarray: Structured array (key, start, end) sorted by key.
+    """
+    path = index_path(file, key)
+    try:
+        with open(os.path.splitext(path)[0] + '.json') as f:
+            meta = json.load(f)
+        if {"size": meta["size"], "mtime_ns": meta["mtime_ns"]} == _source_stat(file):
+            return np.load(path, mmap_mode='r')
+        logging.info(f"Index of '{file}' is stale, rebuilding it")
+    except (OSError, ValueError, KeyError):
+        pass
+    return build_index(file, key, workers)
+
+
+
+def lookup(index: np.ndarray, keys) -> np.ndarray:
+    """
+    Returns the byte ranges of the records with the given keys, in file order.
+
+
+    Args:
+        - index (np.ndarray): Index returned by build_index or load_index.
+        - keys (iterable): Keys to look up.
+
+    Returns:
+        - np.ndarray: Structured array (key, start, end) sorted by start.
+    """
+    keys = np.unique(np.asarray(list(keys), dtype=np.int64))
+    column = index['key']
+    lo = np.searchsorted(column, keys, side='left')
+    hi = np.searchsorted(column, keys, side='right')
+
+    positions = np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)] or [np.array([], dtype=np.int64)])
+    entries = np.asarray(index[positions])
+    return entries[np.argsort(entries['start'], kind='stable')]
+
+
+
+def read_indexed_json(file: str, keys, key: str = 'user_id', workers: int = None) -> bytes:
+    """
+    Returns the records of a file with the given keys as a JSON array.
+
+
+    Args:
+        - file (str): Path to an uncompressed JSON or JSON Lines file.
+        - keys (iterable): Keys of the records to read.
+        - key (str): Integer field used as index key.
+        - workers (int): Number of processes used if the index has to be built.
+
+    Returns:
+        - bytes: JSON array with the matching records, in file order.
+    """
+    entries = lookup(load_index(file, key, workers), keys)
+    if not len(entries):
+        return b'[]'
+
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return b'[' + b','.join(mm[start:end] for start, end in zip(entries['start'].tolist(), entries['end'].tolist())) + b']'
+
+
+
+def read_indexed_frame(file: str, keys, key: str = 'user_id', workers: int = None, **kwargs):
+    """
+    Reads the records of a file with the given keys into a DataFrame.
+
+
+    Args:
+        - file (str): Path to an uncompressed JSON or JSON Lines file.
+        - keys (iterable): Keys of the records to read.
+        - key (str): Integer field used as index key.
+        - workers (int): Number of processes used if the index has to be built.
+        - kwargs: Extra arguments passed to pd.read_json.
+
+    Returns:
+        - pd.DataFrame: DataFrame with the matching records, in file order.
+    """
+    import pandas as pd
+
+    # The records are always read back as a JSON array
+    kwargs.pop('lines', None)
+    return pd.read_json(io.BytesIO(read_indexed_json(file, keys, key, workers)), **kwargs)
+
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Builds the per-user index of JSON array or JSON Lines files.")
+    parser.add_argument('files', nargs='+', help="Files to index.")
+    parser.add_argument('--key', default='user_id', help="Integer field used as index key.")
+    parser.add_argument('--workers', type=int, help="Number of processes used to scan each file.")
+    args = parser.parse_args(argv)
+
+    for file in args.files:
+        index = build_index(file, args.key, args.workers)
+        print(f"{index_path(file, args.key)}: {len(index)} records, {len(np.unique(index['key']))} keys")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
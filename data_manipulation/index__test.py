@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Tests per-user index functions
+"""
+import unittest
+import os
+import gzip
+import json
+import tempfile
+import pandas as pd
+from data_manipulation.index import build_index, load_index, lookup, read_indexed_frame, index_path
+from data_manipulation.loader import read_json_frame
+from data_manipulation.writer import write_records
+
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.records = [
+            {"user_id": i % 7, "item": "a,]\"}" if i % 3 else "b", "nested": {"user_id": 99}}
+            for i in range(500)
+        ]
+        self.records.insert(10, {"item": "no user"})
+        self.file = os.path.join(self.tmp_dir.name, 'a.json')
+        with open(self.file, 'w') as f:
+            json.dump(self.records, f, indent=2)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def expected(self, user_ids):
+        df = pd.read_json(self.file)
+        return df[df['user_id'].isin(user_ids)].reset_index(drop=True)
+
+    def test_build_index(self):
+        index = build_index(self.file, workers=3)
+
+        self.assertEqual(len(index), 500)
+        self.assertTrue((index['key'][:-1] <= index['key'][1:]).all())
+        with open(self.file, 'rb') as f:
+            data = f.read()
+        for key, start, end in index[:20]:
+            self.assertEqual(json.loads(data[start:end])["user_id"], key)
+
+    def test_read_indexed_frame(self):
+        result = read_indexed_frame(self.file, [3, 5])
+
+        pd.testing.assert_frame_equal(result, self.expected([3, 5]), check_dtype=False)
+        self.assertTrue(os.path.exists(index_path(self.file)))
+
+    def test_read_indexed_frame_jsonl(self):
+        file = os.path.join(self.tmp_dir.name, 'a.jsonl')
+        write_records(self.records, file)
+
+        result = read_indexed_frame(file, [3])
+
+        pd.testing.assert_frame_equal(result, self.expected([3]), check_dtype=False)
+
+    def test_missing_users(self):
+        self.assertTrue(read_indexed_frame(self.file, [1000]).empty)
+        self.assertEqual(len(lookup(load_index(self.file), [])), 0)
+
+    def test_stale_index_is_rebuilt(self):
+        self.assertEqual(len(load_index(self.file)), 500)
+
+        with open(self.file, 'w') as f:
+            json.dump(self.records[:50], f)
+
+        self.assertEqual(len(load_index(self.file)), 49)
+
+    def test_compressed_file(self):
+        file = os.path.join(self.tmp_dir.name, 'a.json.gz')
+        with gzip.open(file, 'wt') as f:
+            json.dump(self.records, f)
+
+        with self.assertRaises(ValueError):
+            build_index(file)
+        pd.testing.assert_frame_equal(read_json_frame(file, user_ids=[3]), self.expected([3]), check_dtype=False)
+
+    def test_string_keys(self):
+        with open(self.file, 'w') as f:
+            json.dump([{"user_id": "a"}], f)
+
+        with self.assertRaises(ValueError):
+            build_index(self.file)
+
+    def test_elements_not_objects(self):
+        with open(self.file, 'w') as f:
+            json.dump([{"user_id": 1}, 3, "user_id", [1, 2], None, {"user_id": 2}], f)
+
+        self.assertEqual(build_index(self.file)['key'].tolist(), [1, 2])
+
+    def test_no_temporary_files_left(self):
+        build_index(self.file)
+
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)),
+                         ['a.json', 'a.json.user_id.idx.json', 'a.json.user_id.idx.npy'])
+
+
+if __name__ == "__main__":
+    unittest.main()
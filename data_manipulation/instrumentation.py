@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Per-stage timing hooks for the problem scripts.
+
+Stages are context managers wrapping the hot parts of an entry point
+(load, normalize, groupby, serialize, ...). Each stage records its wall
+time, row count and memory, and sends an event to the configured sink.
+
+    with stage('longest_contiguous_sequence'):
+        with stage('load') as s:
+            df = read_json_frame(file)
+            s.add_rows(len(df))
+
+Nested stages are reported with their full path, e.g.
+'longest_contiguous_sequence/load'.
+
+Instrumentation is disabled until a sink is set, and a disabled stage is
+a shared no-op object, so the hooks can stay in the hot paths. A sink can
+also be set with the DATA_MANIPULATION_METRICS environment variable:
+'log' logs every event, any other value is the path of a JSON Lines file.
+"""
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+_path = contextvars.ContextVar('stage_path', default=())
+_sink = None
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_mb() -> float:
+    """
+    Returns the current resident set size of the process, in MB.
+
+    Falls back to the peak resident set size where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident set size of the process, in MB.
+    """
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+
+class LoggingSink:
+    """
+    Logs every stage event.
+    """
+
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+
+    def emit(self, event: dict) -> None:
+        rows = f", {event['rows']} rows" if event['rows'] is not None else ""
+        logging.log(self.level, f"Stage '{event['stage']}' took {event['seconds']:.4f}s{rows}, "
+                                f"rss {event['rss_mb']:.1f} MB ({event['rss_delta_mb']:+.1f} MB)")
+
+
+
+class JsonFileSink:
+    """
+    Appends every stage event to a JSON Lines file.
+    """
+
+    def __init__(self, file: str):
+        self.file = file
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict) -> None:
+        line = json.dumps(event) + '\n'
+        with self._lock, open(self.file, 'a') as f:
+            f.write(line)
+
+
+
+class MetricsRegistry:
+    """
+    Aggregates stage events in memory, per stage path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def emit(self, event: dict) -> None:
+        with self._lock:
+            metric = self._metrics.setdefault(event['stage'], {
+                "calls": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0, "max_rss_mb": 0.0, "errors": 0,
+            })
+            metric["calls"] += 1
+            metric["seconds"] += event['seconds']
+            metric["max_seconds"] = max(metric["max_seconds"], event['seconds'])
+            metric["rows"] += event['rows'] or 0
+            metric["max_rss_mb"] = max(metric["max_rss_mb"], event['rss_mb'])
+            metric["errors"] += event['error'] is not None
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of the aggregated metrics, keyed by stage path.
+        """
+        with self._lock:
+            return {name: dict(metric) for name, metric in self._metrics.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+
+
+class _NullStage:
+    """
+    Stage returned while instrumentation is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def add_rows(self, rows: int) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    """
+    Timed stage, created by stage() while a sink is set.
+    """
+
+    def __init__(self, name: str, rows: int, sink):
+        self.name = name
+        self.rows = rows
+        self.sink = sink
+
+    def add_rows(self, rows: int) -> None:
+        self.rows = (self.rows or 0) + rows
+
+    def __enter__(self):
+        self._token = _path.set(_path.get() + (self.name,))
+        self._rss_mb = rss_mb()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self._start
+        path = '/'.join(_path.get())
+        _path.reset(self._token)
+
+        current = rss_mb()
+        event = {
+            "stage": path,
+            "seconds": seconds,
+            "rows": self.rows,
+            "rss_mb": current,
+            "rss_delta_mb": current - self._rss_mb,
+            "error": exc_type.__name__ if exc_type else None,
+            "timestamp": time.time(),
+        }
+        if tracemalloc.is_tracing():
+            event["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+
+        try:
+            self.sink.emit(event)
+        except Exception as e:
+            logging.error(f"Metrics sink error -> {e}")
+        return False
+
+
+
+def stage(name: str, rows: int = None):
+    """
+    Returns a context manager timing a stage of an entry point.
+
+
+    Args:
+        - name (str): Stage name, e.g. 'load' or 'groupby'.
+        - rows (int): Number of rows handled by the stage, if already known.
+
+    Returns:
+        - Stage: Context manager with an add_rows(rows) method.
+    """
+    sink = _sink
+    if sink is None:
+        return _NULL_STAGE
+    return Stage(name, rows, sink)
+
+
+
+def set_sink(sink) -> None:
+    """
+    Sets the sink receiving stage events. None disables instrumentation.
+
+
+    Args:
+        - sink: Object with an emit(event: dict) method, e.g. LoggingSink,
+                JsonFileSink or MetricsRegistry.
+    """
+    global _sink
+    _sink = sink
+
+
+
+def get_sink():
+    """
+    Returns the sink receiving stage events, None when disabled.
+    """
+    return _sink
+
+
+
+def _sink_from_environment():
+    value = os.environ.get('DATA_MANIPULATION_METRICS')
+    if not value:
+        return None
+    if value == 'log':
+        return LoggingSink()
+    return JsonFileSink(value)
+
+
+set_sink(_sink_from_environment())
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Tests instrumentation functions
+"""
+import unittest
+import os
+import json
+import tempfile
+from data_manipulation.instrumentation import stage, set_sink, get_sink, MetricsRegistry, JsonFileSink
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.previous_sink = get_sink()
+        self.registry = MetricsRegistry()
+        set_sink(self.registry)
+
+    def tearDown(self):
+        set_sink(self.previous_sink)
+
+    def test_stage_nested_paths(self):
+        with stage('job'):
+            with stage('load') as s:
+                s.add_rows(10)
+                s.add_rows(5)
+            with stage('groupby', rows=3):
+                pass
+
+        metrics = self.registry.snapshot()
+
+        self.assertEqual(sorted(metrics), ['job', 'job/groupby', 'job/load'])
+        self.assertEqual(metrics['job/load']['rows'], 15)
+        self.assertEqual(metrics['job/groupby']['rows'], 3)
+        self.assertEqual(metrics['job']['calls'], 1)
+        self.assertGreaterEqual(metrics['job']['seconds'], metrics['job/load']['seconds'])
+
+    def test_stage_records_errors(self):
+        with self.assertRaises(KeyError):
+            with stage('failing'):
+                raise KeyError('user_id')
+
+        self.assertEqual(self.registry.snapshot()['failing']['errors'], 1)
+
+    def test_stage_disabled(self):
+        set_sink(None)
+
+        with stage('job') as s:
+            s.add_rows(10)
+
+        self.assertIs(stage('job'), stage('other'))
+        self.assertEqual(self.registry.snapshot(), {})
+
+    def test_json_file_sink(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, 'metrics.jsonl')
+            set_sink(JsonFileSink(file_name))
+
+            with stage('job', rows=2):
+                pass
+            with stage('job', rows=4):
+                pass
+
+            with open(file_name) as f:
+                events = [json.loads(line) for line in f]
+
+        self.assertEqual([(e['stage'], e['rows']) for e in events], [('job', 2), ('job', 4)])
+        self.assertIsNone(events[0]['error'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Loading of the input files used by the problem scripts.
+
+Every script loads its input through this module, so new ways of reading
+files (e.g. parallel reading of a single JSON array) are available to all
+of them at once.
+
+Supported inputs:
+    - JSON arrays and JSON Lines ('.jsonl') files.
+    - gzip, bz2 and zstd compressed files, decompressed while reading.
+
+Parallel reading (workers > 1) needs an uncompressed JSON array, other
+inputs are read serially.
+
+Reading only some users (user_ids) goes through the per-user index of the
+file (data_manipulation.index), built on first use. Compressed files can
+not be indexed and are read whole, then filtered.
+
+When a dataset cache is set (data_manipulation.cache), parsed DataFrames
+and record lists are kept in memory and files read again are not parsed.
+Reading only some users of a file whose DataFrame is cached (read with the
+same arguments) filters it instead of reading the file. Such DataFrames
+keep the dtypes of the whole file, as for compressed files.
+"""
+import io
+import json
+import logging
+import math
+import os
+
+from data_manipulation.cache import cached, get_cache, lookup
+from data_manipulation.compression import detect_compression, infer_format, open_input
+
+# numpy (splitter, index) and pandas are imported when a function needs them,
+# so scripts loading small files serially (e.g. load_json) do not import them
+
+# Records per DataFrame of iter_json_frames for JSON Lines files
+_CHUNK_ROWS = 200000
+
+
+def _can_split(file: str, workers: int) -> bool:
+    """
+    Checks if a file can be read in parallel with the splitter.
+    """
+    if not workers or workers <= 1:
+        return False
+    if infer_format(file)[0] == 'jsonl' or detect_compression(file) is not None:
+        logging.debug(f"File '{file}' is compressed or JSON Lines, reading it serially")
+        return False
+    return True
+
+
+
+def read_json_frame(file: str, workers: int = None, user_ids=None, **kwargs):
+    """
+    Reads a JSON array or JSON Lines file into a DataFrame.
+
+
+    Args:
+        - file (str): Path to JSON file, optionally compressed.
+        - workers (int): Number of processes used to parse the file. None reads it serially.
+        - user_ids (iterable): Reads only the records of these users. None reads every record.
+        - kwargs: Extra arguments passed to pd.read_json.
+
+    Returns:
+        - pd.DataFrame: DataFrame with the content of the file.
+    """
+    if user_ids is not None:
+        user_ids = sorted(set(user_ids))
+        # The whole file parsed by another read: filtered, without scanning the file again
+        df = lookup(file, 'frame', **kwargs)
+        if df is not None:
+            return _filter_users(df, user_ids)
+        # Not cached: reads of a few users are fast through the index, and an entry
+        # per set of users would evict the whole datasets
+        return _read_users_frame(file, user_ids, workers, **kwargs)
+
+    df = cached(file, 'frame', lambda: _read_json_frame(file, workers, **kwargs), **kwargs)
+    # Callers modify their DataFrame, the cached one must stay as read
+    return df.copy(deep=False) if get_cache() is not None else df
+
+
+
+def _read_json_frame(file: str, workers: int = None, **kwargs):
+    if _can_split(file, workers):
+        from data_manipulation.splitter import read_json_parallel
+        return read_json_parallel(file, workers, **kwargs)
+
+    import pandas as pd
+
+    if infer_format(file)[0] == 'jsonl':
+        kwargs.setdefault('lines', True)
+
+    if detect_compression(file) is None:
+        return pd.read_json(file, **kwargs)
+    with open_input(file, threads=workers) as f:
+        return pd.read_json(f, **kwargs)
+
+
+
+def _read_users_frame(file: str, user_ids, workers: int = None, **kwargs):
+    """
+    Reads the records of some users, through the index when the file can be indexed.
+    """
+    if detect_compression(file) is None:
+        from data_manipulation.index import read_indexed_frame
+        return read_indexed_frame(file, user_ids, workers=workers, **kwargs)
+
+    logging.debug(f"File '{file}' is compressed, reading it whole to filter users")
+    return _filter_users(read_json_frame(file, workers, **kwargs), user_ids)
+
+
+
+def _filter_users(df, user_ids):
+    if 'user_id' not in df.columns:
+        return df.iloc[0:0]
+    return df[df['user_id'].isin(user_ids)].reset_index(drop=True)
+
+
+
+def iter_json_frames(file: str, chunk_mb: float = 64, **kwargs):
+    """
+    Reads a JSON array or JSON Lines file as consecutive DataFrames, so files
+    larger than memory can be scanned.
+
+    JSON arrays are split into byte ranges of whole records (see splitter.py),
+    JSON Lines files are read by blocks of lines. Compressed JSON arrays can
+    not be split and are read whole.
+
+
+    Args:
+        - file (str): Path to JSON file, optionally compressed.
+        - chunk_mb (float): Size of the part of a JSON array read at once, in MB.
+        - kwargs: Extra arguments passed to pd.read_json.
+
+    Returns:
+        - generator: DataFrames of the records, in file order.
+    """
+    import pandas as pd
+
+    if infer_format(file)[0] == 'jsonl':
+        with open_input(file) as f:
+            yield from pd.read_json(f, lines=True, chunksize=_CHUNK_ROWS, **kwargs)
+        return
+
+    if detect_compression(file) is not None or os.path.getsize(file) == 0:
+        logging.debug(f"File '{file}' can not be split, reading it whole")
+        yield _read_json_frame(file, **kwargs)
+        return
+
+    from data_manipulation.splitter import read_json_range, split_json_array
+    parts = max(1, math.ceil(os.path.getsize(file) / (chunk_mb * 1024 * 1024)))
+    for start, end in split_json_array(file, parts):
+        yield pd.read_json(io.BytesIO(read_json_range(file, start, end)), **kwargs)
+
+
+
+def load_json(file: str, workers: int = None) -> list:
+    """
+    Loads a JSON array or JSON Lines file as a list of Python objects.
+
+
+    Args:
+        - file (str): Path to JSON file, optionally compressed.
+        - workers (int): Number of processes used to parse the file. None reads it serially.
+
+    Returns:
+        - list: Elements of the JSON array, or records of the JSON Lines file.
+    """
+    records = cached(file, 'records', lambda: _load_json(file, workers))
+    return list(records) if get_cache() is not None else records
+
+
+
+def _load_json(file: str, workers: int = None) -> list:
+    if _can_split(file, workers):
+        from data_manipulation.splitter import load_json_parallel
+        return load_json_parallel(file, workers)
+
+    # Compressed files: the frames of zstd files are decompressed by workers threads
+    with open_input(file, threads=workers) as f:
+        if infer_format(file)[0] == 'jsonl':
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+
+def map_json(file: str, func, workers: int = None) -> list:
+    """
+    Applies a function to the records of a file, in parallel when possible.
+
+
+    Args:
+        - file (str): Path to JSON file, optionally compressed.
+        - func (callable): Function applied to lists of records, defined at module level.
+        - workers (int): Number of processes. None runs func once on every record.
+
+    Returns:
+        - list: Results of func, one per part of the file.
+    """
+    if get_cache() is None and _can_split(file, workers):
+        from data_manipulation.splitter import map_json_array
+        return map_json_array(file, func, workers)
+    return [func(load_json(file, workers))]
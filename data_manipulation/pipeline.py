@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline of problem entry points run as a DAG.
+
+Task:
+    Run several entry points (merge / filter, anomaly detection, most
+    frequent item, streaks, key extraction, ...) as one job, without every
+    script reading the same inputs again.
+
+
+Pipeline file:
+    {
+      "stages": [
+        {"name": "merged", "problem": "merge-and-filter", "args": {"file1": "events1.json", "file2": "events2.json"}},
+        {"name": "keys", "problem": "unique-keys", "args": {"file": "@merged"}},
+        {"name": "duplicates", "problem": "anomaly-detection", "args": {"file": "logins.json"}},
+        {"name": "streaks", "problem": "longest-sequence", "args": {"file": "logins.json", "user_ids": [1, 2]}, "after": ["duplicates"]},
+        {"name": "sequences", "problem": "longest-sequence", "args": {"file": "logins.json", "workers": 4}}
+      ]
+    }
+
+    - problem: a name of problems.PROBLEMS, args: keyword arguments of its entry point
+      ('insights' takes a 'file' whose records are passed to extract_insights).
+    - Every stage result is saved to '<state_dir>/<name>.json'. The merges write
+      there too unless 'output' is given.
+    - '@name' in an argument is the result file of stage 'name', and makes the
+      stage depend on it. 'after' adds dependencies without passing results.
+
+
+How it runs:
+    - Stages whose dependencies are done run concurrently on a thread pool.
+    - A dataset cache (data_manipulation.cache) is shared by the stages of the
+      thread pool. The scripts read their DataFrames with the same arguments,
+      so stages reading the same source share one scan ('duplicates' above),
+      and a stage reading only some users of it filters the cached DataFrame
+      ('streaks', run after 'duplicates' for that). A stage reading the result
+      of another one parses it once. Record lists (unique-keys, insights,
+      merge-overlapping) and DataFrames are cached apart.
+    - Stages with 'workers' > 1 ('sequences') run in a spawned process of
+      their own, where the entry point forks its process pools: forking them
+      from the multithreaded pipeline can deadlock. Such stages keep their
+      parallelism but do not share the dataset cache.
+    - Every stage is timed (and reported to the instrumentation sink as
+      'pipeline/<name>'). The report is saved to '<state_dir>/report.json'.
+    - '<state_dir>/pipeline_state.json' records the completed stages with a
+      fingerprint of their arguments and input files. With resume, completed
+      stages whose fingerprint did not change are not run again.
+
+
+    python -m data_manipulation pipeline nightly.json --state-dir nightly --workers 4 --resume
+"""
+import argparse
+import contextvars
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from data_manipulation.cache import DatasetCache, get_cache, set_cache
+from data_manipulation.instrumentation import stage
+from data_manipulation.problems import ARGUMENTS, PROBLEMS, get_function
+
+STATE_FILE = 'pipeline_state.json'
+REPORT_FILE = 'report.json'
+
+# Stage statuses in the report
+DONE, RESUMED, FAILED, SKIPPED = 'done', 'resumed', 'failed', 'skipped'
+
+
+class Pipeline:
+    """
+    DAG of problem entry points sharing a dataset cache.
+    """
+
+    def __init__(self, state_dir: str):
+        self.state_dir = state_dir
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, problem: str, args: dict = None, after: list = ()) -> None:
+        """
+        Adds a stage.
+
+
+        Args:
+            - name (str): Stage name, also the name of its result file.
+            - problem (str): Problem name, one of problems.PROBLEMS.
+            - args (dict): Keyword arguments of the entry point, '@name' for the result of another stage.
+            - after (list): Stages that must be done before this one.
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicated stage '{name}'.")
+        if problem not in PROBLEMS:
+            raise ValueError(f"Unknown problem '{problem}' in stage '{name}'.")
+
+        args = dict(args or {})
+        if ARGUMENTS[problem] == 'files':
+            args.setdefault('output', None)
+        references = [value[1:] for value in args.values() if isinstance(value, str) and value.startswith('@')]
+        self.stages[name] = {"problem": problem, "args": args, "after": set(after) | set(references)}
+
+    def result_file(self, name: str) -> str:
+        """
+        Returns the file holding the result of a stage.
+        """
+        output = self.stages[name]["args"].get('output')
+        return output or os.path.join(self.state_dir, f"{name}.json")
+
+    def _order(self) -> list:
+        """
+        Returns the stages in dependency order, checking the graph.
+        """
+        order, visiting, visited = [], set(), set()
+
+        def visit(name, path):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a cycle: {' -> '.join(path + [name])}.")
+            visiting.add(name)
+            for dependency in sorted(self.stages[name]["after"]):
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'.")
+                visit(dependency, path + [name])
+            visiting.discard(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def _arguments(self, name: str) -> dict:
+        """
+        Returns the arguments of a stage with the references replaced by result files.
+        """
+        args = {}
+        for key, value in self.stages[name]["args"].items():
+            if isinstance(value, str) and value.startswith('@'):
+                value = self.result_file(value[1:])
+            args[key] = value
+        if 'output' in args:
+            args['output'] = self.result_file(name)
+        return args
+
+    def _fingerprint(self, name: str, args: dict) -> str:
+        """
+        Hashes the problem, arguments and size / modification time of the input files of a stage.
+        """
+        inputs = {}
+        for key, value in args.items():
+            if key != 'output' and isinstance(value, str) and os.path.isfile(value):
+                stat = os.stat(value)
+                inputs[key] = [stat.st_size, stat.st_mtime_ns]
+        content = json.dumps({"problem": self.stages[name]["problem"], "args": args, "inputs": inputs},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _run_stage(self, name: str, args: dict) -> dict:
+        """
+        Runs the entry point of a stage and saves its result.
+        """
+        problem = self.stages[name]["problem"]
+        result_file = self.result_file(name)
+
+        start = time.perf_counter()
+        with stage(name):
+            if args.get('workers') not in (None, 1):
+                # The entry point forks process pools, which can deadlock when forked from the
+                # stage threads: it runs in a fresh (spawned, single-threaded) process instead
+                with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                    rows = pool.submit(_execute, problem, args, result_file).result()
+                process = "spawned"
+            else:
+                rows = _execute(problem, args, result_file)
+                process = "pipeline"
+
+        return {"seconds": time.perf_counter() - start, "rows": rows, "result_file": result_file, "process": process}
+
+    def run(self, workers: int = 4, resume: bool = False, cache_mb: float = 1024) -> dict:
+        """
+        Runs the pipeline.
+
+
+        Args:
+            - workers (int): Number of stages running at once.
+            - resume (bool): Skips the completed stages whose arguments and inputs did not change.
+            - cache_mb (float): Memory budget of the dataset cache shared by the stages, in MB.
+
+        Returns:
+            - dict: Report with the status and timing of every stage.
+        """
+        order = self._order()
+        os.makedirs(self.state_dir, exist_ok=True)
+        state = self._load_state() if resume else {}
+
+        previous_cache = get_cache()
+        if previous_cache is None:
+            set_cache(DatasetCache(cache_mb))
+
+        report = {name: {"name": name, "problem": self.stages[name]["problem"]} for name in order}
+        pending = list(order)
+        running = {}
+        start = time.perf_counter()
+        try:
+            with stage('pipeline'), ThreadPoolExecutor(max(1, workers)) as pool:
+                while pending or running:
+                    for name in list(pending):
+                        statuses = [report[d].get("status") for d in self.stages[name]["after"]]
+                        if any(s in (FAILED, SKIPPED) for s in statuses):
+                            pending.remove(name)
+                            report[name].update(status=SKIPPED)
+                            logging.warning(f"Stage '{name}' skipped, a dependency failed")
+                        elif all(s in (DONE, RESUMED) for s in statuses):
+                            pending.remove(name)
+                            args = self._arguments(name)
+                            fingerprint = self._fingerprint(name, args)
+                            previous = state.get(name, {})
+                            if previous.get("fingerprint") == fingerprint and os.path.exists(previous.get("result_file", '')):
+                                report[name].update(status=RESUMED, seconds=0.0, rows=previous.get("rows"),
+                                                    result_file=previous["result_file"])
+                                logging.info(f"Stage '{name}' already done, resumed")
+                                continue
+                            # Every stage gets its own copy of the context: stage paths nest under 'pipeline'
+                            context = contextvars.copy_context()
+                            running[pool.submit(context.run, self._run_stage, name, args)] = (name, fingerprint)
+
+                    if not running:
+                        continue
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name, fingerprint = running.pop(future)
+                        try:
+                            report[name].update(status=DONE, **future.result())
+                            state[name] = {"fingerprint": fingerprint, **report[name]}
+                            self._save_state(state)
+                            logging.info(f"Stage '{name}' done in {report[name]['seconds']:.3f}s")
+                        except Exception as e:
+                            report[name].update(status=FAILED, error=str(e))
+                            state.pop(name, None)
+                            logging.error(f"Stage '{name}' failed -> {e}")
+        finally:
+            if previous_cache is None:
+                set_cache(None)
+
+        result = {
+            "seconds": time.perf_counter() - start,
+            "status": FAILED if any(r["status"] in (FAILED, SKIPPED) for r in report.values()) else DONE,
+            "stages": list(report.values()),
+        }
+        _write_json(result, os.path.join(self.state_dir, REPORT_FILE))
+        return result
+
+    def _load_state(self) -> dict:
+        try:
+            with open(os.path.join(self.state_dir, STATE_FILE)) as f:
+                return json.load(f)["stages"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _save_state(self, state: dict) -> None:
+        with self._lock:
+            _write_json({"stages": state}, os.path.join(self.state_dir, STATE_FILE))
+
+
+
+def _execute(problem: str, args: dict, result_file: str):
+    """
+    Calls the entry point of a problem and saves its result, in the pipeline or a spawned process.
+
+    Returns the number of rows written, None for the merges (they write their output themselves).
+    """
+    function = get_function(problem)
+    kind = ARGUMENTS[problem]
+
+    if kind == 'files':
+        before = _mtime(result_file)
+        # The output argument is named differently by the merges
+        options = {key: value for key, value in args.items() if key not in ('file1', 'file2', 'output')}
+        function(args['file1'], args['file2'], args['output'], **options)
+        if _mtime(result_file) in (None, before):
+            raise RuntimeError(f"'{PROBLEMS[problem][1]}' did not write '{result_file}'.")
+        return None
+
+    if kind == 'data':
+        from data_manipulation.loader import load_json
+        result = function(load_json(args['file']))
+    else:
+        result = function(**{key: value for key, value in args.items() if key != 'output'})
+    if result is None:
+        raise RuntimeError(f"'{PROBLEMS[problem][1]}' failed, see the log.")
+
+    from data_manipulation.writer import write_records
+    return write_records(result if not isinstance(result, dict) else [result], result_file)
+
+
+
+def _mtime(file: str):
+    try:
+        return os.stat(file).st_mtime_ns
+    except OSError:
+        return None
+
+
+
+def _write_json(content: dict, file: str) -> None:
+    """
+    Writes a small JSON file atomically.
+    """
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file)), suffix='.tmp')
+    try:
+        with open(fd, 'w') as f:
+            json.dump(content, f, indent=4)
+        os.replace(tmp_file, file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+
+
+def load_pipeline(file: str, state_dir: str) -> Pipeline:
+    """
+    Reads a pipeline file.
+
+
+    Args:
+        - file (str): Path to the JSON pipeline file.
+        - state_dir (str): Folder of the stage results, state and report.
+
+    Returns:
+        - Pipeline: The pipeline, not run yet.
+    """
+    with open(file) as f:
+        content = json.load(f)
+
+    pipeline = Pipeline(state_dir)
+    for spec in content.get("stages", []):
+        pipeline.add(spec["name"], spec["problem"], spec.get("args"), spec.get("after", ()))
+    return pipeline
+
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Runs a pipeline of problem entry points.")
+    parser.add_argument('file', help="Path to the JSON pipeline file.")
+    parser.add_argument('--state-dir', default='pipeline_state', help="Folder of the stage results, state and report.")
+    parser.add_argument('--workers', type=int, default=4, help="Number of stages running at once.")
+    parser.add_argument('--resume', action='store_true', help="Skips the stages completed by a previous run.")
+    parser.add_argument('--cache-mb', type=float, default=1024, help="Memory budget of the dataset cache, in MB.")
+    args = parser.parse_args(argv)
+
+    report = load_pipeline(args.file, args.state_dir).run(args.workers, args.resume, args.cache_mb)
+
+    for result in report["stages"]:
+        seconds = f"{result['seconds']:>9.3f} s" if "seconds" in result else " " * 11
+        print(f"{result['name']:<30} {result['problem']:<20} {result['status']:<8} {seconds}  {result.get('error', '')}")
+    print(f"{'total':<30} {'':<20} {report['status']:<8} {report['seconds']:>9.3f} s")
+    return 0 if report["status"] == DONE else 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
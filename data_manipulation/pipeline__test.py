@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Tests the pipeline
+"""
+import unittest
+import contextlib
+import io
+import json
+import os
+import tempfile
+import pandas as pd
+from data_manipulation.cache import DatasetCache, set_cache
+from data_manipulation.pipeline import Pipeline, load_pipeline
+from data_manipulation.problems import get_function
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.events1 = self.write('events1.json', [
+            {"user_id": 1, "action": "login", "timestamp": "2024-11-01T08:00:00"},
+            {"user_id": 2, "action": "click", "timestamp": "2024-11-01T08:05:00"},
+        ])
+        self.events2 = self.write('events2.json', [
+            {"user_id": 1, "action": "login", "timestamp": "2024-11-01T08:00:00"},
+            {"user_id": 3, "action": "login", "timestamp": "2024-11-01T08:10:00"},
+        ])
+        self.registrations = self.write('registrations.json', [
+            {"user_id": 1, "email": "a@example.com", "timestamp": "2024-11-01T08:00:00"},
+            {"user_id": 1, "email": "a@example.com", "timestamp": "2024-11-01T08:10:00"},
+        ])
+        self.state_dir = os.path.join(self.tmp_dir.name, 'state')
+        self.spec = {"stages": [
+            {"name": "merged", "problem": "merge-and-filter", "args": {"file1": self.events1, "file2": self.events2}},
+            {"name": "keys", "problem": "unique-keys", "args": {"file": "@merged"}},
+            {"name": "duplicates", "problem": "anomaly-detection", "args": {"file": self.registrations}},
+            {"name": "duplicates_again", "problem": "anomaly-detection", "args": {"file": self.registrations}, "after": ["duplicates"]},
+        ]}
+
+    def tearDown(self):
+        set_cache(None)
+        self.tmp_dir.cleanup()
+
+    def write(self, name, content):
+        file = os.path.join(self.tmp_dir.name, name)
+        with open(file, 'w') as f:
+            json.dump(content, f)
+        return file
+
+    def run_pipeline(self, spec, **kwargs):
+        pipeline = load_pipeline(self.write('pipeline.json', spec), self.state_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return {stage["name"]: stage for stage in pipeline.run(**kwargs)["stages"]}
+
+    def test_run(self):
+        cache = DatasetCache()
+        set_cache(cache)
+
+        stages = self.run_pipeline(self.spec, workers=2)
+
+        self.assertEqual({stage["status"] for stage in stages.values()}, {"done"})
+        expected = get_function('anomaly-detection')(self.registrations)
+        pd.testing.assert_frame_equal(pd.read_json(stages["duplicates"]["result_file"]), expected)
+        # 'keys' read the merged events written by 'merged'
+        with open(stages["keys"]["result_file"]) as f:
+            self.assertEqual(json.load(f), ["action", "timestamp", "user_id"])
+        # Registrations parsed once for both anomaly stages
+        self.assertGreaterEqual(cache.stats()["hits"], 1)
+
+    def test_shared_scan(self):
+        cache = DatasetCache()
+        set_cache(cache)
+        file = self.write('activity.json', [
+            {"user_id": 1, "email": "a@example.com", "item": "book", "quantity": 2, "login_date": "2024-11-01"},
+            {"user_id": 1, "email": "a@example.com", "item": "pen", "quantity": 1, "login_date": "2024-11-02"},
+            {"user_id": 2, "email": "b@example.com", "item": "pen", "quantity": 1, "login_date": "2024-11-02"},
+        ])
+        spec = {"stages": [
+            {"name": "duplicates", "problem": "anomaly-detection", "args": {"file": file}},
+            {"name": "streaks", "problem": "longest-sequence", "args": {"file": file, "user_ids": [1]}, "after": ["duplicates"]},
+            {"name": "items", "problem": "most-frequent", "args": {"file": file}, "after": ["streaks"]},
+        ]}
+
+        stages = self.run_pipeline(spec)
+
+        self.assertEqual({stage["status"] for stage in stages.values()}, {"done"})
+        # One parse of the file, filtered by 'streaks' and reused by 'items'
+        self.assertEqual(cache.stats()["entries"], 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+        with open(stages["streaks"]["result_file"]) as f:
+            self.assertEqual(json.load(f), [{"user_id": 1, "longest_sequence": 2, "start_date": "2024-11-01", "end_date": "2024-11-02"}])
+
+    def test_files_options(self):
+        # Every argument of the merges is passed, stages with workers run in a spawned process
+        provenance = os.path.join(self.tmp_dir.name, 'provenance.json')
+        spec = {"stages": [
+            {"name": "merged", "problem": "merge-overlapping",
+             "args": {"file1": self.events1, "file2": self.events2, "provenance_file": provenance, "workers": 2}},
+            {"name": "logins", "problem": "merge-and-filter",
+             "args": {"file1": self.events1, "file2": self.events2, "external": True, "stable": True, "partitions": 3}},
+        ]}
+
+        stages = self.run_pipeline(spec)
+
+        self.assertEqual({stage["status"] for stage in stages.values()}, {"done"})
+        self.assertEqual(stages["merged"]["process"], "spawned")
+        self.assertEqual(stages["logins"]["process"], "pipeline")
+        self.assertTrue(os.path.exists(provenance))
+        with open(stages["logins"]["result_file"]) as f:
+            self.assertEqual([record["user_id"] for record in json.load(f)], [1, 3])
+
+    def test_resume(self):
+        self.run_pipeline(self.spec)
+        stages = self.run_pipeline(self.spec, resume=True)
+        self.assertEqual({stage["status"] for stage in stages.values()}, {"resumed"})
+
+        # A modified input runs its stage and the stages depending on it again
+        self.write('events2.json', [{"user_id": 4, "action": "login", "timestamp": "2024-11-02T08:00:00"}])
+        stages = self.run_pipeline(self.spec, resume=True)
+
+        self.assertEqual(stages["merged"]["status"], "done")
+        self.assertEqual(stages["keys"]["status"], "done")
+        self.assertEqual(stages["duplicates"]["status"], "resumed")
+
+    def test_failed_stage(self):
+        self.spec["stages"][0]["args"]["file1"] = os.path.join(self.tmp_dir.name, 'missing.json')
+
+        stages = self.run_pipeline(self.spec)
+
+        self.assertEqual(stages["merged"]["status"], "failed")
+        self.assertEqual(stages["keys"]["status"], "skipped")
+        self.assertEqual(stages["duplicates"]["status"], "done")
+
+    def test_invalid_graph(self):
+        pipeline = Pipeline(self.state_dir)
+        pipeline.add("a", "unique-keys", {"file": "@b"})
+        pipeline.add("b", "unique-keys", {"file": "@a"})
+
+        with self.assertRaises(ValueError):
+            pipeline.run()
+        with self.assertRaises(ValueError):
+            pipeline.add("c", "unknown", {})
+
+
+if __name__ == "__main__":
+    unittest.main()
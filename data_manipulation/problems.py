@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Registry of the problem scripts of this repository.
+
+The scripts live in folders whose names are not valid Python package names
+(e.g. 'anomaly-detection/code.py'), so they are imported by path.
+"""
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (script path relative to the repository root, entry point)
+PROBLEMS = {
+    'merge-and-filter': ('merge-and-filter-json-data/problem-1.py', 'merge_json_files'),
+    'most-frequent': ('group-data-and-find-the-most-frequent/problem-2.py', 'group_data_and_find_most_frequent'),
+    'anomaly-detection': ('anomaly-detection/code.py', 'detect_anomaly'),
+    'longest-sequence': ('longest-contiguous-sequence/longest_sequence.py', 'longest_contiguous_sequence'),
+    'unique-keys': ('extract-unique-keys/extract_unique_keys.py', 'unique_keys'),
+    'merge-overlapping': (
+        '6__merge_two_json_files_with_overlapping_keys/merge_two_json_files_with_overlapping_keys.py',
+        'merge_two_json_files_with_overlapping_keys',
+    ),
+    'insights': ('extract-insites/extract-insites.py', 'extract_insights'),
+}
+
+# name -> arguments of the entry point: 'file', 'files' (file1, file2, output) or 'data' (records of a file)
+ARGUMENTS = {
+    'merge-and-filter': 'files',
+    'most-frequent': 'file',
+    'anomaly-detection': 'file',
+    'longest-sequence': 'file',
+    'unique-keys': 'file',
+    'merge-overlapping': 'files',
+    'insights': 'data',
+}
+
+# Problems accepting a user_ids filter
+USER_FILTERS = ('most-frequent', 'anomaly-detection', 'longest-sequence')
+
+
+def load_module(name: str):
+    """
+    Imports the script of a problem.
+
+
+    Args:
+        - name (str): Problem name, one of PROBLEMS.
+
+    Returns:
+        - module: Imported script module.
+    """
+    if name not in PROBLEMS:
+        raise ValueError(f"Unknown problem '{name}'. Available: {', '.join(PROBLEMS)}")
+
+    module_name = f"problem_{name.replace('-', '_')}"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    path = os.path.join(ROOT, PROBLEMS[name][0])
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        del sys.modules[module_name]
+        raise
+    return module
+
+
+
+def get_function(name: str):
+    """
+    Returns the entry point of a problem.
+
+
+    Args:
+        - name (str): Problem name, one of PROBLEMS.
+
+    Returns:
+        - callable: Entry point function of the problem script.
+    """
+    return getattr(load_module(name), PROBLEMS[name][1])
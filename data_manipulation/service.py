@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Local service exposing the entry points of the problem scripts.
+
+Task:
+    Running a script reads its input again and re-imports pandas every time.
+    The service imports the scripts once and keeps recently used datasets
+    parsed (data_manipulation.cache), so repeated queries skip load and parse.
+
+
+Usage:
+    python -m data_manipulation.service --port 8765 --cache-mb 2048
+    python -m data_manipulation.service --socket /tmp/data_manipulation.sock
+
+    The service speaks HTTP over TCP or a Unix socket. Every entry point is a
+    POST endpoint taking its keyword arguments as a JSON object:
+
+    POST /longest_contiguous_sequence  {"file": "logins.json", "user_ids": [1, 2]}
+    -> 200 {"result": [{"user_id": 1, "longest_sequence": 2, ...}, ...]}
+
+    POST /merge_json_files  {"file1": "a.json", "file2": "b.json", "output": "out.json"}
+    -> 200 {"output": "out.json"}
+
+    GET /health -> 200 {"status": "ok"}
+    GET /cache  -> 200 {"entries": 2, "used_mb": 35.2, "hits": 10, ...}
+
+    curl --unix-socket /tmp/data_manipulation.sock -d '{"file": "file.json"}' http://localhost/detect_anomaly
+
+    Paths are resolved by the service process, relative to its working directory.
+    Entry points run in a thread pool, so the event loop keeps accepting requests,
+    and in one process ('workers' is ignored): forking process pools from a
+    multithreaded process can deadlock.
+"""
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+from data_manipulation.cache import DatasetCache, set_cache
+from data_manipulation.problems import get_function
+
+# endpoint -> problem name
+ENDPOINTS = {
+    'detect_anomaly': 'anomaly-detection',
+    'longest_contiguous_sequence': 'longest-sequence',
+    'group_data_and_find_most_frequent': 'most-frequent',
+    'unique_keys': 'unique-keys',
+    'merge_json_files': 'merge-and-filter',
+    'merge_two_json_files_with_overlapping_keys': 'merge-overlapping',
+}
+
+# Arguments holding the output file of the entry points writing one
+_OUTPUT_ARGUMENTS = ('output', 'output_file')
+
+_MAX_BODY_SIZE = 16 * 1024 * 1024
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class _BadRequest(Exception):
+    pass
+
+
+
+def _mtime(file: str):
+    try:
+        return os.stat(file).st_mtime_ns
+    except OSError:
+        return None
+
+
+
+def _to_json_value(result):
+    """
+    Converts the result of an entry point to a JSON value.
+    """
+    if hasattr(result, 'to_json'):
+        # Handles numpy types and NaN / NaT as null
+        return json.loads(result.to_json(orient='records'))
+    return result
+
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """
+    Reads an HTTP request, None when the connection is closed.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise _BadRequest("Malformed request line.")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length') or 0)
+    if length > _MAX_BODY_SIZE:
+        raise _BadRequest("Request body too large.")
+    body = await reader.readexactly(length) if length else b''
+
+    keep_alive = headers.get('connection', '').lower() != 'close' if version == 'HTTP/1.1' \
+        else headers.get('connection', '').lower() == 'keep-alive'
+    return method, target.split('?', 1)[0], body, keep_alive
+
+
+
+def _write_response(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool) -> None:
+    body = json.dumps(payload, default=str).encode('utf-8')
+    writer.write(
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+    )
+
+
+
+class Service:
+    """
+    HTTP service running the entry points with a shared dataset cache.
+    """
+
+    def __init__(self, cache_mb: float = 1024, threads: int = None):
+        self.cache = DatasetCache(cache_mb)
+        self._executor = ThreadPoolExecutor(threads or min(8, os.cpu_count() or 1))
+        # Scripts (and pandas) are imported once, when the service starts
+        self._functions = {endpoint: get_function(name) for endpoint, name in ENDPOINTS.items()}
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765, path: str = None):
+        """
+        Starts listening on a TCP port, or on a Unix socket when path is given.
+
+        Returns:
+            - asyncio.Server: The started server.
+        """
+        set_cache(self.cache)
+        if path is not None:
+            server = await asyncio.start_unix_server(self._handle, path=path)
+            logging.info(f"Service listening on '{path}'")
+        else:
+            server = await asyncio.start_server(self._handle, host, port)
+            logging.info(f"Service listening on {host}:{server.sockets[0].getsockname()[1]}")
+        return server
+
+    def close(self) -> None:
+        set_cache(None)
+        self._executor.shutdown(wait=False)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except (_BadRequest, ValueError) as e:
+                    _write_response(writer, 400, {"error": str(e)}, False)
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+
+                status, payload = await self.dispatch(method, path, body)
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> tuple:
+        """
+        Runs the endpoint of a request.
+
+        Returns:
+            - tuple: HTTP status and JSON payload.
+        """
+        endpoint = path.strip('/')
+        if endpoint == 'health':
+            return 200, {"status": "ok"}
+        if endpoint == 'cache':
+            return 200, self.cache.stats()
+        if endpoint not in self._functions:
+            return 404, {"error": f"Unknown endpoint '{path}'.", "endpoints": list(self._functions)}
+        if method != 'POST':
+            return 405, {"error": f"Use POST for '{path}'."}
+
+        function = self._functions[endpoint]
+        try:
+            kwargs = json.loads(body or b'{}')
+            if not isinstance(kwargs, dict):
+                raise ValueError("The request body must be a JSON object.")
+            inspect.signature(function).bind(**kwargs)
+        except (ValueError, TypeError) as e:
+            return 400, {"error": str(e)}
+
+        # The entry points fork process pools, which can deadlock when forked from the service threads
+        if kwargs.get('workers') not in (None, 1):
+            logging.warning(f"Endpoint '{endpoint}' runs in one process, 'workers' is ignored by the service.")
+            kwargs['workers'] = None
+
+        output = next((kwargs[name] for name in _OUTPUT_ARGUMENTS if name in kwargs), None)
+        before = _mtime(output) if output is not None else None
+
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self._executor, functools.partial(function, **kwargs))
+        except Exception as e:
+            logging.error(f"Endpoint '{endpoint}' failed -> {e}")
+            return 500, {"error": str(e)}
+
+        if output is not None:
+            # A file left by an earlier run does not mean this one succeeded
+            if _mtime(output) in (None, before):
+                return 500, {"error": f"Endpoint '{endpoint}' did not write '{output}', see the service log."}
+            return 200, {"output": output}
+        if result is None:
+            # The entry points report their errors and return None
+            return 500, {"error": f"Endpoint '{endpoint}' failed, see the service log."}
+        return 200, {"result": _to_json_value(result)}
+
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, path: str = None,
+                cache_mb: float = 1024, threads: int = None) -> None:
+    """
+    Runs the service until cancelled.
+
+
+    Args:
+        - host (str): Address to listen on.
+        - port (int): TCP port to listen on.
+        - path (str): Path of a Unix socket, used instead of host and port.
+        - cache_mb (float): Memory budget of the dataset cache, in MB.
+        - threads (int): Number of entry points running at once.
+    """
+    service = Service(cache_mb, threads)
+    server = await service.start(host, port, path)
+
+    # SIGTERM stops the service like Ctrl+C, removing the Unix socket
+    task = asyncio.current_task()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    except (NotImplementedError, AttributeError):
+        pass
+
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        service.close()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Serves the entry points of the problem scripts over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on.")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port to listen on.")
+    parser.add_argument('--socket', help="Path of a Unix socket to listen on instead of a TCP port.")
+    parser.add_argument('--cache-mb', type=float, default=1024, help="Memory budget of the dataset cache, in MB.")
+    parser.add_argument('--threads', type=int, help="Number of entry points running at once.")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.socket, args.cache_mb, args.threads))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
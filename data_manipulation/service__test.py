@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Tests the dataset cache and the service
+"""
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+import pandas as pd
+from data_manipulation.cache import DatasetCache, cached, set_cache
+from data_manipulation.loader import read_json_frame
+from data_manipulation.problems import get_function
+from data_manipulation.service import Service
+
+
+class TestDatasetCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.tmp_dir.name, 'a.json')
+        with open(self.file, 'w') as f:
+            json.dump([{"user_id": i, "item": "book"} for i in range(100)], f)
+
+    def tearDown(self):
+        set_cache(None)
+        self.tmp_dir.cleanup()
+
+    def test_lru_eviction(self):
+        cache = DatasetCache(max_mb=10)
+        cache.put('a', 'a', size_mb=4)
+        cache.put('b', 'b', size_mb=4)
+        cache.get('a')
+        cache.put('c', 'c', size_mb=4)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'a')
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertFalse(cache.put('d', 'd', size_mb=11))
+
+    def test_loader_uses_cache(self):
+        cache = DatasetCache()
+        set_cache(cache)
+
+        df = read_json_frame(self.file)
+        df['item'] = 'pen'
+        again = read_json_frame(self.file)
+
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(again['item'].tolist(), ['book'] * 100)
+
+    def test_point_reads_not_cached(self):
+        cache = DatasetCache()
+        set_cache(cache)
+
+        for user_id in range(5):
+            self.assertEqual(read_json_frame(self.file, user_ids=[user_id])['user_id'].tolist(), [user_id])
+        read_json_frame(self.file)
+
+        # One entry (the whole file) and no lock left behind
+        self.assertEqual(cache.stats()["entries"], 1)
+        self.assertEqual(cache._loading, {})
+
+    def test_modified_file_is_read_again(self):
+        set_cache(DatasetCache())
+        calls = []
+
+        def load():
+            calls.append(1)
+            return [1]
+
+        cached(self.file, 'records', load)
+        with open(self.file, 'w') as f:
+            json.dump([], f)
+        cached(self.file, 'records', load)
+
+        self.assertEqual(len(calls), 2)
+
+
+class TestService(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.tmp_dir.name, 'a.json')
+        with open(self.file, 'w') as f:
+            json.dump([
+                {"user_id": 1, "email": "a@example.com", "action": "login", "timestamp": "2024-11-01T08:00:00"},
+                {"user_id": 2, "email": "b@example.com", "action": "click", "timestamp": "2024-11-01T08:05:00"},
+                {"user_id": 1, "email": "a@example.com", "action": "login", "timestamp": "2024-11-01T08:10:00"},
+            ], f)
+        self.service = Service(cache_mb=64, threads=2)
+        self.server = await self.service.start(port=0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.service.close()
+        self.tmp_dir.cleanup()
+
+    async def request(self, method, path, payload=None):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        body = json.dumps(payload).encode() if payload is not None else b''
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        return int(head.split()[1]), json.loads(body)
+
+    async def test_endpoint(self):
+        expected = get_function('anomaly-detection')(self.file)
+
+        status, payload = await self.request('POST', '/detect_anomaly', {"file": self.file})
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["result"], json.loads(expected.to_json(orient='records')))
+
+        await self.request('POST', '/detect_anomaly', {"file": self.file})
+        status, stats = await self.request('GET', '/cache')
+        self.assertEqual(stats["entries"], 1)
+        # The direct call above parsed the file, both requests used the cache
+        self.assertEqual(stats["hits"], 2)
+
+    async def test_workers_ignored(self):
+        expected = get_function('anomaly-detection')(self.file)
+
+        with self.assertLogs(level='WARNING'):
+            status, payload = await self.request('POST', '/detect_anomaly', {"file": self.file, "workers": 2})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["result"], json.loads(expected.to_json(orient='records')))
+
+    async def test_output_endpoint(self):
+        output = os.path.join(self.tmp_dir.name, 'out.json')
+        status, payload = await self.request('POST', '/merge_json_files',
+                                             {"file1": self.file, "file2": self.file, "output": output})
+
+        self.assertEqual((status, payload), (200, {"output": output}))
+        self.assertEqual(len(pd.read_json(output)), 2)
+
+    async def test_output_endpoint_failed(self):
+        # A file left by an earlier run is not a success
+        output = os.path.join(self.tmp_dir.name, 'out.json')
+        with open(output, 'w') as f:
+            json.dump([], f)
+
+        status, payload = await self.request('POST', '/merge_json_files',
+                                             {"file1": "missing.json", "file2": self.file, "output": output})
+
+        self.assertEqual(status, 500)
+
+    async def test_errors(self):
+        self.assertEqual((await self.request('POST', '/unknown', {}))[0], 404)
+        self.assertEqual((await self.request('GET', '/detect_anomaly'))[0], 405)
+        self.assertEqual((await self.request('POST', '/detect_anomaly', {"path": self.file}))[0], 400)
+        self.assertEqual((await self.request('POST', '/detect_anomaly', {"file": "missing.json"}))[0], 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+drop_duplicates for DataFrames larger than memory, spilling to disk.
+
+Task:
+    pd.concat(frames).drop_duplicates() hashes every row in memory. When the
+    rows do not fit in memory, deduplicate them partition by partition.
+
+
+How it works:
+    1. Every incoming frame is split by the hash of a key column (a column
+       equal in duplicated rows, e.g. the timestamp) and the parts are
+       appended (pickled) to one spill file per partition. Rows with a
+       missing key are split by the hash of their other values instead, so
+       they do not all pile up in one partition. Duplicated rows always land
+       in the same partition.
+    2. Every partition is loaded alone, deduplicated with drop_duplicates
+       (keeping the first row, as in memory) and yielded.
+    3. With stable=True, the rows left are spilled again into buckets of
+       consecutive input positions, and the buckets are yielded sorted, so
+       the rows come out in the order of the in-memory drop_duplicates.
+
+    Rows are numbered in input order, so 'keep first' picks the same row as
+    in memory. The union of the columns and the integer columns widened to
+    float (missing in some frames, as pd.concat does) are tracked while
+    spilling, so the frames yielded have the columns and dtypes of the
+    in-memory result and are written the same.
+
+    Memory holds one input frame, or one partition / bucket, at a time.
+
+
+Usage:
+    for df in drop_duplicates_external(frames, key='timestamp', partitions=64):
+        ...
+"""
+import logging
+import math
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from data_manipulation.dtypes import concat_frames
+
+# Input position of every row while spilled
+_ROW = '__row__'
+
+# Multiplier of the key hash (Fibonacci hashing)
+_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _partition_of(values: np.ndarray, partitions: int) -> np.ndarray:
+    """
+    Returns the partition of every key, equal keys get the same partition.
+    """
+    if values.dtype.kind in 'iub':
+        hashes = values.astype(np.uint64) * _HASH
+    else:
+        hashes = pd.util.hash_array(np.asarray(values, dtype=object)) * _HASH
+    return ((hashes >> np.uint64(32)) % np.uint64(partitions)).astype(np.intp)
+
+
+
+def _is_missing(value) -> bool:
+    missing = pd.isna(value)
+    return isinstance(missing, (bool, np.bool_)) and bool(missing)
+
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hashes the values of every row, rows equal after pd.concat get the same hash.
+
+    Missing values are left out (a column missing in a frame is NaN after
+    pd.concat) and integral floats hashed as integers (integer columns are
+    widened to float by pd.concat).
+    """
+    columns = sorted((column for column in df.columns if column != _ROW), key=str)
+    rows = zip(*(df[column].tolist() for column in columns)) if columns else ((),) * len(df)
+    keys = []
+    for values in rows:
+        keys.append(repr([
+            (str(column), int(value) if isinstance(value, float) and value.is_integer() else value)
+            for column, value in zip(columns, values) if not _is_missing(value)
+        ]))
+    return pd.util.hash_array(np.array(keys, dtype=object))
+
+
+
+def _append(file: str, df: pd.DataFrame) -> None:
+    with open(file, 'ab') as f:
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+
+def _load(file: str) -> list:
+    frames = []
+    if not os.path.exists(file):
+        return frames
+    with open(file, 'rb') as f:
+        while True:
+            try:
+                frames.append(pickle.load(f))
+            except EOFError:
+                return frames
+
+
+
+class _Columns:
+    """
+    Union of the columns seen, in order, and the integer columns pd.concat would widen to float.
+    """
+
+    def __init__(self):
+        self.order = {}
+        self.integer = {}
+        self.frames = 0
+
+    def add(self, df: pd.DataFrame) -> None:
+        self.frames += 1
+        for column in df.columns:
+            if column == _ROW:
+                continue
+            series = df[column]
+            is_integer = pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+            if column not in self.order:
+                self.order[column] = len(self.order)
+                # Missing in the previous frames: filled with NaN
+                self.integer[column] = is_integer and self.frames == 1
+            elif not is_integer:
+                self.integer[column] = False
+        for column in self.order:
+            if column not in df.columns:
+                self.integer[column] = False
+
+    def restore(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Gives a deduplicated frame the columns and numeric dtypes of the in-memory result.
+        """
+        columns = list(self.order)
+        df = df.reindex(columns=columns) if list(df.columns) != columns else df
+        for column in columns:
+            if not self.integer[column] and pd.api.types.is_integer_dtype(df[column].dtype) \
+                    and not pd.api.types.is_bool_dtype(df[column].dtype):
+                df[column] = df[column].astype('float64')
+        return df
+
+
+
+def drop_duplicates_external(frames, key: str, partitions: int = 16, spill_dir: str = None,
+                             stable: bool = False, where=None):
+    """
+    Yields the rows of frames without duplicates, as concat_frames(frames).drop_duplicates().
+
+
+    Args:
+        - frames (iterable): DataFrames, read one at a time.
+        - key (str): Column used to partition the rows. Duplicated rows must have equal keys,
+                     any column does (one with many distinct values spreads the rows best).
+                     Rows where it is missing are partitioned by their other values.
+        - partitions (int): Number of spill partitions. Every one must fit in memory.
+        - spill_dir (str): Folder of the temporary spill files. The system temporary folder when None.
+        - stable (bool): Yields the rows in input order (as in memory) instead of partition by partition.
+        - where (callable): Row filter applied before spilling, returning a boolean mask for a frame.
+                            Filtering rows before or after drop_duplicates gives the same rows.
+
+    Returns:
+        - generator: DataFrames (without index) holding every distinct row once.
+    """
+    if partitions < 1:
+        raise ValueError("'partitions' must be a positive integer.")
+
+    columns = _Columns()
+    with tempfile.TemporaryDirectory(prefix='dedup_', dir=spill_dir) as directory:
+        spill_files = [os.path.join(directory, f"partition_{i}.pkl") for i in range(partitions)]
+
+        # 1. Spill every frame by hash of the key
+        rows = 0
+        for df in frames:
+            columns.add(df)
+            df = df.reset_index(drop=True)
+            df[_ROW] = np.arange(rows, rows + len(df), dtype=np.int64)
+            rows += len(df)
+            if where is not None:
+                df = df[np.asarray(where(df), dtype=bool)]
+            if df.empty:
+                continue
+
+            if key in df.columns:
+                targets = _partition_of(df[key].to_numpy(), partitions)
+                missing = df[key].isna().to_numpy()
+            else:
+                targets = np.zeros(len(df), dtype=np.intp)
+                missing = np.ones(len(df), dtype=bool)
+            if missing.any():
+                targets[missing] = _partition_of(_row_hashes(df[missing]), partitions)
+            order = np.argsort(targets, kind='stable')
+            bounds = np.searchsorted(targets[order], np.arange(partitions + 1))
+            for partition in range(partitions):
+                if bounds[partition] < bounds[partition + 1]:
+                    _append(spill_files[partition], df.iloc[order[bounds[partition]:bounds[partition + 1]]])
+        logging.debug(f"{rows} rows spilled into {partitions} partitions in '{directory}'")
+
+        # 2. Deduplicate every partition alone
+        buckets = partitions if stable else 0
+        bucket_files = [os.path.join(directory, f"bucket_{i}.pkl") for i in range(buckets)]
+        for file in spill_files:
+            parts = _load(file)
+            if not parts:
+                continue
+            df = concat_frames(parts).sort_values(_ROW, kind='stable')
+            df = df.drop_duplicates(subset=[c for c in df.columns if c != _ROW])
+            os.remove(file)
+
+            if not stable:
+                yield columns.restore(df.drop(columns=_ROW).reset_index(drop=True))
+                continue
+
+            # 3. Spill again by input position
+            targets = (df[_ROW].to_numpy() * buckets // max(rows, 1)).astype(np.intp)
+            for bucket in np.unique(targets):
+                _append(bucket_files[bucket], df[targets == bucket])
+
+        for file in bucket_files:
+            parts = _load(file)
+            if parts:
+                df = concat_frames(parts).sort_values(_ROW, kind='stable')
+                yield columns.restore(df.drop(columns=_ROW).reset_index(drop=True))
+
+
+
+def partitions_for(files: list, partition_mb: float = 256) -> int:
+    """
+    Returns a number of partitions holding about partition_mb of input each.
+    """
+    size = sum(os.path.getsize(file) for file in files)
+    return max(1, math.ceil(size / (partition_mb * 1024 * 1024)))
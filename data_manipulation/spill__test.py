@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Tests spill functions
+"""
+import unittest
+import os
+import json
+import tempfile
+import pandas as pd
+from data_manipulation.dtypes import concat_frames
+from data_manipulation.generators import generate
+from data_manipulation.loader import iter_json_frames
+from data_manipulation.problems import get_function
+from data_manipulation.spill import _partition_of, _row_hashes, drop_duplicates_external
+
+
+class TestSpill(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.frames = [
+            pd.DataFrame({"user_id": [1, 2, 1], "action": ["login", "click", "login"], "timestamp": [10, 20, 10]}),
+            # 'quantity' missing in the first frame, user_id widened to float by the missing value
+            pd.DataFrame({"user_id": [2, None, 3], "action": ["click", "login", "login"], "timestamp": [20, 30, 40],
+                          "quantity": [1, 2, 3]}),
+            pd.DataFrame({"user_id": [3, 1], "action": ["login", "login"], "timestamp": [40, 10], "quantity": [3, None]}),
+        ]
+        self.expected = concat_frames(self.frames).drop_duplicates().reset_index(drop=True)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def records(self, frames) -> list:
+        return [json.loads(line) for df in frames for line in df.to_json(orient='records', lines=True).splitlines()]
+
+    def test_stable(self):
+        for partitions in (1, 3, 16):
+            result = drop_duplicates_external(self.frames, 'timestamp', partitions, self.tmp_dir.name, stable=True)
+
+            self.assertEqual(self.records(result), self.records([self.expected]))
+        # Spill files removed
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_unordered(self):
+        result = list(drop_duplicates_external(self.frames, 'timestamp', 4))
+
+        key = lambda record: json.dumps(record, sort_keys=True)
+        self.assertEqual(sorted(self.records(result), key=key), sorted(self.records([self.expected]), key=key))
+        self.assertEqual([list(df.columns) for df in result], [list(self.expected.columns)] * len(result))
+
+    def test_where(self):
+        result = drop_duplicates_external(self.frames, 'timestamp', 2, stable=True, where=lambda df: df['action'] == 'login')
+
+        expected = self.expected[self.expected['action'] == 'login']
+        self.assertEqual(self.records(result), self.records([expected]))
+
+    def test_missing_keys(self):
+        frames = [
+            pd.DataFrame({"user_id": [i % 50 for i in range(200)], "timestamp": [None] * 200}),
+            # Duplicates of the first frame, user_id widened to float and 'timestamp' missing
+            pd.DataFrame({"user_id": [float(i) for i in range(60)] + [None]}),
+        ]
+        expected = concat_frames(frames).drop_duplicates().reset_index(drop=True)
+
+        for partitions in (1, 8):
+            result = drop_duplicates_external(frames, 'timestamp', partitions, stable=True)
+            self.assertEqual(self.records(result), self.records([expected]))
+        # Rows without key are spread over the partitions
+        self.assertEqual(len(set(_partition_of(_row_hashes(frames[0]), 8).tolist())), 8)
+
+    def test_iter_json_frames(self):
+        file = generate('events', 2000, self.tmp_dir.name)[0]
+
+        frames = list(iter_json_frames(file, chunk_mb=0.05, convert_dates=False))
+
+        self.assertGreater(len(frames), 1)
+        pd.testing.assert_frame_equal(concat_frames(frames), pd.read_json(file, convert_dates=False))
+
+    def test_merge_json_files_external(self):
+        file1, file2 = generate('events', 5000, self.tmp_dir.name)[:2]
+        merge_json_files = get_function('merge-and-filter')
+        outputs = [os.path.join(self.tmp_dir.name, name) for name in ('memory.json', 'external.json')]
+
+        merge_json_files(file1, file2, outputs[0])
+        merge_json_files(file1, file2, outputs[1], external=True, partitions=7, stable=True)
+
+        with open(outputs[0]) as f1, open(outputs[1]) as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_merge_json_files_timestamps(self):
+        # Fractions of seconds and offsets keep rows distinct, a file without timestamps is merged
+        records = [
+            [{"user_id": 1, "action": "login", "timestamp": "2024-11-01T08:00:00.250"},
+             {"user_id": 1, "action": "login", "timestamp": "2024-11-01T08:00:00.750"},
+             {"user_id": 2, "action": "login", "timestamp": "2024-11-01T08:00:00Z"}],
+            [{"user_id": 2, "action": "login", "timestamp": "2024-11-01T08:00:00+02:00"},
+             {"user_id": 1, "action": "login", "timestamp": "2024-11-01T08:00:00.250"}],
+            [{"user_id": 3, "action": "login"}],
+        ]
+        files = [os.path.join(self.tmp_dir.name, f"events{i}.json") for i in range(3)]
+        for file, data in zip(files, records):
+            with open(file, 'w') as f:
+                json.dump(data, f)
+        merge_json_files = get_function('merge-and-filter')
+        output = os.path.join(self.tmp_dir.name, 'output.json')
+
+        results = []
+        for external in (False, True):
+            merge_json_files(files[0], files[1], output, external=external, partitions=3, stable=True)
+            with open(output) as f:
+                results.append([record["timestamp"] for record in json.load(f)])
+        merge_json_files(files[2], files[0], output)
+        with open(output) as f:
+            merged = json.load(f)
+
+        # One precision for the column, as pandas prints it
+        expected = ["2024-11-01 08:00:00.250", "2024-11-01 08:00:00.750", "2024-11-01 08:00:00.000", "2024-11-01 06:00:00.000"]
+        self.assertEqual(results, [expected, expected])
+        self.assertEqual([record["timestamp"] for record in merged], [None] + expected[:3])
+
+
+if __name__ == "__main__":
+    unittest.main()
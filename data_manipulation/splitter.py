@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped JSON array splitter
+
+Task:
+    Split a single huge top-level JSON array (not JSON Lines) into byte ranges
+    holding whole elements, so several processes can parse different parts
+    of the same file at once.
+
+
+How it works:
+    The file is memory-mapped and scanned in chunks with numpy. Unescaped
+    quotes give the string state, brackets outside strings give the depth,
+    and commas outside strings at depth 1 are the element boundaries.
+
+    [ {"a": "x,]"} , {"a": [1, 2]} , {"a": 3} ]
+    ^              ^                ^          ^
+    open          boundary        boundary   close
+
+    A range (start, end) always holds complete elements separated by commas,
+    so b'[' + data[start:end] + b']' is a valid JSON array.
+"""
+import io
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import re
+
+import numpy as np
+
+_CHUNK_SIZE = 16 * 1024 * 1024
+
+_QUOTE = 0x22
+_BACKSLASH = 0x5C
+
+# Byte classes used by the scanner: 1 = opening bracket, 2 = closing bracket, 3 = comma
+_KIND = np.zeros(256, dtype=np.uint8)
+_KIND[[ord('['), ord('{')]] = 1
+_KIND[[ord(']'), ord('}')]] = 2
+_KIND[ord(',')] = 3
+
+_WHITESPACE = re.compile(rb'\s*')
+
+
+def iter_element_boundaries(data, chunk_size: int = _CHUNK_SIZE):
+    """
+    Yields the positions of the top-level boundaries of a JSON array.
+
+    The first position yielded is the opening '[', the last one is the closing ']'
+    and every position in between is a comma separating two top-level elements.
+
+
+    Args:
+        - data (buffer): Bytes-like object (e.g. mmap) holding a JSON array.
+        - chunk_size (int): Number of bytes scanned at once.
+
+    Returns:
+        - Iterator[np.ndarray]: Sorted int64 arrays of absolute byte positions.
+    """
+    start = _WHITESPACE.match(data).end()
+    if data[start:start + 1] != b'[':
+        raise ValueError("Input is not a top-level JSON array.")
+
+    buf = np.frombuffer(data, dtype=np.uint8)
+
+    quote_parity = 0
+    depth = 0
+    for offset in range(start, len(buf), chunk_size):
+        chunk = buf[offset:offset + chunk_size]
+
+        # Unescaped quotes: a quote is escaped when preceded by an odd run of backslashes
+        quotes = np.flatnonzero(chunk == _QUOTE)
+        if quotes.size:
+            candidates = quotes[buf[quotes + offset - 1] == _BACKSLASH]
+            if candidates.size:
+                escaped = [q for q in candidates if _backslash_run(buf, q + offset) % 2]
+                quotes = np.setdiff1d(quotes, escaped, assume_unique=True)
+
+        # Structural bytes outside strings
+        kinds = _KIND[chunk]
+        positions = np.flatnonzero(kinds)
+        outside = ((np.searchsorted(quotes, positions) + quote_parity) & 1) == 0
+        positions = positions[outside]
+        kinds = kinds[positions]
+
+        delta = np.where(kinds == 1, 1, np.where(kinds == 2, -1, 0))
+        depth_after = depth + np.cumsum(delta)
+        # Nothing after the closing bracket of the array belongs to it
+        closed = np.flatnonzero(depth_after == 0)
+        if closed.size:
+            positions, kinds = positions[:closed[0] + 1], kinds[:closed[0] + 1]
+            delta, depth_after = delta[:closed[0] + 1], depth_after[:closed[0] + 1]
+        depth_before = depth_after - delta
+
+        is_boundary = (
+            ((kinds == 1) & (depth_before == 0))
+            | ((kinds == 2) & (depth_after == 0))
+            | ((kinds == 3) & (depth_before == 1))
+        )
+
+        quote_parity = (quote_parity + quotes.size) & 1
+        if depth_after.size:
+            depth = int(depth_after[-1])
+
+        boundaries = positions[is_boundary] + offset
+        if boundaries.size:
+            yield boundaries.astype(np.int64)
+        if depth == 0 and depth_after.size:
+            # Closing bracket of the array found, the caller checks what follows it
+            return
+
+    # Views of the buffer must be released before the caller closes the mmap
+    del buf, chunk
+    raise ValueError("Unterminated JSON array.")
+
+
+
+def _backslash_run(buf: np.ndarray, position: int) -> int:
+    """
+    Counts the backslashes immediately before a position.
+    """
+    count = 0
+    position -= 1
+    while position >= 0 and buf[position] == _BACKSLASH:
+        count += 1
+        position -= 1
+    return count
+
+
+
+def split_json_array(file: str, parts: int, chunk_size: int = _CHUNK_SIZE) -> list:
+    """
+    Splits a top-level JSON array file into byte ranges of whole elements.
+
+    The ranges have roughly the same size in bytes. Fewer ranges are returned
+    when the array has less elements than requested parts.
+
+
+    Args:
+        - file (str): Path to JSON file.
+        - parts (int): Desired number of ranges.
+        - chunk_size (int): Number of bytes scanned at once.
+
+    Returns:
+        - list: List of (start, end) byte ranges, end exclusive.
+    """
+    if not os.path.exists(file):
+        raise FileNotFoundError(f"File '{file}' not found.")
+    if parts < 1:
+        raise ValueError("'parts' must be a positive integer.")
+
+    size = os.path.getsize(file)
+    if size == 0:
+        raise ValueError(f"File '{file}' is empty.")
+
+    targets = np.array([size * i // parts for i in range(1, parts)], dtype=np.int64)
+
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        chosen = []
+        pending = 0
+        has_elements = False
+        for boundaries in iter_element_boundaries(mm, chunk_size):
+            if not chosen:
+                chosen.append(int(boundaries[0]))
+                boundaries = boundaries[1:]
+            closing = None
+            if boundaries.size and mm[boundaries[-1]] in b']}':
+                closing = int(boundaries[-1])
+                boundaries = boundaries[:-1]
+            has_elements = has_elements or boundaries.size > 0
+
+            # First comma at or after every pending target
+            if pending < targets.size and boundaries.size:
+                idx = np.searchsorted(boundaries, targets[pending:])
+                found = idx[idx < boundaries.size]
+                for position in boundaries[found]:
+                    if int(position) != chosen[-1]:
+                        chosen.append(int(position))
+                pending += found.size
+
+            if closing is not None:
+                if _WHITESPACE.match(mm, closing + 1).end() != len(mm):
+                    raise ValueError("Unexpected data after the top-level JSON array.")
+                if not has_elements and not mm[chosen[0] + 1:closing].strip():
+                    return []
+                chosen.append(closing)
+
+    ranges = list(zip([b + 1 for b in chosen[:-1]], chosen[1:]))
+    logging.debug(f"File '{file}' split into {len(ranges)} ranges")
+    return ranges
+
+
+
+def read_json_range(file: str, start: int, end: int) -> bytes:
+    """
+    Returns a byte range of a JSON array file as a standalone JSON array.
+
+
+    Args:
+        - file (str): Path to JSON file.
+        - start (int): First byte of the range.
+        - end (int): End of the range, exclusive.
+
+    Returns:
+        - bytes: JSON array holding the elements of the range.
+    """
+    with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return b'[' + mm[start:end] + b']'
+
+
+
+def _load_range(file: str, start: int, end: int) -> list:
+    return json.loads(read_json_range(file, start, end))
+
+
+def _read_range_frame(file: str, start: int, end: int, kwargs: dict):
+    import pandas as pd
+    return pd.read_json(io.BytesIO(read_json_range(file, start, end)), **kwargs)
+
+
+def _map_range(file: str, start: int, end: int, func):
+    return func(_load_range(file, start, end))
+
+
+def _run(function, args: list, workers: int) -> list:
+    if workers <= 1 or len(args) <= 1:
+        return [function(*arg) for arg in args]
+    # Functions of the problem scripts are imported by path, so workers are forked
+    # (when available) to inherit them instead of importing them by name
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    with context.Pool(min(workers, len(args))) as pool:
+        return pool.starmap(function, args)
+
+
+
+def load_json_parallel(file: str, workers: int) -> list:
+    """
+    Loads a top-level JSON array using several processes.
+
+
+    Args:
+        - file (str): Path to JSON file.
+        - workers (int): Number of processes.
+
+    Returns:
+        - list: Elements of the JSON array, in file order.
+    """
+    ranges = split_json_array(file, workers)
+    result = []
+    for records in _run(_load_range, [(file, start, end) for start, end in ranges], workers):
+        result.extend(records)
+    return result
+
+
+
+def read_json_parallel(file: str, workers: int, **kwargs):
+    """
+    Reads a top-level JSON array into a DataFrame using several processes.
+
+    Every range is read with pd.read_json, so column parsing (e.g. dates)
+    matches reading the whole file at once.
+
+
+    Args:
+        - file (str): Path to JSON file.
+        - workers (int): Number of processes.
+        - kwargs: Extra arguments passed to pd.read_json.
+
+    Returns:
+        - pd.DataFrame: DataFrame with the elements of the JSON array.
+    """
+    import pandas as pd
+
+    ranges = split_json_array(file, workers)
+    if not ranges:
+        return pd.read_json(io.BytesIO(b'[]'), **kwargs)
+
+    frames = _run(_read_range_frame, [(file, start, end, kwargs) for start, end in ranges], workers)
+    return pd.concat(frames, ignore_index=True)
+
+
+
+def map_json_array(file: str, func, workers: int) -> list:
+    """
+    Applies a function to the elements of every range of a JSON array file.
+
+    The function runs inside the worker processes and receives the list of
+    elements of its range, so it must be defined at module level.
+
+
+    Args:
+        - file (str): Path to JSON file.
+        - func (callable): Function applied to the list of elements of each range.
+        - workers (int): Number of processes.
+
+    Returns:
+        - list: One result of func per range, in file order.
+    """
+    ranges = split_json_array(file, workers)
+    return _run(_map_range, [(file, start, end, func) for start, end in ranges], workers)
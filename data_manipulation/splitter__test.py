@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Tests splitter functions
+"""
+import unittest
+import os
+import json
+import tempfile
+import pandas as pd
+from data_manipulation.splitter import (
+    split_json_array, read_json_range, load_json_parallel, read_json_parallel, map_json_array
+)
+
+
+def count_records(records):
+    return len(records)
+
+
+class TestSplitter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.tmp_dir.name, "data.json")
+
+        self.tricky_data = [
+            {"user_id": 1, "note": "has, comma and ] bracket"},
+            {"user_id": 2, "note": "escaped \" quote, [", "tags": [1, 2, {"x": "}"}]},
+            {"user_id": 3, "note": "backslash at end \\"},
+            {"user_id": 4, "nested": {"a": [[], {}], "b": "\\\",]"}},
+            {"user_id": 5, "login_date": "2024-11-01T08:00:00"},
+        ]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, content):
+        with open(self.file_name, "w") as f:
+            f.write(content)
+
+    def test_split_json_array_ranges_hold_whole_elements(self):
+        self.write(json.dumps(self.tricky_data))
+
+        for parts in range(1, 8):
+            for chunk_size in (7, 64, 1 << 20):
+                ranges = split_json_array(self.file_name, parts, chunk_size=chunk_size)
+                self.assertLessEqual(len(ranges), parts)
+
+                records = []
+                for start, end in ranges:
+                    records.extend(json.loads(read_json_range(self.file_name, start, end)))
+                self.assertEqual(records, self.tricky_data)
+
+    def test_split_json_array_pretty_printed(self):
+        self.write(json.dumps(self.tricky_data, indent=4))
+
+        self.assertEqual(load_json_parallel(self.file_name, 3), self.tricky_data)
+
+    def test_split_json_array_empty_array(self):
+        self.write(" [ \n ] ")
+
+        self.assertEqual(split_json_array(self.file_name, 4), [])
+
+    def test_split_json_array_single_element(self):
+        self.write('[{"user_id": 1}]')
+
+        self.assertEqual(load_json_parallel(self.file_name, 4), [{"user_id": 1}])
+
+    def test_split_json_array_not_an_array(self):
+        self.write('{"user_id": 1}')
+
+        with self.assertRaises(ValueError) as ctx:
+            split_json_array(self.file_name, 2)
+        self.assertEqual("Input is not a top-level JSON array.", str(ctx.exception))
+
+    def test_split_json_array_unterminated(self):
+        self.write('[{"user_id": 1}, {"user_id": 2}')
+
+        with self.assertRaises(ValueError):
+            split_json_array(self.file_name, 2)
+
+    def test_split_json_array_trailing_data(self):
+        self.write('[{"user_id": 1}] \n')
+        self.assertEqual(load_json_parallel(self.file_name, 2), [{"user_id": 1}])
+
+        for trailing in ('[{"user_id": 2}]', ', {"user_id": 2}]', 'x'):
+            self.write('[{"user_id": 1}]\n' + trailing)
+            with self.assertRaises(ValueError) as ctx:
+                split_json_array(self.file_name, 2)
+            self.assertEqual("Unexpected data after the top-level JSON array.", str(ctx.exception))
+
+    def test_split_json_array_not_found_input_file(self):
+        with self.assertRaises(FileNotFoundError):
+            split_json_array('', 2)
+
+    def test_read_json_parallel_matches_read_json(self):
+        self.write(json.dumps([
+            {"user_id": i % 7, "action": "login", "timestamp": f"2024-11-{i % 28 + 1:02d}T08:00:00"}
+            for i in range(200)
+        ]))
+
+        result = read_json_parallel(self.file_name, 3)
+
+        pd.testing.assert_frame_equal(result, pd.read_json(self.file_name))
+
+    def test_map_json_array(self):
+        self.write(json.dumps(self.tricky_data))
+
+        self.assertEqual(sum(map_json_array(self.file_name, count_records, 2)), len(self.tricky_data))
+
+
+if __name__ == "__main__":
+    unittest.main()
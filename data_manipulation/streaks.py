@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized detection of activity streaks (runs of consecutive periods).
+
+Task:
+    Find every streak of every user in one pass over the whole dataset,
+    instead of looping over the rows of each user.
+
+
+How it works:
+    Timestamps (int64 epoch seconds or days, see timeparse.py) are mapped to
+    periods of the chosen granularity, sorted once by (user, period), and a
+    new streak starts wherever the user changes or the gap to the previous
+    period is larger than max_gap missed periods:
+
+        user     1  1  1  1  2  2
+        period   0  1  3  4  0  1        max_gap=0
+        new      1  0  1  0  1  0   ->   streaks (1: 0-1), (1: 3-4), (2: 0-1)
+        new      1  0  0  0  1  0   ->   max_gap=1: (1: 0-4), (2: 0-1)
+
+    Granularities:
+        'h' hours, 'D' days, 'W' ISO weeks (starting on Monday).
+
+    The length of a streak is its number of active periods. With
+    distinct=False it is its number of rows instead, so several logins on
+    the same day count as in extract_longest_sequence.
+"""
+import numpy as np
+
+from data_manipulation.timeparse import NAT, format_epoch
+
+GRANULARITIES = ('h', 'D', 'W')
+
+_SECONDS_PER_HOUR = 3600
+_SECONDS_PER_DAY = 86400
+# 1970-01-01 was a Thursday, shifting by 3 days makes weeks start on Monday
+_WEEK_SHIFT = 3
+
+
+def to_periods(values: np.ndarray, granularity: str = 'D', unit: str = 's') -> np.ndarray:
+    """
+    Maps epoch values to period numbers, NAT stays NAT.
+
+
+    Args:
+        - values (np.ndarray): int64 epoch seconds (unit 's') or days (unit 'D').
+        - granularity (str): 'h', 'D' or 'W'.
+        - unit (str): Unit of values.
+
+    Returns:
+        - np.ndarray: int64 hours, days or weeks since the epoch.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}', expected one of {GRANULARITIES}.")
+    if unit == 'D' and granularity == 'h':
+        raise ValueError("Hourly streaks need timestamps in seconds.")
+
+    values = np.asarray(values, dtype=np.int64)
+    missing = values == NAT
+    if granularity == 'h':
+        periods = values // _SECONDS_PER_HOUR
+    else:
+        days = values // _SECONDS_PER_DAY if unit == 's' else values
+        periods = days if granularity == 'D' else (days + _WEEK_SHIFT) // 7
+    periods[missing] = NAT
+    return periods
+
+
+
+def format_periods(periods: np.ndarray, granularity: str = 'D') -> np.ndarray:
+    """
+    Formats period numbers: '2024-11-01' for days and weeks (their Monday), '2024-11-01 08:00:00' for hours.
+    """
+    periods = np.asarray(periods, dtype=np.int64)
+    missing = periods == NAT
+    if granularity == 'h':
+        values = np.where(missing, NAT, periods * _SECONDS_PER_HOUR)
+        return format_epoch(values, unit='s')
+    if granularity == 'W':
+        periods = np.where(missing, NAT, periods * 7 - _WEEK_SHIFT)
+    return format_epoch(periods, unit='D')
+
+
+
+def _sort(users: np.ndarray, periods: np.ndarray):
+    """
+    Sorts rows by (user, period), as a single int64 sort when the ranges allow it.
+    """
+    if not len(users):
+        return users, periods
+
+    user_min, period_min = users.min(), periods.min()
+    period_range = int(periods.max()) - int(period_min) + 1
+    if (int(users.max()) - int(user_min) + 1) * period_range < 2 ** 62:
+        keys = (users - user_min) * period_range + (periods - period_min)
+        keys.sort()
+        return keys // period_range + user_min, keys % period_range + period_min
+
+    order = np.lexsort((periods, users))
+    return users[order], periods[order]
+
+
+
+def find_streaks(users, periods, max_gap: int = 0, distinct: bool = True) -> dict:
+    """
+    Finds every streak of every user.
+
+
+    Args:
+        - users (array-like): int64 user ids, one per row.
+        - periods (array-like): int64 periods (see to_periods), NAT rows are ignored.
+        - max_gap (int): Number of missed periods allowed inside a streak.
+        - distinct (bool): Counts active periods (True) or rows (False).
+
+    Returns:
+        - dict: Arrays 'user_id', 'length', 'start' and 'end' (periods), one item per
+                streak, sorted by user and start.
+    """
+    if max_gap < 0:
+        raise ValueError("'max_gap' must be zero or positive.")
+
+    users = np.asarray(users, dtype=np.int64)
+    periods = np.asarray(periods, dtype=np.int64)
+    valid = periods != NAT
+    users, periods = _sort(users[valid], periods[valid])
+
+    same_user = users[1:] == users[:-1]
+    if distinct:
+        keep = np.ones(len(users), dtype=bool)
+        keep[1:] = ~same_user | (periods[1:] != periods[:-1])
+        users, periods = users[keep], periods[keep]
+        same_user = users[1:] == users[:-1]
+
+    new = np.ones(len(users), dtype=bool)
+    new[1:] = ~same_user | (periods[1:] - periods[:-1] > max_gap + 1)
+
+    starts = np.flatnonzero(new)
+    # No valid period (empty input, or every date missing): no streak
+    ends = np.append(starts[1:], len(users)) - 1 if len(users) else starts
+    return {
+        "user_id": users[starts],
+        "length": ends - starts + 1,
+        "start": periods[starts],
+        "end": periods[ends],
+    }
+
+
+
+def longest_streaks(streaks: dict) -> dict:
+    """
+    Keeps the longest streak of every user, the earliest one on ties.
+
+
+    Args:
+        - streaks (dict): Result of find_streaks.
+
+    Returns:
+        - dict: Same arrays as find_streaks, one item per user.
+    """
+    order = np.lexsort((streaks["start"], -streaks["length"], streaks["user_id"]))
+    users = streaks["user_id"][order]
+    first = np.ones(len(users), dtype=bool)
+    first[1:] = users[1:] != users[:-1]
+    return {name: values[order][first] for name, values in streaks.items()}
+
+
+
+def histogram(streaks: dict) -> dict:
+    """
+    Counts the streaks of every length, and the users having at least one of them.
+
+
+    Args:
+        - streaks (dict): Result of find_streaks.
+
+    Returns:
+        - dict: Arrays 'length', 'streaks' and 'users', sorted by length.
+    """
+    lengths, counts = np.unique(streaks["length"], return_counts=True)
+    pairs = np.unique(np.stack([streaks["length"], streaks["user_id"]]), axis=1)
+    _, users = np.unique(pairs[0], return_counts=True)
+    return {"length": lengths, "streaks": counts, "users": users}
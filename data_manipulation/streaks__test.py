@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Tests streaks functions
+"""
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from data_manipulation.generators import generate
+from data_manipulation.problems import load_module
+from data_manipulation.timeparse import NAT, parse_iso8601
+from data_manipulation.streaks import find_streaks, longest_streaks, histogram, to_periods, format_periods
+
+
+class TestStreaks(unittest.TestCase):
+
+    def setUp(self):
+        self.users = np.array([2, 1, 1, 1, 1, 2, 1])
+        self.days = np.array([0, 4, 0, 1, 3, 1, NAT])
+
+    def test_find_streaks(self):
+        streaks = find_streaks(self.users, self.days)
+
+        self.assertEqual(streaks["user_id"].tolist(), [1, 1, 2])
+        self.assertEqual(streaks["length"].tolist(), [2, 2, 2])
+        self.assertEqual(streaks["start"].tolist(), [0, 3, 0])
+        self.assertEqual(streaks["end"].tolist(), [1, 4, 1])
+
+    def test_find_streaks_max_gap(self):
+        streaks = find_streaks(self.users, self.days, max_gap=1)
+
+        self.assertEqual(streaks["user_id"].tolist(), [1, 2])
+        self.assertEqual(streaks["length"].tolist(), [4, 2])
+        self.assertEqual(streaks["end"].tolist(), [4, 1])
+
+    def test_find_streaks_duplicates(self):
+        users, days = [1, 1, 1], [5, 5, 6]
+
+        self.assertEqual(find_streaks(users, days)["length"].tolist(), [2])
+        self.assertEqual(find_streaks(users, days, distinct=False)["length"].tolist(), [3])
+
+    def test_find_streaks_no_dates(self):
+        for users, days in [([1, 2], [NAT, NAT]), ([], [])]:
+            streaks = find_streaks(users, days, max_gap=1)
+
+            self.assertEqual({name: values.tolist() for name, values in streaks.items()},
+                             {"user_id": [], "length": [], "start": [], "end": []})
+            self.assertEqual(format_periods(streaks["start"], 'h').tolist(), [])
+
+    def test_longest_streaks_ties(self):
+        longest = longest_streaks(find_streaks(self.users, self.days))
+
+        # Earliest streak on ties
+        self.assertEqual(longest["user_id"].tolist(), [1, 2])
+        self.assertEqual(longest["start"].tolist(), [0, 0])
+
+    def test_histogram(self):
+        counts = histogram(find_streaks([1, 1, 1, 2, 3], [0, 2, 3, 0, 0]))
+
+        self.assertEqual(counts["length"].tolist(), [1, 2])
+        self.assertEqual(counts["streaks"].tolist(), [3, 1])
+        self.assertEqual(counts["users"].tolist(), [3, 1])
+
+    def test_weeks(self):
+        # Sunday 2024-11-03, Monday 2024-11-04 and Monday 2024-11-18
+        days = parse_iso8601(["2024-11-03", "2024-11-04", "2024-11-18"], unit='D')
+        weeks = to_periods(days, 'W', unit='D')
+        streaks = find_streaks([1, 1, 1], weeks)
+
+        self.assertEqual(streaks["length"].tolist(), [2, 1])
+        self.assertEqual(format_periods(streaks["start"], 'W').tolist(), ["2024-10-28", "2024-11-18"])
+        self.assertEqual(find_streaks([1, 1, 1], weeks, max_gap=1)["length"].tolist(), [3])
+
+    def test_hours(self):
+        seconds = parse_iso8601(["2024-11-01T08:59:00", "2024-11-01T09:00:00", "2024-11-01T09:30:00", None])
+        hours = to_periods(seconds, 'h')
+        streaks = find_streaks([1, 1, 1, 1], hours)
+
+        self.assertEqual(hours[-1], NAT)
+        self.assertEqual(streaks["length"].tolist(), [2])
+        self.assertEqual(format_periods(streaks["end"], 'h').tolist(), ["2024-11-01 09:00:00"])
+        with self.assertRaises(ValueError):
+            to_periods(seconds, 'm')
+
+    def test_longest_contiguous_sequence(self):
+        # Same result as the row loop of extract_longest_sequence
+        module = load_module('longest-sequence')
+        with tempfile.TemporaryDirectory() as directory:
+            file = generate('logins', 2000, directory, seed=7)[0]
+
+            result = module.longest_contiguous_sequence(file)
+
+            df = pd.read_json(file, convert_dates=False)
+            # Missing dates sorted last
+            days = parse_iso8601(df['login_date'], unit='D')
+            df['day'] = np.where(days == NAT, np.iinfo(np.int64).max, days)
+            df = df.sort_values(by=['user_id', 'day'], kind='stable')
+            expected = pd.DataFrame([module.extract_longest_sequence(user, group.reset_index(drop=True))
+                                     for user, group in df.groupby('user_id')])
+
+        self.assertEqual(result["longest_sequence"].tolist(), expected["longest_sequence"].tolist())
+        self.assertEqual(result["start_date"].tolist(), expected["start_date"].tolist())
+
+    def test_all_streaks(self):
+        module = load_module('longest-sequence')
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'logins.json')
+            pd.DataFrame({"user_id": [1, 1, 1, 2],
+                          "login_date": ["2024-11-01", "2024-11-03", "2024-11-04", "2024-11-01"]}).to_json(file, orient='records')
+
+            variants = module.streak_variants(file, [('D', 0), ('D', 1)])
+
+        self.assertEqual(variants[('D', 0)]["streak_length"].tolist(), [1, 2, 1])
+        self.assertEqual(variants[('D', 1)]["streak_length"].tolist(), [3, 1])
+        self.assertEqual(module.streak_histogram(variants[('D', 0)])["users"].tolist(), [2, 1])
+
+    def test_every_date_null(self):
+        # Every user kept with an empty sequence, as extract_longest_sequence does
+        module = load_module('longest-sequence')
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'logins.json')
+            with open(file, 'w') as f:
+                f.write('[{"user_id": 1, "login_date": null}, {"user_id": 3}]')
+
+            result = module.longest_contiguous_sequence(file)
+            selected = module.longest_contiguous_sequence(file, user_ids=[3])
+            variants = module.streak_variants(file, [('h', 0), ('W', 1)])
+
+        self.assertEqual(result.to_dict('records'), [
+            {"user_id": 1, "longest_sequence": 0, "start_date": None, "end_date": None},
+            {"user_id": 3, "longest_sequence": 0, "start_date": None, "end_date": None},
+        ])
+        self.assertEqual(selected["user_id"].tolist(), [3])
+        self.assertTrue(all(df.empty for df in variants.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
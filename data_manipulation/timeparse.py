@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Fast ISO-8601 timestamp parsing to numeric epoch values.
+
+Dates are kept as int64 epoch days, seconds, milliseconds or nanoseconds
+through the whole pipeline and only formatted back to strings when writing
+the output:
+
+    "2024-11-01T08:00:00" -> 20028 (days)  or  1730448000 (seconds)
+
+Parsing uses the fixed ISO-8601 format (no format inference per call) and
+parses every distinct string once: the values are factorized first, so
+repeated timestamps (and categorical columns) cost a single parse.
+
+Missing or invalid values become NAT, the int64 minimum, which is also the
+value numpy uses for NaT.
+"""
+import numpy as np
+import pandas as pd
+
+NAT = np.iinfo(np.int64).min
+
+_UNITS = ('D', 's', 'ms', 'ns')
+
+# Values per second of the sub-second units
+_PER_SECOND = {'ms': 10 ** 3, 'ns': 10 ** 9}
+
+# UTC offset at the end of a timestamp: 'Z', '+02:00', '-0300'
+_OFFSET = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+
+def parse_iso8601(values, unit: str = 's', utc: bool = False) -> np.ndarray:
+    """
+    Parses ISO-8601 timestamps to int64 epoch days, seconds, milliseconds or nanoseconds.
+
+    By default the UTC offset of a timestamp is dropped, its local date and time
+    are kept (as pd.to_datetime(...).dt.date does). With utc=True timestamps are
+    converted to UTC, timestamps without offset being read as UTC.
+
+
+    Args:
+        - values (array-like): Strings, date/datetime objects, datetime64 or epoch integers.
+        - unit (str): 'D' for epoch days, 's' for epoch seconds, 'ms' and 'ns' for sub-second precision.
+        - utc (bool): Converts timestamps with an offset to UTC instead of dropping the offset.
+
+    Returns:
+        - np.ndarray: int64 array, NAT for missing or invalid values.
+    """
+    if unit not in _UNITS:
+        raise ValueError(f"Unknown unit '{unit}', expected one of {_UNITS}.")
+
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    dtype = series.dtype
+
+    if pd.api.types.is_integer_dtype(dtype):
+        # Already numeric
+        return series.to_numpy(dtype='int64', na_value=NAT)
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        if getattr(dtype, 'tz', None) is not None:
+            series = (series.dt.tz_convert('UTC') if utc else series).dt.tz_localize(None)
+        return series.to_numpy().astype(f'datetime64[{unit}]').view('int64')
+
+    # Every distinct value is parsed once
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+
+    uniques = pd.Index(uniques, dtype=object)
+    try:
+        parsed = pd.to_datetime(uniques, format='ISO8601', errors='coerce', utc=utc)
+    except ValueError:
+        # Mixed UTC offsets
+        parsed = pd.to_datetime(uniques.astype(str).str.replace(_OFFSET, '', regex=True), format='ISO8601', errors='coerce')
+    if parsed.tz is not None:
+        parsed = parsed.tz_localize(None)
+    parsed = parsed.to_numpy().astype(f'datetime64[{unit}]').view('int64')
+
+    # Missing values (code -1) are mapped to the NAT appended at the end
+    return np.append(parsed, NAT)[codes]
+
+
+
+def format_epoch(values, unit: str = 's', sep: str = ' ', digits: int = None) -> np.ndarray:
+    """
+    Formats int64 epoch values as ISO-8601 strings.
+
+    Epoch milliseconds or nanoseconds get one precision for every value, as
+    pandas prints a datetime column: no fraction when no value has one, else
+    3, 6 or 9 digits for the finest fraction ('08:01:00.000', '08:00:00.250').
+
+
+    Args:
+        - values (array-like): int64 epoch values, NAT for missing values.
+        - unit (str): 'D' for epoch days ('2024-11-01'), 's' for epoch seconds ('2024-11-01 08:00:00'),
+                      'ms' or 'ns' for epoch milliseconds or nanoseconds.
+        - sep (str): Separator between date and time.
+        - digits (int): Digits of the fractions of seconds (0, 3, 6 or 9), fraction_digits(values) when None.
+                        Given when a column is formatted in parts.
+
+    Returns:
+        - np.ndarray: Object array of strings, None for missing values.
+    """
+    if unit not in _UNITS:
+        raise ValueError(f"Unknown unit '{unit}', expected one of {_UNITS}.")
+
+    array = np.asarray(values, dtype='int64')
+    if not len(array):
+        return np.array([], dtype=object)
+    if unit in _PER_SECOND:
+        return _format_fraction(array, unit, sep, fraction_digits(array, unit) if digits is None else digits)
+    strings = np.datetime_as_string(array.view(f'datetime64[{unit}]'), unit=unit)
+    if unit == 's' and sep != 'T':
+        strings = np.char.replace(strings, 'T', sep)
+    strings = strings.astype(object)
+    strings[array == NAT] = None
+    return strings
+
+
+
+def fraction_digits(values, unit: str = 'ns') -> int:
+    """
+    Returns the digits pandas prints for the fractions of seconds of epoch milliseconds
+    or nanoseconds: 0 without fractions, else 3, 6 or 9 for the finest one.
+    """
+    array = np.asarray(values, dtype='int64')
+    nanoseconds = _nanoseconds(array[array != NAT], unit)
+    if not nanoseconds.any():
+        return 0
+    for digits in (3, 6):
+        if not (nanoseconds % 10 ** (9 - digits)).any():
+            return digits
+    return 9
+
+
+
+def _nanoseconds(array: np.ndarray, unit: str) -> np.ndarray:
+    """
+    Returns the fractions of seconds of epoch values, in nanoseconds.
+    """
+    return array % _PER_SECOND[unit] * (10 ** 9 // _PER_SECOND[unit])
+
+
+
+def _format_fraction(array: np.ndarray, unit: str, sep: str, digits: int) -> np.ndarray:
+    """
+    Formats epoch milliseconds or nanoseconds: whole seconds, then a fraction of digits digits.
+    """
+    missing = array == NAT
+    seconds = np.where(missing, NAT, np.where(missing, 0, array) // _PER_SECOND[unit])
+    strings = format_epoch(seconds, unit='s', sep=sep)
+    if not digits:
+        return strings
+
+    rows = np.flatnonzero(~missing)
+    if len(rows):
+        fractions = _nanoseconds(array[rows], unit) // 10 ** (9 - digits)
+        suffixes = np.char.zfill(fractions.astype(str), digits)
+        strings[rows] = np.char.add(np.char.add(strings[rows].astype(str), '.'), suffixes).astype(object)
+    return strings
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Tests timeparse functions
+"""
+import unittest
+import datetime
+import numpy as np
+import pandas as pd
+from data_manipulation.timeparse import NAT, fraction_digits, parse_iso8601, format_epoch
+
+
+class TestTimeparse(unittest.TestCase):
+
+    def setUp(self):
+        self.values = ["2024-11-01T08:00:00", "2024-11-02T09:30:15", None, "2024-11-01T08:00:00", "not a date"]
+
+    def test_parse_iso8601_days(self):
+        expected = [20028, 20029, NAT, 20028, NAT]
+
+        self.assertEqual(parse_iso8601(self.values, unit='D').tolist(), expected)
+        self.assertEqual(parse_iso8601(pd.Series(self.values).astype('category'), unit='D').tolist(), expected)
+
+    def test_parse_iso8601_seconds(self):
+        expected = pd.to_datetime(pd.Series(self.values), format='ISO8601', errors='coerce')
+
+        result = parse_iso8601(self.values)
+
+        self.assertEqual(result.dtype, np.int64)
+        self.assertEqual(result.tolist(), expected.to_numpy().astype('datetime64[s]').view('int64').tolist())
+
+    def test_parse_iso8601_local_date(self):
+        # Same local dates as pd.to_datetime(...).dt.date, offsets are dropped
+        values = ["2024-11-01T23:00:00+02:00", "2024-11-01T23:00:00-05:00", "2024-11-01T23:00:00Z"]
+
+        self.assertEqual(parse_iso8601(values, unit='D').tolist(), [20028] * 3)
+
+    def test_parse_iso8601_utc_fractions(self):
+        values = ["2024-11-01T08:00:00.250", "2024-11-01T08:00:00.750", "2024-11-01T08:00:00Z",
+                  "2024-11-01T08:00:00+02:00", None]
+
+        result = parse_iso8601(values, unit='ns', utc=True)
+
+        self.assertEqual(result.tolist(), [1730448000250000000, 1730448000750000000, 1730448000000000000,
+                                           1730440800000000000, NAT])
+        self.assertEqual(parse_iso8601(values, unit='ms', utc=True)[:2].tolist(), [1730448000250, 1730448000750])
+        self.assertEqual(format_epoch(result, unit='ns').tolist(),
+                         ["2024-11-01 08:00:00.250", "2024-11-01 08:00:00.750", "2024-11-01 08:00:00.000",
+                          "2024-11-01 06:00:00.000", None])
+        self.assertEqual(format_epoch([1730448000000000001], unit='ns').tolist(), ["2024-11-01 08:00:00.000000001"])
+
+    def test_format_epoch_column_precision(self):
+        # One precision for every value, as pandas prints a datetime column
+        for values in (["2024-11-01T08:01:00", "2024-11-01T08:00:00.250", None],
+                       ["2024-11-01T08:01:00", "2024-11-01T08:00:00.000001"],
+                       ["2024-11-01T08:01:00", "2024-11-01T08:00:00.000000001"],
+                       ["2024-11-01T08:01:00", "1969-12-31T23:59:59.5"],
+                       ["2024-11-01T08:01:00", "2024-11-01T08:02:00"]):
+            expected = pd.to_datetime(pd.Series(values), format='ISO8601').astype(str)
+            expected = [value if isinstance(value, str) else None for value in expected]
+
+            self.assertEqual(format_epoch(parse_iso8601(values, unit='ns'), unit='ns').tolist(), expected)
+
+        result = parse_iso8601(["2024-11-01T08:01:00", "2024-11-01T08:00:00.250"], unit='ms')
+        self.assertEqual(fraction_digits(result, unit='ms'), 3)
+        self.assertEqual(format_epoch(result, unit='ms', digits=6).tolist(),
+                         ["2024-11-01 08:01:00.000000", "2024-11-01 08:00:00.250000"])
+
+    def test_parse_iso8601_other_inputs(self):
+        self.assertEqual(parse_iso8601([datetime.date(2024, 11, 1), np.nan], unit='D').tolist(), [20028, NAT])
+        self.assertEqual(parse_iso8601(pd.array([20028, None], dtype='Int64'), unit='D').tolist(), [20028, NAT])
+        self.assertEqual(parse_iso8601(pd.to_datetime(["2024-11-01"]), unit='D').tolist(), [20028])
+        self.assertEqual(len(parse_iso8601([])), 0)
+
+    def test_format_epoch(self):
+        self.assertEqual(format_epoch(parse_iso8601(self.values)).tolist(),
+                         ["2024-11-01 08:00:00", "2024-11-02 09:30:15", None, "2024-11-01 08:00:00", None])
+        self.assertEqual(format_epoch([20028, NAT], unit='D').tolist(), ["2024-11-01", None])
+        self.assertEqual(format_epoch([]).tolist(), [])
+
+    def test_unknown_unit(self):
+        with self.assertRaises(ValueError):
+            parse_iso8601(self.values, unit='h')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming JSON writer used by the problem scripts to save their results.
+
+Rows are serialized in batches straight to a buffered file handle, so the
+whole output is never held in memory as a single string (which is what
+DataFrame.to_json and json.dump(indent=4) do).
+
+Formats:
+    - 'json': compact JSON array, one record per line.
+    - 'jsonl': JSON Lines, one record per line.
+
+Compression:
+    - None, 'gzip', 'bz2' or 'zstd' ('zstd' needs the optional 'zstandard' package).
+
+Format and compression are inferred from the file name when not given,
+e.g. 'result.jsonl.gz' is gzip compressed JSON Lines. The file is written
+to a temporary file next to the output and renamed when complete, so a
+failed write never leaves a truncated output behind.
+"""
+import json
+import logging
+import os
+import tempfile
+
+from data_manipulation.compression import infer_format, open_output
+
+_BUFFER_SIZE = 1024 * 1024
+_BATCH_SIZE = 10000
+
+
+
+def _read_umask() -> int:
+    """
+    Returns the umask of the process without changing it, from /proc/self/status (Linux).
+    Elsewhere it can only be read by setting it: it is set to 077 and restored, so
+    files created meanwhile (by other threads) are private rather than world writable.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0o077)
+    os.umask(umask)
+    return umask
+
+
+# Temporary files are created with mode 0600, the output gets the usual mode.
+# Read once, when the module is imported (before the service or pipeline threads start)
+_UMASK = _read_umask()
+
+
+def json_default(value):
+    """
+    Converts the values json can not serialize: numpy scalars and arrays, then anything else as a string.
+    """
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+
+def _frame_batches(df, batch_size: int, kwargs: dict):
+    """
+    Yields batches of rows of a DataFrame as JSON Lines strings.
+    """
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size].to_json(orient='records', lines=True, **kwargs)
+        yield batch.rstrip('\n')
+
+
+def _record_batches(records, batch_size: int, kwargs: dict):
+    """
+    Yields batches of records (or of the rows of DataFrames) as JSON Lines strings.
+    """
+    batch = []
+    for record in records:
+        if hasattr(record, 'iloc'):
+            # DataFrame of a stream of DataFrames (e.g. read or deduplicated in chunks)
+            if batch:
+                yield '\n'.join(batch)
+                batch = []
+            yield from _frame_batches(record, batch_size, kwargs)
+            continue
+        batch.append(json.dumps(record, separators=(',', ':'), default=json_default))
+        if len(batch) >= batch_size:
+            yield '\n'.join(batch)
+            batch = []
+    if batch:
+        yield '\n'.join(batch)
+
+
+
+def write_records(data, file: str, format: str = None, compression: str = None,
+                  batch_size: int = _BATCH_SIZE, **kwargs) -> int:
+    """
+    Writes a DataFrame or an iterable of records as JSON, in batches.
+
+
+    Args:
+        - data (pd.DataFrame | Iterable[dict] | Iterable[pd.DataFrame]): Rows to write.
+        - file (str): Path to output file.
+        - format (str): 'json' or 'jsonl'. Inferred from the file name when None.
+        - compression (str): None, 'gzip', 'bz2' or 'zstd'. Inferred from the file name when None.
+        - batch_size (int): Number of rows serialized at once.
+        - kwargs: Extra arguments passed to DataFrame.to_json (e.g. date_format).
+
+    Returns:
+        - int: Number of records written.
+    """
+    inferred_format, inferred_compression = infer_format(file)
+    format = format or inferred_format
+    compression = compression or inferred_compression
+    if format not in ('json', 'jsonl'):
+        raise ValueError(f"Unknown format '{format}'.")
+
+    if hasattr(data, 'iloc'):
+        batches = _frame_batches(data, batch_size, kwargs)
+    else:
+        batches = _record_batches(data, batch_size, kwargs)
+
+    directory = os.path.dirname(os.path.abspath(file))
+    fd, tmp_file = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(file) + '.', suffix='.tmp')
+    count = 0
+    try:
+        with open(fd, 'wb', buffering=_BUFFER_SIZE) as raw:
+            out = open_output(raw, compression)
+            try:
+                separator = b'\n' if format == 'jsonl' else b',\n'
+                if format == 'json':
+                    out.write(b'[\n')
+                for batch in batches:
+                    if not batch:
+                        continue
+                    if count:
+                        out.write(separator)
+                    if format == 'json':
+                        batch = batch.replace('\n', ',\n')
+                    out.write(batch.encode('utf-8'))
+                    count += batch.count('\n') + 1
+                if format == 'json':
+                    out.write(b'\n]\n' if count else b']\n')
+                elif count:
+                    out.write(b'\n')
+            finally:
+                if out is not raw:
+                    out.close()
+        os.chmod(tmp_file, 0o666 & ~_UMASK)
+        os.replace(tmp_file, file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+    logging.debug(f"{count} records written to '{file}'")
+    return count
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Tests writer functions
+"""
+import unittest
+import os
+import gzip
+import json
+import tempfile
+import pandas as pd
+from data_manipulation.writer import _read_umask, write_records, infer_format
+
+
+class TestWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.records = [
+            {"user_id": 1, "action": "login", "timestamp": "2024-11-01 08:00:00"},
+            {"user_id": 2, "action": "click\nnew line", "timestamp": "2024-11-01 08:05:00"},
+            {"user_id": 3, "action": "login", "timestamp": "2024-11-01 08:10:00"},
+        ]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_infer_format(self):
+        self.assertEqual(infer_format('out.json'), ('json', None))
+        self.assertEqual(infer_format('out.jsonl'), ('jsonl', None))
+        self.assertEqual(infer_format('out.json.gz'), ('json', 'gzip'))
+        self.assertEqual(infer_format('out.jsonl.zst'), ('jsonl', 'zstd'))
+
+    def test_write_records_dataframe_json(self):
+        df = pd.DataFrame(self.records)
+
+        for batch_size in (1, 2, 10):
+            count = write_records(df, self.path('out.json'), batch_size=batch_size)
+
+            self.assertEqual(count, 3)
+            pd.testing.assert_frame_equal(pd.read_json(self.path('out.json'), convert_dates=False), df)
+
+    def test_write_records_list_jsonl(self):
+        write_records(self.records, self.path('out.jsonl'), batch_size=2)
+
+        with open(self.path('out.jsonl')) as f:
+            self.assertEqual([json.loads(line) for line in f], self.records)
+
+    def test_write_records_frames(self):
+        df = pd.DataFrame(self.records)
+
+        count = write_records(iter([df.iloc[:2], df.iloc[2:2], self.records[2]]), self.path('out.json'), batch_size=1)
+
+        self.assertEqual(count, 3)
+        with open(self.path('out.json')) as f:
+            self.assertEqual(json.load(f), self.records)
+
+    def test_write_records_gzip(self):
+        write_records(iter(self.records), self.path('out.json.gz'))
+
+        with gzip.open(self.path('out.json.gz'), 'rt') as f:
+            self.assertEqual(json.load(f), self.records)
+
+    def test_write_records_empty(self):
+        write_records(pd.DataFrame(), self.path('out.json'))
+        write_records([], self.path('out.jsonl'))
+
+        with open(self.path('out.json')) as f:
+            self.assertEqual(json.load(f), [])
+        self.assertEqual(os.path.getsize(self.path('out.jsonl')), 0)
+
+    def test_write_records_failure_keeps_previous_file(self):
+        write_records(self.records, self.path('out.json'))
+
+        def failing():
+            yield self.records[0]
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            write_records(failing(), self.path('out.json'), batch_size=1)
+
+        with open(self.path('out.json')) as f:
+            self.assertEqual(json.load(f), self.records)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['out.json'])
+
+    def test_output_mode(self):
+        # The umask is read without being changed
+        umask = os.umask(0o027)
+        try:
+            self.assertEqual(_read_umask(), 0o027)
+            self.assertEqual(os.umask(0o027), 0o027)
+        finally:
+            os.umask(umask)
+
+        write_records(self.records, self.path('out.json'))
+        self.assertEqual(os.stat(self.path('out.json')).st_mode & 0o777, 0o666 & ~umask)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,20 +24,25 @@ Created on Mon Dec  2 11:04:30 2024
 @author: enokj
 """
 import os
+import sys
 import logging
-import pandas as pd
 import json
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manipulation.instrumentation import stage
+from data_manipulation.executor import map_reduce
+
 logging.basicConfig(level=logging.INFO)
 
 
-def unique_keys(file: str) -> list:
+def unique_keys(file: str, workers: int = None) -> list:
     """
     Extracts unique keys from a JSON file.
     
     
     Args:
-        - file (str): Path to JSON file.
+        - file (str): Path to JSON file, optionally gzip, bz2 or zstd compressed.
+        - workers (int): Number of processes used to parse the file. None reads it serially.
     
     Returns:
         - list: List of unique keys extracted from JSON file
@@ -48,18 +53,10 @@ def unique_keys(file: str) -> list:
     
 
     try:
-        with open(file) as f:
-            data = json.load(f)
-            df = pd.json_normalize(data)
-        
-        logging.debug(f"Flattened DataFrame columns: {df.columns.tolist()}")
-
-        result = set()
-        for col in df.columns:
-            keys = col.split('.')
-            result.update(keys)
-        
-        result = sorted(result)
+        with stage('unique_keys'):
+            with stage('keys'):
+                # Keys of every partition of the file, merged and sorted
+                result = map_reduce(file, record_keys, combine_keys, sorted, workers)
         logging.debug(f"Extracted unique keys: {result}")
         return result
 
@@ -75,6 +72,73 @@ def unique_keys(file: str) -> list:
 
 
 
+def record_keys(data: list) -> set:
+    """
+    Returns the keys of the flattened records, split on dots.
+    
+    Same keys as splitting the columns of pd.json_normalize(data) (see
+    flattened_columns), without building the DataFrame: keys of empty
+    nested objects are not columns, lists are values, and a single object
+    is one record.
+    
+    
+    Args:
+        - data (list or dict): List of records loaded from a JSON file, or a single record.
+    
+    Returns:
+        - set: Keys found, e.g. 'activity', 'details' and 'button' for 'activity.details.button'.
+    """
+    if isinstance(data, dict):
+        data = [data]
+
+    keys = set()
+    for record in data:
+        if isinstance(record, dict):
+            _add_leaf_keys(record, keys)
+        elif record is not None:
+            raise TypeError(f"All items in data must be of type dict, found {type(record).__name__}")
+    # Split once per distinct key instead of once per record
+    return {part for key in keys for part in key.split('.')}
+
+
+
+def _add_leaf_keys(record: dict, keys: set) -> bool:
+    """
+    Adds the keys of the paths leading to values, returns False when there is none.
+    """
+    found = False
+    for key, value in record.items():
+        if isinstance(value, dict) and not _add_leaf_keys(value, keys):
+            continue
+        keys.add(key)
+        found = True
+    return found
+
+
+
+def combine_keys(keys: set, other: set) -> set:
+    keys |= other
+    return keys
+
+
+
+def flattened_columns(data: list) -> list:
+    """
+    Returns the column names of the flattened records.
+    
+    
+    Args:
+        - data (list): List of records loaded from a JSON file.
+    
+    Returns:
+        - list: Column names created by pd.json_normalize, e.g. 'activity.details.button'.
+    """
+    import pandas as pd
+
+    return pd.json_normalize(data).columns.tolist()
+
+
+
 # Example usage
 if __name__ == "__main__":
     input_file = 'file.json'
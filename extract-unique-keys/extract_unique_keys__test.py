@@ -69,6 +69,14 @@ class TestExtractUniqueKeys(unittest.TestCase):
 
         self.assertEqual(result, expected_output)
 
+    def test_extract_unique_keys_single_object(self):
+        # A top-level object is one record, as for pd.json_normalize
+        with open(self.file_name, "w") as f:
+            json.dump(self.valid_input_data[0], f)
+
+        self.assertEqual(unique_keys(self.file_name), ["activity", "time", "type", "user_id"])
+        self.assertEqual(unique_keys(self.file_name, workers=2), ["activity", "time", "type", "user_id"])
+
     def test_extract_unique_keys_empty_data(self):
         with open(self.file_name, "w") as f:
             json.dump(self.empty_input_data, f)
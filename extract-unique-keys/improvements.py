@@ -14,8 +14,6 @@ For extremely large files, avoid loading the entire file into memory. Instead, p
 Using ijson for Streaming:
 ijson parses JSON incrementally, allowing you to process each JSON object one at a time.
 """
-import ijson
-
 def extract_unique_keys_large_json(file: str) -> list:
     """
     Extract unique keys from a very large JSON file using incremental parsing.
@@ -26,6 +24,9 @@ def extract_unique_keys_large_json(file: str) -> list:
     Returns:
         list: List of unique keys in the JSON file.
     """
+    # Imported here so the module can be imported without ijson installed
+    import ijson
+
     unique_keys = set()
 
     with open(file, 'r') as f:
@@ -95,8 +96,6 @@ If the file is too large for Python alone, leverage Big Data frameworks like Apa
 Using Apache Spark (PySpark):
 Apache Spark is optimized for handling large datasets across clusters.
 """
-from pyspark.sql import SparkSession
-
 def extract_unique_keys_spark(file: str) -> list:
     """
     Extract unique keys from a JSON file using Apache Spark.
@@ -107,6 +106,9 @@ def extract_unique_keys_spark(file: str) -> list:
     Returns:
         list: List of unique keys in the file.
     """
+    # Imported here: starting pyspark is slow and it is only needed for this approach
+    from pyspark.sql import SparkSession
+
     spark = SparkSession.builder \
         .appName("Extract Unique Keys") \
         .getOrCreate()
@@ -166,12 +168,74 @@ def extract_unique_keys_parallel(file: str, chunk_size: int = 10000) -> list:
 
 
 
+"""
+5. Use Memory-Mapped Splitting
+When the file is a single huge JSON array (not JSON Lines), json.load in the parent process becomes the bottleneck of the chunked approach above.
+The file can be memory-mapped and split into byte ranges of whole elements by tracking string and bracket state, so every worker parses only its own part of the file.
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manipulation.splitter import map_json_array
+
+def extract_unique_keys_mmap(file: str, workers: int = os.cpu_count()) -> list:
+    """
+    Extract unique keys from a large JSON array using memory-mapped splitting.
+
+    Args:
+        file (str): Path to the JSON file.
+        workers (int): Number of processes.
+
+    Returns:
+        list: List of unique keys in the file.
+    """
+    unique_keys = set()
+
+    for result in map_json_array(file, process_chunk, workers):
+        unique_keys.update(result)
+
+    return sorted(set(key.split('.')[0] for key in unique_keys))
+
+
+
+"""
+6. Use a Local Map / Combine / Reduce Executor
+On a single machine, a Spark session costs seconds of JVM start-up to read df.schema.names.
+data_manipulation.executor splits JSON arrays, JSON Lines and compressed files into partitions, maps every partition in a worker process and combines the partial results, using only the standard library.
+"""
+from data_manipulation.executor import map_reduce
+
+def _top_level_keys(chunk):
+    return {key for record in chunk if isinstance(record, dict) for key in record}
+
+def _union(keys, other):
+    keys |= other
+    return keys
+
+def extract_unique_keys_local(files, workers: int = os.cpu_count()) -> list:
+    """
+    Extract unique top-level keys from JSON files, as extract_unique_keys_spark, without Spark.
+
+    Args:
+        files (str or list): Path or paths to JSON array or JSON Lines files, optionally compressed.
+        workers (int): Number of processes.
+
+    Returns:
+        list: List of unique keys in the files.
+    """
+    return map_reduce(files, _top_level_keys, _union, sorted, workers)
+
+
+
 
 """
 Recommendations
 - For Large Files in a Single Machine: Use ijson or JSON Lines.
-- For Distributed Processing: Use Apache Spark or Dask.
+- For Parallel Processing on a Single Machine: Use the local executor (data_manipulation.executor) instead of Spark.
+- For Distributed Processing across a cluster: Use Apache Spark or Dask.
 - For Parallel Processing: Use Python’s multiprocessing with chunked processing.
+- For a Single Huge JSON Array: Use memory-mapped splitting so every worker parses its own byte range.
 
 
 Considerations
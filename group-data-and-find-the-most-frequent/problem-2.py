@@ -1,35 +1,58 @@
 # %% Group Data and Find the Most Frequent
-import pandas as pd
+from __future__ import annotations
+
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manipulation.executor import map_reduce
+from data_manipulation.instrumentation import stage
+from data_manipulation.loader import read_json_frame
+from data_manipulation.writer import write_records
 
-def group_data_and_find_most_frequent(file: str) -> pd.DataFrame:
+def group_data_and_find_most_frequent(file: str, workers: int = None, user_ids: list = None) -> pd.DataFrame:
     """
     Reads a JSON file, groups data by user_id and item,
     and finds the most purchased item for each user.
     
+    With several workers (and every user), the quantities are summed by the
+    map / combine / reduce executor: the workers only send back their totals.
+    
     Args:
-        file (str): Path to the input JSON file.
+        file (str): Path to the input JSON file, optionally gzip, bz2 or zstd compressed.
+        workers (int): Number of processes used to parse the file. None reads it serially.
+        user_ids (list): Only these users, read through the per-user index of the file. None for every user.
     
     Returns:
         pd.DataFrame: DataFrame with user_id and most_purchased_item.
     """
+    # pandas is imported on use: importing the script stays fast
+    import pandas as pd
+    from data_manipulation.dtypes import optimize_dtypes
+
     try:
         if not os.path.exists(file):
             raise FileNotFoundError(f"File not found: {file}")
         
-        # Load data
-        df = pd.read_json(file)
+        with stage('group_data_and_find_most_frequent'):
+            if workers and workers > 1 and user_ids is None:
+                with stage('map_reduce'):
+                    return map_reduce(file, purchase_totals, combine_totals, most_purchased_items, workers)
 
-        # Summing quantities
-        grouped_df = df.groupby(by=['user_id', 'item'], as_index=False)['quantity'].sum()
-        
-        # Find the most purchased item for each user
-        # Group again by user_id and determine max for each group
-        most_purchased = grouped_df.loc[
-            grouped_df.groupby('user_id')['quantity'].idxmax()
-        ]
-        
-        result = most_purchased[['user_id', 'item']].rename(columns={'item': 'most_purchased_item'})
+            # Load data
+            with stage('load') as s:
+                # Dates are not used: read as the other scripts, so a cached read is shared
+                df = read_json_frame(file, workers=workers, user_ids=user_ids, convert_dates=False)
+                s.add_rows(len(df))
+
+            if df.empty:
+                return pd.DataFrame(columns=['user_id', 'most_purchased_item'])
+
+            with stage('optimize', rows=len(df)):
+                df = optimize_dtypes(df)
+
+            with stage('groupby', rows=len(df)):
+                result = most_purchased(df)
         
         return result
 
@@ -41,21 +64,94 @@ def group_data_and_find_most_frequent(file: str) -> pd.DataFrame:
         print(f"Unknown error: {e}")
 
 
+def purchase_totals(records: list) -> dict:
+    """
+    Sums the quantities of every (user_id, item) pair.
+    
+    Pairs with a missing user or item are kept: the final groupby drops them,
+    and they give the columns the same dtypes as in the serial path.
+    
+    Args:
+        records (list): Purchases of a part of the file.
+    
+    Returns:
+        dict: (user_id, item) -> total quantity.
+    """
+    totals = {}
+    for record in records:
+        pair = (record.get('user_id'), record.get('item'))
+        totals[pair] = totals.get(pair, 0) + (record.get('quantity') or 0)
+    return totals
+
+
+def combine_totals(totals: dict, other: dict) -> dict:
+    for pair, quantity in other.items():
+        totals[pair] = totals.get(pair, 0) + quantity
+    return totals
+
+
+def most_purchased(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Finds the most purchased item of every user in a DataFrame of purchases.
+    Ties go to the first item of the grouped DataFrame.
+    
+    Args:
+        df (pd.DataFrame): DataFrame with user_id, item and quantity, as returned by optimize_dtypes.
+    
+    Returns:
+        pd.DataFrame: DataFrame with user_id and most_purchased_item.
+    """
+    from data_manipulation.dtypes import restore_dtypes
+
+    # Summing quantities (observed=True: only existing pairs of a categorical item)
+    grouped_df = df.groupby(by=['user_id', 'item'], as_index=False, observed=True)['quantity'].sum()
+    
+    # Find the most purchased item for each user
+    # Group again by user_id and determine max for each group
+    most_purchased = grouped_df.loc[
+        grouped_df.groupby('user_id', observed=True)['quantity'].idxmax()
+    ]
+    
+    result = most_purchased[['user_id', 'item']].rename(columns={'item': 'most_purchased_item'})
+    return restore_dtypes(result)
+
+
+def most_purchased_items(totals: dict) -> pd.DataFrame:
+    """
+    Returns the most purchased item of every user from the combined totals,
+    reduced as the serial path so both return the same DataFrame.
+    """
+    import pandas as pd
+    from data_manipulation.dtypes import optimize_dtypes
+
+    if not totals:
+        return pd.DataFrame(columns=['user_id', 'most_purchased_item'])
+
+    df = pd.DataFrame([(user, item, quantity) for (user, item), quantity in totals.items()],
+                      columns=['user_id', 'item', 'quantity'])
+    return most_purchased(optimize_dtypes(df))
+
+
 def save_to_file(result: pd.DataFrame, output: str) -> None:
     """
     Saves a DataFrame to a JSON file.
     
+    Rows are written in batches as compact JSON. Files ending with '.jsonl'
+    are written as JSON Lines, and '.gz' / '.zst' files are compressed.
+    
     Args:
         result (pd.DataFrame): DataFrame to save.
         output (str): Path to the output JSON file.
     """
     try:
-        result.to_json(output, orient='records', indent=4)
+        with stage('save_to_file', rows=len(result)):
+            write_records(result, output)
         print(f"Result saved to {output}")
     except Exception as e:
         print(f"Error saving to file: {e}")
 
 # Example usage
-output = group_data_and_find_most_frequent('file.json')
-if output is not None:
-    save_to_file(output, 'problem-2_result.json')
+if __name__ == "__main__":
+    output = group_data_and_find_most_frequent('file.json')
+    if output is not None:
+        save_to_file(output, 'problem-2_result.json')
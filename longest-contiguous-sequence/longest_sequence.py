@@ -38,59 +38,178 @@ Expected Output:
 ]
 
 
+Streaks:
+    all_streaks returns every streak of every user (not only the longest), in
+    hours, days or weeks and allowing some missed periods, streak_histogram
+    counts them by length. streak_variants computes several variants from one
+    read of the file. See data_manipulation/streaks.py.
+
+
 Created on Sat Nov 30 18:15:08 2024
 
 @author: enokj
 """
-import pandas as pd
+from __future__ import annotations
+
 import os
 import logging
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manipulation.instrumentation import stage
+from data_manipulation.loader import read_json_frame
+from data_manipulation.writer import write_records
 
 logging.basicConfig(level=logging.INFO)
 
 
 
-def longest_contiguous_sequence(file: str) -> pd.DataFrame:
+def longest_contiguous_sequence(file: str, workers: int = None, user_ids: list = None) -> pd.DataFrame:
     """
     Returns the longest login date interval for every user.
     
 
     Args:
-        - file (str): Path to JSON file.
+        - file (str): Path to JSON file, optionally gzip, bz2 or zstd compressed.
+        - workers (int): Number of processes used to parse the file. None reads it serially.
+        - user_ids (list): Only these users, read through the per-user index of the file. None for every user.
     
     Returns:
         - pd.DataFrame: DataFrame with longest date interval of each user.
     """
+    # numpy and pandas are imported on use: importing the script stays fast
+    import numpy as np
+    import pandas as pd
+    from data_manipulation.dtypes import restore_dtypes
+    from data_manipulation.streaks import find_streaks, longest_streaks, to_periods
+    from data_manipulation.timeparse import NAT, format_epoch
+
     try:
         if not os.path.exists(file):
             raise FileNotFoundError(f"File '{file}' not found.")
         
-        # Load and preprocess data
-        df = pd.read_json(file)
-        
-        if df.empty:
-            return pd.DataFrame(columns=["user_id", "longest_sequence", "start_date", "end_date"])
-        
-        if 'user_id' not in df.columns:
-            raise ValueError("Input file is missing the 'user_id' column.")
+        with stage('longest_contiguous_sequence'):
+            # Load and preprocess data
+            with stage('load') as s:
+                df = read_json_frame(file, workers=workers, user_ids=user_ids, convert_dates=False)
+                s.add_rows(len(df))
+            
+            if df.empty:
+                return pd.DataFrame(columns=["user_id", "longest_sequence", "start_date", "end_date"])
+            
+            if 'user_id' not in df.columns:
+                raise ValueError("Input file is missing the 'user_id' column.")
+
+            with stage('normalize', rows=len(df)):
+                users, codes, seconds = _user_logins(df)
+                days = to_periods(seconds, 'D')
+
+            with stage('streaks', rows=len(df)):
+                # Same counting as extract_longest_sequence: every login of a streak counts
+                longest = longest_streaks(find_streaks(codes, days, distinct=False))
+
+                # Users without any login date get an empty sequence
+                lengths = np.zeros(len(users), dtype=np.int64)
+                starts = np.full(len(users), NAT, dtype=np.int64)
+                ends = starts.copy()
+                lengths[longest["user_id"]] = longest["length"]
+                starts[longest["user_id"]] = longest["start"]
+                ends[longest["user_id"]] = longest["end"]
+
+                results = pd.DataFrame({
+                    "user_id": users,
+                    "longest_sequence": lengths,
+                    "start_date": format_epoch(starts, unit='D'),
+                    "end_date": format_epoch(ends, unit='D'),
+                })
+
+            logging.info(f"Process done for file '{file}'")
+            return restore_dtypes(results)
 
-        # Tranforming string to date
-        df['login_date'] = pd.to_datetime(df['login_date'], errors='coerce').dt.date
+    except FileNotFoundError as e:
+        logging.error(f"File not found error -> {e}")
+    except ValueError as e:
+        logging.error(f"Processing data error -> {e}")
+    except Exception as e:
+        logging.error(f"Not mapped error -> {e}")
 
-        # Sorting data
-        df = df.sort_values(by=['user_id', 'login_date'])
-        
-        # Grouping by user
-        grouped = df.groupby(by='user_id')
-        
-        # Finds the longest users login date sequence per user
-        results = []
-        for user, group in grouped:
-            group = group.reset_index(drop=True)
-            results.append(extract_longest_sequence(user, group))
 
-        logging.info(f"Process done for file '{file}'")
-        return pd.DataFrame(results)
+
+def _user_logins(df: pd.DataFrame) -> tuple:
+    """
+    Returns the distinct users (sorted), the user code of every row and the
+    login time of every row in epoch seconds (NAT when missing). Rows without user are dropped.
+    """
+    import numpy as np
+    import pandas as pd
+    from data_manipulation.dtypes import optimize_dtypes
+    from data_manipulation.timeparse import NAT, parse_iso8601
+
+    if df.empty:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+
+    df = optimize_dtypes(df, exclude=['login_date'])
+    codes, users = pd.factorize(df['user_id'], sort=True)
+    seconds = parse_iso8601(df['login_date'], unit='s') if 'login_date' in df.columns \
+        else np.full(len(df), NAT, dtype=np.int64)
+
+    has_user = codes >= 0
+    return users.to_numpy(), codes[has_user], seconds[has_user]
+
+
+
+def streak_variants(file: str, variants: list, workers: int = None, user_ids: list = None) -> dict:
+    """
+    Returns every login streak of every user, for several granularities and allowed gaps.
+
+    The file is read and the dates parsed once for all the variants.
+    
+
+    Args:
+        - file (str): Path to JSON file, optionally gzip, bz2 or zstd compressed.
+        - variants (list): (granularity, max_gap) pairs. Granularity is 'h', 'D' or 'W',
+                           max_gap the number of missed periods allowed inside a streak.
+        - workers (int): Number of processes used to parse the file. None reads it serially.
+        - user_ids (list): Only these users, read through the per-user index of the file. None for every user.
+    
+    Returns:
+        - dict: (granularity, max_gap) -> DataFrame with one streak per row
+                (user_id, streak_length, start_date, end_date), streak_length being
+                the number of active periods.
+    """
+    import pandas as pd
+    from data_manipulation.dtypes import restore_dtypes
+    from data_manipulation.streaks import find_streaks, format_periods, to_periods
+
+    try:
+        if not os.path.exists(file):
+            raise FileNotFoundError(f"File '{file}' not found.")
+
+        with stage('streak_variants'):
+            with stage('load') as s:
+                df = read_json_frame(file, workers=workers, user_ids=user_ids, convert_dates=False)
+                s.add_rows(len(df))
+
+            if not df.empty and 'user_id' not in df.columns:
+                raise ValueError("Input file is missing the 'user_id' column.")
+
+            with stage('normalize', rows=len(df)):
+                users, codes, seconds = _user_logins(df)
+
+            results = {}
+            for granularity, max_gap in variants:
+                with stage(f'streaks_{granularity}_{max_gap}', rows=len(codes)):
+                    streaks = find_streaks(codes, to_periods(seconds, granularity), max_gap=max_gap)
+                    results[(granularity, max_gap)] = restore_dtypes(pd.DataFrame({
+                        "user_id": users[streaks["user_id"]],
+                        "streak_length": streaks["length"],
+                        "start_date": format_periods(streaks["start"], granularity),
+                        "end_date": format_periods(streaks["end"], granularity),
+                    }))
+
+            logging.info(f"Process done for file '{file}'")
+            return results
 
     except FileNotFoundError as e:
         logging.error(f"File not found error -> {e}")
@@ -101,20 +220,72 @@ def longest_contiguous_sequence(file: str) -> pd.DataFrame:
 
 
 
+def all_streaks(file: str, granularity: str = 'D', max_gap: int = 0, workers: int = None, user_ids: list = None) -> pd.DataFrame:
+    """
+    Returns every login streak of every user.
+    
+
+    Args:
+        - file (str): Path to JSON file, optionally gzip, bz2 or zstd compressed.
+        - granularity (str): 'h' (hours), 'D' (days) or 'W' (weeks starting on Monday).
+        - max_gap (int): Number of missed periods allowed inside a streak.
+        - workers (int): Number of processes used to parse the file. None reads it serially.
+        - user_ids (list): Only these users, read through the per-user index of the file. None for every user.
+    
+    Returns:
+        - pd.DataFrame: DataFrame with one streak per row (user_id, streak_length, start_date, end_date).
+    """
+    results = streak_variants(file, [(granularity, max_gap)], workers=workers, user_ids=user_ids)
+    if results is not None:
+        return results[(granularity, max_gap)]
+
+
+
+def streak_histogram(streaks: pd.DataFrame) -> pd.DataFrame:
+    """
+    Counts the streaks of every length across users.
+    
+
+    Args:
+        - streaks (pd.DataFrame): Streaks returned by all_streaks or streak_variants.
+    
+    Returns:
+        - pd.DataFrame: DataFrame with streak_length, streaks (number of streaks) and
+                        users (number of users with at least one such streak).
+    """
+    import numpy as np
+    import pandas as pd
+    from data_manipulation.streaks import histogram
+
+    counts = histogram({
+        "user_id": pd.factorize(streaks["user_id"])[0],
+        "length": streaks["streak_length"].to_numpy(dtype=np.int64),
+    })
+    return pd.DataFrame({"streak_length": counts["length"], "streaks": counts["streaks"], "users": counts["users"]})
+
+
+
 def extract_longest_sequence(user: int, group: pd.DataFrame) -> dict:
     """
     Finds the longest contiguous sequence of dates for a user.
+
+    Reference implementation of the streaks computed by longest_contiguous_sequence.
     
 
     Args:
         - user (int): User ID.
-        - group (pd.DataFrame): DataFrame containing login dates for the user.
+        - group (pd.DataFrame): DataFrame containing login dates for the user
+                                (epoch days, dates or ISO-8601 strings), sorted.
     
     Returns:
         - dict: User's longest login date sequence with start and end dates.
     """
+    from data_manipulation.timeparse import NAT, format_epoch, parse_iso8601
+
     try:
-        if group.empty or pd.isna(group.iloc[0]['login_date']):
+        days = parse_iso8601(group['login_date'], unit='D').tolist() if not group.empty else []
+
+        if not days or days[0] == NAT:
             return {
                 "user_id": user,
                 "longest_sequence": 0,
@@ -123,13 +294,13 @@ def extract_longest_sequence(user: int, group: pd.DataFrame) -> dict:
             }
 
         max_sequence = current_sequence = 1
-        max_sequence_start_date = current_start_date = max_sequence_end_date = group.iloc[0]['login_date']
+        max_sequence_start_date = current_start_date = max_sequence_end_date = days[0]
         
-        for i in range(1, len(group)):
-            current_login_date = group.iloc[i]['login_date']
-            previous_login_date = group.iloc[i - 1]['login_date']
+        for i in range(1, len(days)):
+            current_login_date = days[i]
+            previous_login_date = days[i - 1]
 
-            if pd.isna(current_login_date) or pd.isna(previous_login_date) or (current_login_date - previous_login_date).days > 1:
+            if current_login_date == NAT or previous_login_date == NAT or current_login_date - previous_login_date > 1:
                 current_sequence = 1
                 current_start_date = current_login_date
             else:
@@ -140,11 +311,12 @@ def extract_longest_sequence(user: int, group: pd.DataFrame) -> dict:
                     max_sequence_end_date = current_login_date
 
         logging.info(f"Longest sequence for user '{user}' calculated")
+        start_date, end_date = format_epoch([max_sequence_start_date, max_sequence_end_date], unit='D')
         return {
             "user_id": user,
             "longest_sequence": max_sequence,
-            "start_date": str(max_sequence_start_date) if max_sequence_start_date else None,
-            "end_date": str(max_sequence_end_date) if max_sequence_end_date else None,
+            "start_date": start_date,
+            "end_date": end_date,
         }
 
     except Exception as e:
@@ -155,6 +327,9 @@ def extract_longest_sequence(user: int, group: pd.DataFrame) -> dict:
 def save_to_json(df: pd.DataFrame, file: str) -> None:
     """
     Saves a DataFrame as JSON file.
+
+    Rows are written in batches as compact JSON. Files ending with '.jsonl'
+    are written as JSON Lines, and '.gz' / '.zst' files are compressed.
     
 
     Args:
@@ -165,7 +340,8 @@ def save_to_json(df: pd.DataFrame, file: str) -> None:
         if os.path.exists(file):
             logging.warning(f"File '{file}' alread exists. Overwriting...")
         
-        df.to_json(file, orient='records', indent=4)
+        with stage('save_to_json', rows=len(df)):
+            write_records(df, file)
         
         logging.info(f"File '{file}' saved")
 
@@ -191,4 +367,6 @@ if __name__ == "__main__":
     logging.info("\n\nLoading saved JSON file")
     logging.info("-----------------------------------------------------")
     if os.path.exists(output_file):
+        import pandas as pd
+
         print(pd.read_json(output_file))
\ No newline at end of file
@@ -1,29 +1,83 @@
 """
     Merging two files, removing duplications and filtering action = login
+
+    With external=True the rows are deduplicated on disk (data_manipulation.spill):
+    the files are read in chunks, spilled into partitions by timestamp and every
+    partition is deduplicated alone, so the inputs do not have to fit in memory.
+    The output holds the same records, in the same order with stable=True.
+
+    Timestamps are written in UTC. When some have a fraction of second, every
+    timestamp gets one with the precision of the finest (3, 6 or 9 digits), as
+    pandas prints a datetime column.
 """
-import pandas as pd
+from __future__ import annotations
+
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manipulation.instrumentation import stage
+from data_manipulation.loader import iter_json_frames, read_json_frame
+from data_manipulation.writer import write_records
+
+def merge_json_files(file1: str, file2: str, output: str, workers: int = None, external: bool = False,
+                     partitions: int = None, spill_dir: str = None, stable: bool = False) -> None:
+    # pandas (through these modules) is imported on use: importing the script stays fast
+    from data_manipulation.dtypes import concat_frames
+    from data_manipulation.spill import drop_duplicates_external, partitions_for
+    from data_manipulation.timeparse import fraction_digits
 
-def merge_json_files(file1: str, file2: str, output: str) -> None:
     try:
         if not os.path.exists(file1) or not os.path.exists(file2):
             raise FileNotFoundError(f"One or both files not found: '{file1}' or '{file2}'")
         
-        # Loading files
-        df1 = pd.read_json(file1)
-        df2 = pd.read_json(file2)
-        
-        # Merging dfs and removing duplicates
-        df = pd.concat([df1, df2], ignore_index=True).drop_duplicates()
-        
-        # Filtering: keeping just login actions
-        df = df[df['action'] == 'login']
-        
-        # Formatting datetime to export as json string
-        df['timestamp'] = df['timestamp'].astype('str')
-        
-        # Saving result
-        df.to_json(output, orient='records', indent=4)
+        if external:
+            partitions = partitions or partitions_for([file1, file2])
+            with stage('merge_json_files_external'):
+                # Precision of the fractions of the whole output, known once every frame is spilled
+                digits = []
+
+                def frames():
+                    for file in (file1, file2):
+                        for df in iter_json_frames(file, convert_dates=False):
+                            df = _prepare(df)
+                            digits.append(fraction_digits(df.loc[df['action'] == 'login', 'timestamp']))
+                            yield df
+
+                with stage('dedup_external'):
+                    deduplicated = drop_duplicates_external(frames(), 'timestamp', partitions, spill_dir, stable,
+                                                            where=lambda df: df['action'] == 'login')
+                    rows = write_records((_format(df, max(digits, default=0)) for df in deduplicated), output)
+                print(f"{rows} records deduplicated through {partitions} partitions")
+            print(f"Merged files into file: {output}")
+            return
+
+        with stage('merge_json_files'):
+            # Loading files
+            with stage('load') as s:
+                df1 = read_json_frame(file1, workers=workers, convert_dates=False)
+                df2 = read_json_frame(file2, workers=workers, convert_dates=False)
+                s.add_rows(len(df1) + len(df2))
+            
+            with stage('optimize', rows=len(df1) + len(df2)):
+                # Timestamps as epoch nanoseconds until the output is written
+                df1 = _prepare(df1)
+                df2 = _prepare(df2)
+
+            with stage('dedup', rows=len(df1) + len(df2)):
+                # Merging dfs and removing duplicates
+                df = concat_frames([df1, df2]).drop_duplicates()
+            
+            with stage('filter', rows=len(df)):
+                # Filtering: keeping just login actions
+                df = df[df['action'] == 'login']
+            
+            with stage('serialize', rows=len(df)):
+                # Formatting datetime to export as json string
+                df = _format(df)
+                
+                # Saving result
+                write_records(df, output)
         
         print(f"Merged files into file: {output}")
         
@@ -33,9 +87,34 @@ def merge_json_files(file1: str, file2: str, output: str) -> None:
         print(f"Error processing data: {e}")
     except Exception as e:
         print(f"Unknow error: {e}")    
-    
 
-merge_json_files('file1.json', 'file2.json', 'problem-1_result.json')
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Optimizes a frame read by merge_json_files, with timestamps as UTC epoch nanoseconds:
+    fractions of seconds are kept and timestamps with different offsets stay distinct.
+    Files without timestamps get missing ones.
+    """
+    from data_manipulation.dtypes import optimize_dtypes
+    from data_manipulation.timeparse import NAT, parse_iso8601
+
+    if 'timestamp' not in df.columns:
+        df['timestamp'] = NAT
+    df = optimize_dtypes(df, exclude=['timestamp'])
+    df['timestamp'] = parse_iso8601(df['timestamp'], unit='ns', utc=True)
+    return df
+
+
+def _format(df: pd.DataFrame, digits: int = None) -> pd.DataFrame:
+    from data_manipulation.timeparse import format_epoch
+
+    df['timestamp'] = format_epoch(df['timestamp'], unit='ns', digits=digits)
+    return df
+
+
+# Example usage
+if __name__ == "__main__":
+    merge_json_files('file1.json', 'file2.json', 'problem-1_result.json')
 
 
 